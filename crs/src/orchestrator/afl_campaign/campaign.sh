@@ -0,0 +1,57 @@
+#!/bin/bash
+# usage: <timeout in minutes> <instances> <command under test>
+#
+# Runs an AFL++ campaign of one main (-M) and instances-1 secondary (-S) instances
+# on a shared output directory. An instance with state left in the output
+# directory by an earlier campaign resumes from it (-i -) instead of starting
+# from the seeds again. New queue and crash entries of every instance are hard
+# linked (copied across file systems) into the benign and crashing test
+# directories while the campaign runs, named after the instance they come from.
+timeout_minutes=$1
+instances=$2
+shift 2
+
+export_dir() {
+    for source in "$1"/id*; do
+        target="$2/$3-${source##*/}"
+        [ -f "$source" ] && [ ! -e "$target" ] || continue
+        ln "$source" "$target" 2>/dev/null || cp "$source" "$target"
+    done
+}
+
+export_tests() {
+    for instance_dir in "$AFL_CAMPAIGN_OUTPUT"/*/; do
+        instance=$(basename "$instance_dir")
+        export_dir "${instance_dir}queue" "$AFL_CAMPAIGN_BENIGN_TESTS" \
+            "$instance"
+        export_dir "${instance_dir}crashes" "$AFL_CAMPAIGN_CRASHING_TESTS" \
+            "$instance"
+    done
+}
+
+pids=()
+for index in $(seq 0 $((instances - 1))); do
+    if [ "$index" -eq 0 ]; then
+        role=-M; name=main; log=/dev/stdout
+    else
+        role=-S; name=secondary$index; log="$AFL_CAMPAIGN_OUTPUT/$name.log"
+    fi
+    input=$AFL_CAMPAIGN_INPUT
+    [ -f "$AFL_CAMPAIGN_OUTPUT/$name/fuzzer_stats" ] && input=-
+    timeout -k 5m "${timeout_minutes}m" afl-fuzz -i "$input" \
+        -o "$AFL_CAMPAIGN_OUTPUT" $role $name -d -m none $AFL_CAMPAIGN_FLAGS \
+        -- "$@" >>"$log" 2>&1 &
+    pids+=($!)
+done
+
+while kill -0 "${pids[@]}" 2>/dev/null; do
+    sleep "$AFL_CAMPAIGN_EXPORT_INTERVAL"
+    export_tests
+done
+
+# the exit status of the campaign is the one of the main instance
+wait "${pids[0]}"
+status=$?
+wait
+export_tests
+exit $status
@@ -0,0 +1,106 @@
+#!/bin/bash
+# usage: <budget in seconds> <command under test>
+#
+# Minimizes the tests exported by campaign.sh within a time budget. Dropped and
+# replaced originals are moved to the work directory, every replacement is
+# recorded as a line "<test directory>\t<kept test>\t<original test>" in
+# $AFL_MINIMIZE_DIR/replaced. Seeds are never dropped nor minimized.
+deadline=$(($(date +%s) + $1))
+shift
+work=$AFL_MINIMIZE_DIR
+benign=$AFL_MINIMIZE_BENIGN_TESTS
+crashing=$AFL_MINIMIZE_CRASHING_TESTS
+# replacements of earlier runs of a resumed campaign are kept
+rm -rf "$work/maps"
+mkdir -p "$work/maps" "$work/benign_tests" "$work/crashing_tests"
+touch "$work/replaced"
+
+remaining() {
+    echo $((deadline - $(date +%s)))
+}
+
+# corpus: the coverage maps of all benign tests are reduced like afl-cmin does,
+# every tuple (edge and hit count bucket), rarest first, keeps the smallest test
+# covering it unless a kept test covers it already; every dropped test is
+# replaced by the kept test it shares most tuples with
+left=$(remaining)
+if [ "$left" -gt 0 ] && timeout "$left" afl-showmap -q -m none -t 5000 \
+    -i "$benign" -o "$work/maps" -- "$@" >/dev/null 2>&1; then
+    find "$benign" -maxdepth 1 -type f -printf "%s\t%f\n" >"$work/sizes"
+    awk -F "\t" '
+        FNR == NR { size[$2] = $1; next }
+        {
+            name = FILENAME; sub(".*/", "", name)
+            if (!(name in size)) next
+            tuples[name] = tuples[name] " " $0
+            count[$0]++
+            if (!($0 in best) || size[name] < size[best[$0]]) best[$0] = name
+        }
+        END { for (tuple in count) print count[tuple] "\t" tuple "\t" best[tuple] }
+    ' "$work/sizes" "$work/maps"/* | sort -n >"$work/tuples"
+    awk -F "\t" '
+        FILENAME != tuple_file {
+            name = FILENAME; sub(".*/", "", name)
+            tuples[name] = tuples[name] " " $0
+            next
+        }
+        !($2 in holder) {
+            kept[$3] = 1
+            n = split(tuples[$3], tuple_list, " ")
+            for (i = 1; i <= n; i++)
+                if (!(tuple_list[i] in holder)) holder[tuple_list[i]] = $3
+        }
+        END {
+            for (name in tuples) {
+                if (name in kept) continue
+                n = split(tuples[name], tuple_list, " ")
+                split("", votes); choice = ""
+                for (i = 1; i <= n; i++) {
+                    other = holder[tuple_list[i]]
+                    if (++votes[other] > votes[choice]) choice = other
+                }
+                print choice "\t" name
+            }
+        }
+    ' tuple_file="$work/tuples" "$work/maps"/* "$work/tuples" |
+        while IFS="$(printf "\t")" read -r kept name; do
+            # only entries exported from the campaign, not the seeds
+            case "$name" in *-id:*) ;; *) continue ;; esac
+            mv "$benign/$name" "$work/benign_tests/" &&
+                printf "benign_tests\t%s\t%s\n" "$kept" "$name" >>"$work/replaced"
+        done
+fi
+
+# crashes: every crash is minimized by afl-tmin, keeping it crashing, the
+# original is replaced by its minimized input; minimized inputs with the same
+# content are replaced by the first of them
+for crash in "$crashing"/*-id:*; do
+    left=$(remaining)
+    [ -f "$crash" ] && [ "$left" -gt 0 ] || continue
+    name=${crash##*/}
+    # minimized by an earlier run of a resumed campaign
+    [ -e "$work/crashing_tests/$name" ] && continue
+    rm -f "$work/tmin"
+    if timeout "$left" afl-tmin -m none -i "$crash" -o "$work/tmin" \
+        -- "$@" >/dev/null 2>&1 && [ -s "$work/tmin" ]; then
+        mv "$crash" "$work/crashing_tests/$name" && mv "$work/tmin" "$crash" &&
+            printf "crashing_tests\t%s\t%s\n" "$name" "$name" >>"$work/replaced"
+    fi
+done
+last_digest=""
+md5sum -- "$crashing"/*-id:* 2>/dev/null | sort | while read -r digest crash; do
+    name=${crash##*/}
+    if [ "$digest" != "$last_digest" ]; then
+        last_digest=$digest
+        kept=$name
+        continue
+    fi
+    if [ -e "$work/crashing_tests/$name" ]; then
+        # the original was kept when it was minimized
+        rm "$crash"
+    else
+        mv "$crash" "$work/crashing_tests/"
+    fi
+    printf "crashing_tests\t%s\t%s\n" "$kept" "$name" >>"$work/replaced"
+done
+exit 0
@@ -0,0 +1,245 @@
+import atexit
+import contextvars
+import hashlib
+import json
+import os
+import queue
+import shlex
+import shutil
+import tempfile
+import threading
+from os.path import abspath
+from os.path import basename
+from os.path import dirname
+from os.path import join
+from os.path import normpath
+from typing import Any
+from typing import Dict
+from typing import List
+from typing import Optional
+
+from app.core import emitter
+from app.core import runner
+from app.core import values
+
+# Result archives are zstd compressed tarballs. Files of at least
+# values.archive_dedup_min_size bytes are kept once per archive directory in a
+# content addressed blob store and are only listed in the manifest of the
+# tarball, so identical fuzzer queues, traces, ... of later tasks cost nothing.
+ARCHIVE_EXTENSION = ".tar.zst"
+LEGACY_ARCHIVE_EXTENSION = ".tar.gz"
+MANIFEST_NAME = ".archive-manifest.json"
+BLOB_DIR = ".blobs"
+
+
+def archive_path(dir_archive: str, experiment_id: str) -> str:
+    return join(dir_archive, experiment_id + ARCHIVE_EXTENSION)
+
+
+def _blob_path(dir_archive: str, digest: str) -> str:
+    return join(dir_archive, BLOB_DIR, digest[:2], digest + ".zst")
+
+
+def _zstd() -> str:
+    return "zstd -T{} -q".format(values.archive_threads)
+
+
+def _file_digest(file_path: str) -> str:
+    file_hash = hashlib.sha256()
+    with open(file_path, "rb") as archived_file:
+        for chunk in iter(lambda: archived_file.read(1 << 20), b""):
+            file_hash.update(chunk)
+    return file_hash.hexdigest()
+
+
+def _store_blobs(dir_results: str, dir_archive: str) -> Dict[str, str]:
+    """Moves the content of the large files of the results into the blob store
+    and returns their digests, keyed by their name in the tarball"""
+    parent_dir = dirname(abspath(dir_results))
+    manifest: Dict[str, str] = dict()
+    for directory, _, file_names in os.walk(dir_results):
+        for file_name in file_names:
+            file_path = join(directory, file_name)
+            if os.path.islink(file_path):
+                continue
+            if os.path.getsize(file_path) < values.archive_dedup_min_size:
+                continue
+            digest = _file_digest(file_path)
+            blob_path = _blob_path(dir_archive, digest)
+            if not os.path.isfile(blob_path):
+                os.makedirs(dirname(blob_path), exist_ok=True)
+                tmp_blob_path = "{}.{}".format(blob_path, threading.get_ident())
+                result = runner.run(
+                    "{} -f {} -o {}".format(
+                        _zstd(), shlex.quote(file_path), shlex.quote(tmp_blob_path)
+                    )
+                )
+                if result.return_code != 0:
+                    continue
+                os.replace(tmp_blob_path, blob_path)
+            manifest[os.path.relpath(file_path, parent_dir)] = digest
+    return manifest
+
+
+def create_archive(dir_results: str, dir_archive: str) -> int:
+    for output_dir in [dir_results, dir_archive]:
+        os.makedirs(output_dir, exist_ok=True)
+
+    experiment_id = basename(normpath(dir_results))
+    parent_dir = dirname(abspath(dir_results))
+    manifest = _store_blobs(dir_results, dir_archive)
+
+    with tempfile.TemporaryDirectory(prefix="archive-") as tmp_dir:
+        os.makedirs(join(tmp_dir, experiment_id))
+        with open(join(tmp_dir, experiment_id, MANIFEST_NAME), "w") as manifest_file:
+            json.dump(manifest, manifest_file)
+        exclude_list = join(tmp_dir, "exclude")
+        with open(exclude_list, "w") as exclude_file:
+            exclude_file.writelines(name + "\n" for name in manifest)
+
+        target = archive_path(dir_archive, experiment_id)
+        tmp_target = "{}.{}".format(target, threading.get_ident())
+        archive_command = (
+            "set -o pipefail ; tar -cf - --no-wildcards --exclude-from={exclude} "
+            "-C {parent} {id} -C {tmp} {manifest} | {zstd} -o {out} "
+            "&& mv -f {out} {target}"
+        ).format(
+            exclude=shlex.quote(exclude_list),
+            parent=shlex.quote(parent_dir),
+            id=shlex.quote(experiment_id),
+            tmp=shlex.quote(tmp_dir),
+            manifest=shlex.quote(join(experiment_id, MANIFEST_NAME)),
+            zstd=_zstd(),
+            out=shlex.quote(tmp_target),
+            target=shlex.quote(target),
+        )
+        result = runner.run("bash -c {}".format(shlex.quote(archive_command)))
+    if result.return_code != 0 and os.path.isfile(tmp_target):
+        os.remove(tmp_target)
+    return result.return_code
+
+
+def extract_archive(archive_file: str, dir_target: str) -> bool:
+    """Extracts a result archive, including the files kept in the blob store"""
+    os.makedirs(dir_target, exist_ok=True)
+    if archive_file.endswith(LEGACY_ARCHIVE_EXTENSION):
+        extract_command = "tar -xzf {} -C {}".format(
+            shlex.quote(archive_file), shlex.quote(dir_target)
+        )
+        return runner.run(extract_command).return_code == 0
+
+    experiment_id = basename(archive_file)[: -len(ARCHIVE_EXTENSION)]
+    extract_command = "set -o pipefail ; {} -dc {} | tar -xf - -C {}".format(
+        _zstd(), shlex.quote(archive_file), shlex.quote(dir_target)
+    )
+    if runner.run("bash -c {}".format(shlex.quote(extract_command))).return_code:
+        return False
+
+    manifest_path = join(dir_target, experiment_id, MANIFEST_NAME)
+    if not os.path.isfile(manifest_path):
+        return True
+    with open(manifest_path, "r") as manifest_file:
+        manifest: Dict[str, str] = json.load(manifest_file)
+    os.remove(manifest_path)
+    for name, digest in manifest.items():
+        file_path = join(dir_target, name)
+        os.makedirs(dirname(file_path), exist_ok=True)
+        restore_command = "{} -d -f {} -o {}".format(
+            _zstd(),
+            shlex.quote(_blob_path(dirname(archive_file), digest)),
+            shlex.quote(file_path),
+        )
+        if runner.run(restore_command).return_code != 0:
+            emitter.warning("\t\t[framework] could not restore {}".format(name))
+            return False
+    return True
+
+
+def find_archive(dir_archive: str, experiment_id: str) -> Optional[str]:
+    for extension in [ARCHIVE_EXTENSION, LEGACY_ARCHIVE_EXTENSION]:
+        archive_file = join(dir_archive, experiment_id + extension)
+        if os.path.isfile(archive_file):
+            return archive_file
+    return None
+
+
+class ResultArchiver:
+    """
+    Archives results on background threads. The queue is bounded, so a task
+    only waits for the archiver when it falls behind by more than
+    values.archive_queue_size results.
+    """
+
+    def __init__(self) -> None:
+        self.jobs: "queue.Queue[Any]" = queue.Queue(maxsize=values.archive_queue_size)
+        self.lock = threading.Lock()
+        self.pending: Dict[str, threading.Event] = dict()
+        self.workers: List[threading.Thread] = []
+
+    def start(self) -> None:
+        with self.lock:
+            if self.workers:
+                return
+            for index in range(max(1, values.archive_workers)):
+                worker = threading.Thread(
+                    target=self.work, name="archiver-{}".format(index), daemon=True
+                )
+                worker.start()
+                self.workers.append(worker)
+
+    def submit(self, dir_results: str, dir_archive: str, clean: bool) -> None:
+        self.start()
+        key = abspath(dir_results)
+        done = threading.Event()
+        with self.lock:
+            previous = self.pending.get(key)
+            self.pending[key] = done
+        if previous:
+            # the same results are archived again, keep the order
+            previous.wait()
+        context = contextvars.copy_context()
+        self.jobs.put((context, dir_results, dir_archive, clean, done))
+
+    def work(self) -> None:
+        while True:
+            context, dir_results, dir_archive, clean, done = self.jobs.get()
+            try:
+                context.run(self.archive, dir_results, dir_archive, clean)
+            except Exception as ex:
+                emitter.warning(
+                    "\t\t[framework] archiving {} failed: {}".format(dir_results, ex)
+                )
+            finally:
+                done.set()
+                with self.lock:
+                    if self.pending.get(abspath(dir_results)) is done:
+                        del self.pending[abspath(dir_results)]
+
+    def archive(self, dir_results: str, dir_archive: str, clean: bool) -> None:
+        if create_archive(dir_results, dir_archive) != 0:
+            emitter.warning("\t\t[framework] could not archive {}".format(dir_results))
+        elif clean:
+            shutil.rmtree(dir_results, ignore_errors=True)
+            os.makedirs(dir_results, exist_ok=True)
+
+    def wait(self, dir_results: Optional[str] = None) -> None:
+        """Waits for the archive of the results, or for all archives"""
+        with self.lock:
+            if dir_results:
+                events = [self.pending.get(abspath(dir_results))]
+            else:
+                events = list(self.pending.values())
+        for event in events:
+            if event:
+                event.wait()
+
+    def after_fork(self) -> None:
+        self.jobs = queue.Queue(maxsize=values.archive_queue_size)
+        self.lock = threading.Lock()
+        self.pending = dict()
+        self.workers = []
+
+
+result_archiver = ResultArchiver()
+os.register_at_fork(after_in_child=result_archiver.after_fork)
+atexit.register(result_archiver.wait)
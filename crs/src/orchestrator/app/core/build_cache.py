@@ -0,0 +1,188 @@
+import fnmatch
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+from os.path import join
+from typing import Any
+from typing import Dict
+from typing import List
+from typing import Optional
+
+from app.core import values
+
+# Entries of a setup that are written while a task runs (outputs, tests of a
+# subtask, generated meta-data and image build files) and therefore are not
+# inputs of the build, matched against paths relative to the setup
+IGNORED_NAMES = [
+    "bugs",
+    "localization",
+    "patches",
+    "validation",
+    "selection",
+    "crashing_tests",
+    "benign_tests",
+    "meta-data*.json",
+    "Dockerfile-*",
+    "*.context",
+    ".build_default",
+    ".build_lock",
+]
+
+
+def _is_ignored(relative_path: str, ignored: List[str]) -> bool:
+    return any(fnmatch.fnmatch(relative_path, pattern) for pattern in ignored)
+
+
+def _fingerprint_memo_path(name: str) -> str:
+    return join(
+        values.dir_build_cache,
+        "fingerprints",
+        hashlib.sha1(name.encode()).hexdigest() + ".json",
+    )
+
+
+def fingerprint_tree(root: str, name: str, ignored: Optional[List[str]] = None) -> str:
+    """
+    Content hash of a directory tree. The digest of every file is remembered
+    under its path relative to the tree, together with its size and modification
+    time, in a memo shared by all copies of the tree with the same name, so only
+    files that changed since the last fingerprint are read again.
+    """
+    ignored = IGNORED_NAMES if ignored is None else ignored
+    memo_path = _fingerprint_memo_path(name)
+    memo: Dict[str, List[Any]] = dict()
+    if os.path.isfile(memo_path):
+        try:
+            with open(memo_path, "r") as memo_file:
+                memo = json.load(memo_file)
+        except (OSError, ValueError):
+            memo = dict()
+
+    tree = hashlib.sha256()
+    updated: Dict[str, List[Any]] = dict()
+    for directory, dir_names, file_names in os.walk(root):
+        dir_names[:] = sorted(
+            d
+            for d in dir_names
+            if not _is_ignored(os.path.relpath(join(directory, d), root), ignored)
+        )
+        for file_name in sorted(file_names):
+            file_path = join(directory, file_name)
+            relative_path = os.path.relpath(file_path, root)
+            if _is_ignored(relative_path, ignored):
+                continue
+            if os.path.islink(file_path):
+                digest = "link:" + os.readlink(file_path)
+            else:
+                try:
+                    stat = os.stat(file_path)
+                except OSError:
+                    continue
+                entry = memo.get(relative_path)
+                if entry and entry[0] == stat.st_size and entry[1] == stat.st_mtime_ns:
+                    digest = entry[2]
+                else:
+                    file_hash = hashlib.sha256()
+                    with open(file_path, "rb") as source_file:
+                        for chunk in iter(lambda: source_file.read(1 << 20), b""):
+                            file_hash.update(chunk)
+                    digest = file_hash.hexdigest()
+                updated[relative_path] = [stat.st_size, stat.st_mtime_ns, digest]
+            tree.update(relative_path.encode())
+            tree.update(digest.encode())
+
+    os.makedirs(os.path.dirname(memo_path), exist_ok=True)
+    memo_fd, tmp_memo_path = tempfile.mkstemp(
+        prefix=os.path.basename(memo_path), dir=os.path.dirname(memo_path)
+    )
+    try:
+        with os.fdopen(memo_fd, "w") as memo_file:
+            json.dump(updated, memo_file)
+        os.replace(tmp_memo_path, memo_path)
+    except OSError:
+        if os.path.exists(tmp_memo_path):
+            os.remove(tmp_memo_path)
+    return tree.hexdigest()
+
+
+def build_key(
+    source_dir: str,
+    name: str,
+    build_config: Dict[str, Any],
+    ignored: Optional[List[str]] = None,
+) -> str:
+    """Key of a subject build: its sources and scripts plus the build configuration"""
+    key = hashlib.sha256(fingerprint_tree(source_dir, name, ignored).encode())
+    key.update(json.dumps(build_config, sort_keys=True, default=str).encode())
+    return key.hexdigest()
+
+
+def has_entry(key: str) -> bool:
+    return os.path.isfile(join(values.dir_build_cache, key, ".complete"))
+
+
+def mark_used(key: str) -> None:
+    """Records the use of an entry, the least recently used ones are evicted first"""
+    try:
+        os.utime(join(values.dir_build_cache, key, ".complete"))
+    except OSError:
+        pass
+
+
+def evict(max_entries: int) -> None:
+    """Removes the least recently used entries beyond max_entries"""
+    entries = []
+    for entry_name in os.listdir(values.dir_build_cache):
+        marker = join(values.dir_build_cache, entry_name, ".complete")
+        try:
+            entries.append((os.stat(marker).st_mtime, entry_name))
+        except OSError:
+            continue
+    entries.sort(reverse=True)
+    for _, entry_name in entries[max_entries:]:
+        # renamed first so that no restore starts on a half removed entry
+        entry_dir = join(values.dir_build_cache, entry_name)
+        stale_dir = "{}.evicted.{}".format(entry_dir, os.getpid())
+        try:
+            os.rename(entry_dir, stale_dir)
+        except OSError:
+            continue
+        shutil.rmtree(stale_dir, ignore_errors=True)
+
+
+def cache_root(container_id: Optional[str]) -> str:
+    return values.container_build_cache if container_id else values.dir_build_cache
+
+
+def restore_command(
+    key: str, setup_dir: str, target_dir: str, container_id: Optional[str]
+) -> str:
+    """Shell command laying out target_dir as setup and build would: the current
+    setup directory overlaid with the cached build, reflinked where the file
+    system supports it"""
+    entry_dir = join(cache_root(container_id), key, "tree")
+    return (
+        "mkdir -p {2} && cp -a --reflink=auto {1}/. {2}/ "
+        "&& cp -a --reflink=auto {0}/. {2}/"
+    ).format(entry_dir, setup_dir, target_dir)
+
+
+def store_command(
+    key: str,
+    source_dir: str,
+    container_id: Optional[str],
+    ignored: Optional[List[str]] = None,
+) -> str:
+    """Shell command publishing the build in source_dir under the key without
+    the ignored entries, which a restore takes from the setup directory; a
+    concurrent store of the same key leaves the first entry in place"""
+    ignored = IGNORED_NAMES if ignored is None else ignored
+    entry_dir = join(cache_root(container_id), key)
+    tmp_dir = "{}.tmp.$$".format(entry_dir)
+    return (
+        "mkdir -p {0}/tree && cp -a --reflink=auto {1}/. {0}/tree/ "
+        "&& (cd {0}/tree && rm -rf -- {3}) "
+        "&& touch {0}/.complete && (mv -T {0} {2} 2>/dev/null || rm -rf {0})"
+    ).format(tmp_dir, source_dir, entry_dir, " ".join(ignored))
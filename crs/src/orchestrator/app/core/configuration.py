@@ -14,6 +14,7 @@ from typing import List
 
 from app.core import definitions
 from app.core import emitter
+from app.core import registry
 from app.core import utilities
 from app.core import values
 from app.core.configs.Config import Config
@@ -50,27 +51,10 @@ def load_class(class_name: str) -> Any:
 
 def load_tool(tool_name: str, tool_type: str) -> AbstractTool:
     #emitter.normal(f"\t[framework] loading {tool_type} tool {tool_name}")
-    tool_directory = f"{values.dir_tool_drivers}/{tool_type}"
-    existing_tool_list = [
-        (str(x).split("/")[-1], str(x).split("/")[-2])
-        for x in pathlib.Path(tool_directory).rglob("*.py")
-    ]
-    tool_class_name = None
-    tool_language = None
-
-    for tool, language in existing_tool_list:
-        if tool.lower().replace(".py", "") == tool_name.lower():
-            tool_class_name = tool.replace(".py", "")
-            tool_language = language
-    if not tool_class_name:
+    tool = registry.create_tool(tool_name, tool_type)
+    if tool is None:
         utilities.error_exit(f"Unknown tool name {tool_name} for type {tool_type}")
-    else:
-        mod = __import__(
-            f"app.drivers.tools.{tool_type}.{tool_language}", fromlist=[tool_class_name]
-        )
-        tool_class = getattr(mod, tool_class_name)
-        initializer = getattr(tool_class, tool_class_name)
-        return cast(AbstractTool, initializer())
+    return tool
 
 
 def load_benchmark(benchmark_name: str) -> AbstractBenchmark:
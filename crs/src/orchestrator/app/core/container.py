@@ -1,8 +1,12 @@
 import json
 import os
 import random
+import threading
+import time
 import traceback
+from concurrent.futures import Future
 from typing import Any
+from typing import Callable
 from typing import cast
 from typing import Dict
 from typing import List
@@ -17,20 +21,171 @@ import semver
 
 from app.core import definitions
 from app.core import emitter
+from app.core import runner
 from app.core import utilities
 from app.core import values
 
 cached_client = None
-image_map = {}
+
+
+def image_key(image_name: str, tag_name: str = "latest") -> str:
+    """name:tag key of an image, the tag is kept if the name already has one"""
+    if ":" in image_name.split("/")[-1]:
+        return image_name
+    return "{}:{}".format(image_name, tag_name)
+
+
+class ImageCache:
+    """
+    Index of the local images by name:tag and by digest.
+    It is filled with a single listing of the images and then kept up to
+    date from the image events of the Docker daemon. Concurrent pulls and
+    builds of the same image are performed once, and pulls that already
+    happened less than values.image_pull_ttl seconds ago are not repeated.
+    """
+
+    def __init__(self) -> None:
+        self.lock = threading.RLock()
+        self.by_tag: Dict[str, Any] = dict()
+        self.by_digest: Dict[str, Any] = dict()
+        self.pulled_at: Dict[str, float] = dict()
+        self.in_flight: Dict[str, Future] = dict()  # type: ignore
+        self.loaded = False
+        self.last_event = 0
+        self.watcher: Optional[threading.Thread] = None
+
+    def index(self, image: Any) -> None:
+        with self.lock:
+            self.forget(image.id)
+            self.add(image)
+
+    def add(self, image: Any) -> None:
+        with self.lock:
+            for tag in image.tags:
+                self.by_tag[tag] = image
+            self.by_digest[image.id] = image
+            for repo_digest in image.attrs.get("RepoDigests", []):
+                self.by_digest[repo_digest.split("@")[-1]] = image
+                self.by_digest[repo_digest] = image
+
+    def forget(self, image_id: str) -> None:
+        with self.lock:
+            for cache in [self.by_tag, self.by_digest]:
+                for key in [k for k, v in cache.items() if v.id == image_id]:
+                    del cache[key]
+
+    def load(self, client: docker.DockerClient) -> None:
+        with self.lock:
+            if self.loaded:
+                return
+            self.last_event = int(time.time())
+            self.by_tag.clear()
+            self.by_digest.clear()
+            for image in client.images.list():
+                if image.tags:
+                    self.add(image)
+            self.loaded = True
+            emitter.debug("Image map: {}".format(list(self.by_tag.keys())))
+        self.watch()
+
+    def watch(self) -> None:
+        with self.lock:
+            if self.watcher and self.watcher.is_alive():
+                return
+            self.watcher = threading.Thread(
+                target=self.follow_events, name="image-events", daemon=True
+            )
+            self.watcher.start()
+
+    def follow_events(self) -> None:
+        client = None
+        try:
+            # the event stream blocks, so it gets a client of its own
+            client = docker.DockerClient(
+                base_url=values.docker_host, version="1.41", timeout=None
+            )
+            for event in client.events(
+                since=self.last_event, filters={"type": "image"}, decode=True
+            ):
+                self.last_event = int(event.get("time", self.last_event))
+                image_id = event.get("id", "")
+                action = event.get("Action", event.get("status", ""))
+                if action == "delete":
+                    self.forget(image_id)
+                    continue
+                try:
+                    self.index(client.images.get(image_id))
+                except docker.errors.NotFound:  # type: ignore
+                    self.forget(image_id)
+        except Exception as ex:
+            emitter.debug("[docker-api] image event stream closed: {}".format(ex))
+        finally:
+            with self.lock:
+                # without events the cache can not be trusted anymore, the next
+                # lookup lists the images again and starts a new watcher
+                self.loaded = False
+                if self.watcher is threading.current_thread():
+                    self.watcher = None
+            if client:
+                client.close()
+
+    def after_fork(self) -> None:
+        # the event thread does not survive a fork, the child lists the images
+        # again on its first lookup and starts a watcher of its own
+        self.lock = threading.RLock()
+        self.in_flight = dict()
+        self.watcher = None
+        self.loaded = False
+
+    def get(self, key: str) -> Any:
+        client = get_client()
+        if not self.loaded:
+            self.load(client)
+        with self.lock:
+            if key in self.by_tag:
+                return self.by_tag[key]
+            if key in self.by_digest:
+                return self.by_digest[key]
+        if self.watcher and self.watcher.is_alive():
+            return None
+        try:
+            image = client.images.get(key)
+        except (docker.errors.ImageNotFound, docker.errors.APIError):  # type: ignore
+            return None
+        self.index(image)
+        return image
+
+    def single_flight(self, key: str, action: Callable[[], Any]) -> Any:
+        """Runs the action, or waits for the identical action already running"""
+        with self.lock:
+            running = self.in_flight.get(key)
+            if running is None:
+                future: Future = Future()  # type: ignore
+                self.in_flight[key] = future
+        if running is not None:
+            return running.result()
+        try:
+            result = action()
+            future.set_result(result)
+            return result
+        except BaseException as ex:
+            future.set_exception(ex)
+            raise
+        finally:
+            with self.lock:
+                del self.in_flight[key]
+
+
+image_cache = ImageCache()
+os.register_at_fork(after_in_child=image_cache.after_fork)
 
 
 def get_client() -> docker.DockerClient:
     """
     Utility method to track all client usages.
-    Pulls the images at the current state to allow for less network calls.
+    Loads the local images on first use to allow for less network calls.
     """
     global cached_client
-    global image_map
     if not cached_client:
         cached_client = docker.DockerClient(
             base_url=values.docker_host,
@@ -40,38 +195,38 @@ def get_client() -> docker.DockerClient:
             # use_ssh_client=True,
         )
         try:
-            image_cache = cached_client.images.list()
+            image_cache.load(cached_client)
         except IOError as ex:
             emitter.error(ex)
             raise RuntimeError(
                 "[error] docker connection was unsuccessful. Check if Docker is running or there is a connection to the specified host."
             )
-        for image in image_cache:
-            tag_list = image.tags  # type: ignore
-            if not tag_list:
-                continue
-            for image_tag in tag_list:
-                image_map[image_tag] = image
-        emitter.debug("Image map: {}".format(image_map))
     return cached_client
 
 
 def image_exists(image_name: str, tag_name: str = "latest") -> bool:
-    _ = get_client()
     emitter.debug("Checking for image {} with tag {}".format(image_name, tag_name))
-    if f"{image_name}:{tag_name}" not in image_map:
-        return False
-    return True
+    return image_cache.get(image_key(image_name, tag_name)) is not None
 
 
 def get_image(image_name: str, tag_name: str = "latest") -> Any:
-    _ = get_client()
-    if f"{image_name}:{tag_name}" not in image_map:
-        return None
-    return image_map[f"{image_name}:{tag_name}"]
+    return image_cache.get(image_key(image_name, tag_name))
 
 
 def pull_image(image_name: str, tag_name: str) -> Any:
+    key = image_key(image_name, tag_name)
+    pulled_at = image_cache.pulled_at.get(key, None)
+    if pulled_at is not None and time.time() - pulled_at < values.image_pull_ttl:
+        image = image_cache.get(key)
+        if image is not None:
+            emitter.debug("\t\t[framework] image {} was pulled recently".format(key))
+            return image
+    return image_cache.single_flight(
+        "pull:" + key, lambda: _pull_image(image_name, tag_name)
+    )
+
+
+def _pull_image(image_name: str, tag_name: str) -> Any:
     client = get_client()
     emitter.normal(
         "\t\t[framework] pulling docker image {}:{}".format(image_name, tag_name)
@@ -84,7 +239,8 @@ def pull_image(image_name: str, tag_name: str) -> Any:
             for sub_line in line["status"].split("\n"):
                 emitter.build("[docker-api] {}".format(sub_line))
         image = client.images.pull(repository=image_name, tag=tag_name)
-        image_map[image_name] = (image.tags[1:], image)
+        image_cache.index(image)
+        image_cache.pulled_at[image_key(image_name, tag_name)] = time.time()
     except docker.errors.APIError as exp:  # type: ignore
         emitter.warning(
             "\t[docker-api][warning] unable to pull image: docker daemon error"
@@ -101,10 +257,24 @@ def pull_image(image_name: str, tag_name: str) -> Any:
     return image
 
 
-def build_image(dockerfile_path: str, image_name: str) -> str:
+def build_image(
+    dockerfile_path: str, image_name: str, context_dir: Optional[str] = None
+) -> str:
+    return cast(
+        str,
+        image_cache.single_flight(
+            "build:" + image_key(image_name),
+            lambda: _build_image(dockerfile_path, image_name, context_dir),
+        ),
+    )
+
+
+def _build_image(
+    dockerfile_path: str, image_name: str, context_dir: Optional[str] = None
+) -> str:
     client = get_client()
     emitter.normal("\t\t[framework] building docker image {}".format(image_name))
-    context_dir = os.getenv(
+    context_dir = context_dir or os.getenv(
         "AIXCC_CRS_SCRATCH_SPACE", os.path.abspath(os.path.dirname(dockerfile_path))
     )
     if os.path.isfile(dockerfile_path):
@@ -132,10 +302,7 @@ def build_image(dockerfile_path: str, image_name: str) -> str:
                 utilities.error_exit(
                     "[error] Image was not build successfully. Please check whether the file builds outside of Cerberus"
                 )
-            image = client.images.get(image_name)
-            if ":" not in image_name:
-                image_name += ":latest"
-            image_map[image_name] = image
+            image_cache.index(client.images.get(image_name))
             return id
         except docker.errors.BuildError as ex:  # type: ignore
             emitter.error(ex)
@@ -155,6 +322,17 @@ def build_image(dockerfile_path: str, image_name: str) -> str:
         utilities.error_exit("[error] unable to build image: Dockerfile not found")
 
 
+def tag_image(image: Any, image_name: str, tag_name: str = "latest") -> None:
+    if ":" in image_name.split("/")[-1]:
+        image_name, tag_name = image_name.rsplit(":", 1)
+    try:
+        image.tag(image_name, tag_name)
+        image_cache.index(get_client().images.get(image.id))
+    except docker.errors.APIError as exp:  # type: ignore
+        emitter.warning("\t[docker-api][warning] unable to tag image")
+        emitter.debug(exp)
+
+
 def build_benchmark_image(image_name: str) -> Optional[str]:
     benchmark_name = image_name.split("-")[0]
     dockerfile_path = os.path.join(
@@ -318,7 +496,10 @@ def build_container(
             container_run_args["mem_limit"] = container_config_dict.get(
                 definitions.KEY_CONTAINER_MEM_LIMIT, default_mem_limit
             )
-
+            if definitions.KEY_CONTAINER_MEM_RESERVATION in container_config_dict:
+                container_run_args["mem_reservation"] = container_config_dict[
+                    definitions.KEY_CONTAINER_MEM_RESERVATION
+                ]
         else:
             container_run_args["mem_limit"] = default_mem_limit
 
@@ -363,35 +544,44 @@ def exec_command(
     command: str,
     workdir: str = values.container_base_experiment,
     env: Dict[str, str] = dict(),
+    log_path: Optional[str] = None,
+    timeout: Optional[float] = None,
 ) -> Tuple[int, Optional[Tuple[Optional[bytes], Optional[bytes]]]]:
+    """
+    Runs the command in the container through the runner, streaming the output
+    into the host file log_path (the job log if none is given); after [timeout]
+    seconds the command is terminated and the exit code is 124
+    """
     client = get_client()
     exit_code: int
     output: Optional[Tuple[Optional[bytes], Optional[bytes]]]
     exit_code = -1
     output = None
     try:
-        container = client.containers.get(container_id)
         command = command.encode().decode("ascii", "ignore")
         print_command = "({}) {}".format(workdir, command)
         if env:
             print_command += f""" ({' '.join(f"{k}={v}" for k, v in env.items())})"""
         emitter.docker_command(print_command)
-        exit_code, output = container.exec_run(  # type: ignore
+        result = runner.run_exec(
+            client.api,
+            container_id,
             command,
-            privileged=True,
-            demux=True,
-            workdir=workdir,
-            tty=True,
-            environment=env,
+            env=env,
+            directory=workdir,
+            log_path=log_path,
+            timeout=timeout,
+            on_output=runner.debug_output() if values.debug else None,
         )
-        if output is not None:
-            for stream in output:
-                if stream is None:
-                    continue
-                if values.debug:
-                    for line in stream.decode("ascii", "ignore").split("\n"):
-                        if line != "":
-                            emitter.debug(line)
+        if result.timed_out:
+            emitter.warning(
+                "[docker-api] {} timed out after {}s".format(command, timeout)
+            )
+        if result.truncated:
+            emitter.warning(
+                "[docker-api] output truncated, see {}".format(result.log_path)
+            )
+        exit_code, output = result.return_code, (result.stdout, result.stderr)
     except docker.errors.NotFound as ex:  # type: ignore
         emitter.error(ex)
         utilities.error_exit(
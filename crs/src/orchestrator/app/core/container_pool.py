@@ -0,0 +1,445 @@
+import atexit
+import contextvars
+import hashlib
+import json
+import os
+import shlex
+import threading
+import time
+import uuid
+from typing import Any
+from typing import Dict
+from typing import List
+from typing import Optional
+from typing import Set
+from typing import Tuple
+
+from app.core import container
+from app.core import definitions
+from app.core import emitter
+from app.core import values
+
+# Warm task containers for short subtasks. A pooled container is created once
+# per (image name, container profile id) with the host roots of the framework
+# bind mounted below STAGING_DIR. A lease bind mounts the directories of the task
+# from there onto their usual paths inside the (privileged) container and sets its
+# cpus and memory reservation, a release unmounts them, kills what the task left
+# running and only returns the container to the pool if its file system shows no
+# other changes. Idle containers of an image name that was rebuilt since, idle
+# for longer than values.container_pool_idle_ttl or over the global
+# values.container_pool_limit are removed.
+
+STAGING_DIR = "/cerberus-host"
+DOCKER_SOCKET = "/var/run/docker.sock"
+
+PoolKey = Tuple[str, str]
+
+
+class _Lease:
+    def __init__(self, key: PoolKey, mounts: List[Tuple[str, str]]):
+        self.key = key
+        self.mounts = mounts
+
+
+def _host_roots() -> List[str]:
+    roots = [
+        os.path.realpath(values.dir_main),
+        os.path.realpath(os.getenv("AIXCC_CRS_SCRATCH_SPACE", values.dir_main)),
+    ]
+    return sorted(set(roots), key=roots.index)
+
+
+def _staged_path(host_path: str) -> Optional[str]:
+    """Path of a host directory inside a pooled container"""
+    host_path = os.path.realpath(host_path)
+    for index, root in enumerate(_host_roots()):
+        if host_path == root or host_path.startswith(root + os.sep):
+            return os.path.join(
+                STAGING_DIR, str(index), os.path.relpath(host_path, root)
+            )
+    return None
+
+
+def _mount_script(mounts: List[Tuple[str, str]]) -> str:
+    return " && ".join(
+        "mkdir -p {1} && mount --bind {0} {1}".format(
+            shlex.quote(staged), shlex.quote(target)
+        )
+        for staged, target in mounts
+    )
+
+
+class ContainerPool:
+    def __init__(self) -> None:
+        self.lock = threading.Lock()
+        self.idle: Dict[PoolKey, List[str]] = dict()
+        self.warming: Dict[PoolKey, int] = dict()
+        self.leases: Dict[str, _Lease] = dict()
+        self.pooled: Set[str] = set()
+        self.baselines: Dict[str, Set[str]] = dict()
+        # image id every pooled container was created from
+        self.images: Dict[str, str] = dict()
+        # time every idle container was returned to the pool
+        self.idle_since: Dict[str, float] = dict()
+        self.threads: List[threading.Thread] = []
+        self.closed = False
+
+    def accepts(self, task_type: Any, gpu: List[str]) -> bool:
+        return (
+            values.container_pool_size > 0
+            and str(task_type) in values.container_pool_task_types
+            # device requests can not be changed on a running container
+            and not gpu
+        )
+
+    def key(self, image_name: str, container_config_info: Dict[str, Any]) -> PoolKey:
+        # the memory reservation sized by the sampler is set on every lease
+        profile = dict(container_config_info or {})
+        profile.pop(definitions.KEY_CONTAINER_MEM_RESERVATION, None)
+        profile_id = profile.get(definitions.KEY_ID) or hashlib.sha1(
+            json.dumps(profile, sort_keys=True, default=str).encode()
+        ).hexdigest()[:8]
+        return (image_name, str(profile_id))
+
+    def create(
+        self, key: PoolKey, cpu: List[str], container_config_info: Dict[str, Any]
+    ) -> Optional[str]:
+        image_name, profile_id = key
+        image = container.get_image(image_name)
+        if image is None:
+            return None
+        volume_list: Dict[str, Dict[str, str]] = {
+            root: {"bind": os.path.join(STAGING_DIR, str(index)), "mode": "rw"}
+            for index, root in enumerate(_host_roots())
+        }
+        volume_list[DOCKER_SOCKET] = {"bind": DOCKER_SOCKET, "mode": "rw"}
+        container_name = "cerberus-pool-{}-{}".format(
+            hashlib.sha1(profile_id.encode()).hexdigest()[:8],
+            uuid.uuid4().hex[:8],
+        )
+        container_id = container.build_container(
+            container_name,
+            volume_list,
+            image_name,
+            cpu,
+            [],
+            container_config_info,
+            not container_config_info.get(
+                definitions.KEY_CONTAINER_ENABLE_NETWORK, True
+            ),
+        )
+        if not container_id:
+            return None
+        with self.lock:
+            self.pooled.add(container_id)
+            self.images[container_id] = image.id
+            self.baselines[container_id] = self.changed_paths(container_id) or set()
+        return container_id
+
+    def take_idle(self, key: PoolKey) -> Optional[str]:
+        """An idle container of the current image of the key"""
+        image = container.get_image(key[0])
+        stale: List[str] = []
+        container_id = None
+        with self.lock:
+            idle = self.idle.get(key, [])
+            while idle:
+                candidate = idle.pop()
+                self.idle_since.pop(candidate, None)
+                if image is not None and self.images.get(candidate) == image.id:
+                    container_id = candidate
+                    break
+                stale.append(candidate)
+            # the image was rebuilt, the other idle containers are stale as well
+            if stale:
+                stale.extend(idle)
+                for candidate in idle:
+                    self.idle_since.pop(candidate, None)
+                idle.clear()
+        for candidate in stale:
+            self.discard(candidate)
+        return container_id
+
+    def evict(self) -> None:
+        """Removes idle containers past their time to live or over the limit"""
+        now = time.time()
+        expired: List[str] = []
+        with self.lock:
+            idle_list = sorted(
+                (
+                    (self.idle_since.get(container_id, now), key, container_id)
+                    for key, idle in self.idle.items()
+                    for container_id in idle
+                ),
+                key=lambda entry: entry[0],
+            )
+            excess = len(idle_list) - values.container_pool_limit
+            for index, (since, key, container_id) in enumerate(idle_list):
+                if index < excess or now - since > values.container_pool_idle_ttl:
+                    self.idle[key].remove(container_id)
+                    self.idle_since.pop(container_id, None)
+                    expired.append(container_id)
+        for container_id in expired:
+            self.discard(container_id)
+
+    def start_thread(self, target: Any, *args: Any) -> None:
+        context = contextvars.copy_context()
+        thread = threading.Thread(
+            target=context.run, args=(target,) + args, daemon=True
+        )
+        with self.lock:
+            self.threads = [t for t in self.threads if t.is_alive()]
+            self.threads.append(thread)
+        thread.start()
+
+    def changed_paths(self, container_id: str) -> Optional[Set[str]]:
+        try:
+            changes = container.get_client().api.diff(container_id) or []
+        except Exception as ex:
+            emitter.debug("[pool] could not inspect {}: {}".format(container_id, ex))
+            return None
+        return {change["Path"] for change in changes}
+
+    def lease(
+        self,
+        volume_list: Dict[str, Dict[str, str]],
+        image_name: str,
+        cpu: List[str],
+        gpu: List[str],
+        container_config_info: Dict[str, Any],
+        source_logs: str,
+        target_logs: str,
+    ) -> Optional[str]:
+        """
+        Running container of the image with the volumes of the task, None if the
+        task can not run in a pooled container
+        """
+        if not self.accepts(values.task_type.get(None), gpu):
+            return None
+        mounts: List[Tuple[str, str]] = []
+        for host_path, binding in volume_list.items():
+            if host_path == DOCKER_SOCKET:
+                continue
+            os.makedirs(host_path, exist_ok=True)
+            staged_path = _staged_path(host_path)
+            if staged_path is None:
+                emitter.debug(
+                    "[pool] {} is outside of the pooled roots".format(host_path)
+                )
+                return None
+            mounts.append((staged_path, binding["bind"]))
+        # parents first, so that nested mounts are not hidden
+        mounts.sort(key=lambda mount: mount[1].rstrip("/").count("/"))
+
+        image_name = image_name.lower()
+        key = self.key(image_name, container_config_info)
+        with self.lock:
+            if self.closed:
+                return None
+        self.evict()
+        container_id = self.take_idle(key)
+        if container_id is None:
+            container_id = self.create(key, cpu, container_config_info)
+            if container_id is None:
+                return None
+
+        staged_logs = _staged_path(target_logs)
+        script = _mount_script(mounts)
+        if staged_logs:
+            # the logs of the image, which create_running_container extracts
+            # through a temporary container
+            script = (
+                "if [ -d {0} ] ; then mkdir -p {1} && cp -a {0}/. {1}/ ; fi ; ".format(
+                    shlex.quote(source_logs), shlex.quote(staged_logs)
+                )
+                + script
+            )
+        try:
+            resources: Dict[str, Any] = {"cpuset_cpus": ",".join(cpu)}
+            reservation = (container_config_info or {}).get(
+                definitions.KEY_CONTAINER_MEM_RESERVATION
+            )
+            if reservation:
+                resources["mem_reservation"] = reservation
+            container.get_client().api.update_container(container_id, **resources)
+        except Exception as ex:
+            emitter.debug("[pool] could not update {}: {}".format(container_id, ex))
+            self.discard(container_id)
+            return None
+        exit_code, _ = container.exec_command(
+            container_id, "bash -c {}".format(shlex.quote(script)), "/"
+        )
+        if exit_code != 0:
+            emitter.warning(
+                "\t\t[framework] could not prepare pooled container {}".format(
+                    container_id
+                )
+            )
+            self.discard(container_id)
+            return None
+
+        with self.lock:
+            self.leases[container_id] = _Lease(key, mounts)
+        emitter.information(
+            "\t\t[framework] leased pooled container {} for {}".format(
+                container_id, image_name
+            )
+        )
+        self.replenish(key, cpu, container_config_info)
+        return container_id
+
+    def replenish(
+        self, key: PoolKey, cpu: List[str], container_config_info: Dict[str, Any]
+    ) -> None:
+        with self.lock:
+            if self.closed:
+                return
+            pooled_idle = sum(len(idle) for idle in self.idle.values()) + sum(
+                self.warming.values()
+            )
+            missing = min(
+                values.container_pool_size
+                - len(self.idle.get(key, []))
+                - self.warming.get(key, 0),
+                values.container_pool_limit - pooled_idle,
+            )
+            if missing <= 0:
+                return
+            self.warming[key] = self.warming.get(key, 0) + missing
+
+        def warm() -> None:
+            for _ in range(missing):
+                container_id = None
+                with self.lock:
+                    closed = self.closed
+                if not closed:
+                    try:
+                        container_id = self.create(key, cpu, container_config_info)
+                    except BaseException as ex:
+                        emitter.debug(
+                            "[pool] could not warm a container: {}".format(ex)
+                        )
+                with self.lock:
+                    self.warming[key] -= 1
+                    if container_id and not self.closed:
+                        self.idle.setdefault(key, []).append(container_id)
+                        self.idle_since[container_id] = time.time()
+                        container_id = None
+                if container_id:
+                    # the pool was shut down while the container was created
+                    self.discard(container_id)
+
+        self.start_thread(warm)
+
+    def owns(self, container_id: str) -> bool:
+        with self.lock:
+            return container_id in self.pooled
+
+    def restore(self, container_id: str) -> None:
+        """Mounts the task directories again after the container was restarted"""
+        with self.lock:
+            lease = self.leases.get(container_id)
+        if lease:
+            container.exec_command(
+                container_id,
+                "bash -c {}".format(shlex.quote(_mount_script(lease.mounts))),
+                "/",
+            )
+
+    def release(self, container_id: str) -> bool:
+        """Ends the lease of a pooled container, False if it is not leased"""
+        with self.lock:
+            lease = self.leases.pop(container_id, None)
+        if lease is None:
+            return False
+        self.start_thread(self.reset, container_id, lease)
+        return True
+
+    def reset(self, container_id: str, lease: _Lease) -> None:
+        targets = [target for _, target in reversed(lease.mounts)]
+        script = " ; ".join(
+            ["umount -l {} 2>/dev/null".format(shlex.quote(t)) for t in targets]
+            + [
+                "for p in /proc/[0-9]* ; do p=${p#/proc/} ; "
+                '[ "$p" -ne 1 ] && [ "$p" -ne $$ ] && kill -9 "$p" 2>/dev/null ; done',
+                "rm -rf /tmp/* /tmp/.[!.]* 2>/dev/null",
+                "true",
+            ]
+        )
+        try:
+            docker_container = container.get_client().containers.get(container_id)
+            if docker_container.status != "running":
+                raise RuntimeError("container is {}".format(docker_container.status))
+            docker_container.exec_run(["bash", "-c", script], privileged=True)
+        except Exception as ex:
+            emitter.debug("[pool] dropping {}: {}".format(container_id, ex))
+            self.discard(container_id)
+            return
+
+        changed = self.changed_paths(container_id)
+        allowed = set(self.baselines.get(container_id, set()))
+        for target in targets:
+            path = target.rstrip("/")
+            while path:
+                allowed.add(path)
+                path = os.path.dirname(path) if path != "/" else ""
+        if changed is None or any(
+            path not in allowed and path != "/tmp" and not path.startswith("/tmp/")
+            for path in changed
+        ):
+            emitter.debug("[pool] {} was modified by its task".format(container_id))
+            self.discard(container_id)
+            return
+
+        with self.lock:
+            idle = self.idle.setdefault(lease.key, [])
+            if not self.closed and len(idle) < values.container_pool_size:
+                idle.append(container_id)
+                self.idle_since[container_id] = time.time()
+                return
+        self.discard(container_id)
+        self.evict()
+
+    def discard(self, container_id: str) -> None:
+        with self.lock:
+            self.pooled.discard(container_id)
+            self.baselines.pop(container_id, None)
+            self.leases.pop(container_id, None)
+            self.images.pop(container_id, None)
+            self.idle_since.pop(container_id, None)
+        container.remove_container(container_id)
+
+    def shutdown(self) -> None:
+        """
+        Removes all containers of the pool: the idle and leased ones and the ones
+        being warmed or reset, whose threads are waited for
+        """
+        with self.lock:
+            self.closed = True
+            threads = list(self.threads)
+        for thread in threads:
+            thread.join(timeout=values.container_pool_idle_ttl)
+        with self.lock:
+            container_ids = list(self.pooled)
+            self.idle = dict()
+            self.leases = dict()
+        for container_id in container_ids:
+            self.discard(container_id)
+
+    def after_fork(self) -> None:
+        # the containers of the parent stay with the parent
+        self.lock = threading.Lock()
+        self.idle = dict()
+        self.warming = dict()
+        self.leases = dict()
+        self.pooled = set()
+        self.baselines = dict()
+        self.images = dict()
+        self.idle_since = dict()
+        self.threads = []
+        self.closed = False
+
+
+container_pool = ContainerPool()
+os.register_at_fork(after_in_child=container_pool.after_fork)
+atexit.register(container_pool.shutdown)
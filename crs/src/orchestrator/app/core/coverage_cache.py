@@ -0,0 +1,202 @@
+import math
+from typing import Any
+from typing import Dict
+from typing import Iterable
+from typing import List
+from typing import Optional
+from typing import Tuple
+
+# Coverage of single test cases, kept across localization runs of a subject in the
+# directory shared by all its tasks. An entry of a test holds its outcome, the elements (e.g. lines)
+# it covered and the digests of the class files it ran through: the test class and
+# every class holding a covered element. The entry stays valid as long as these
+# class files do not change, a test that reaches code of a changed class has to
+# pass through a covered class that changed as well. Only the tests without a
+# valid entry are run again, the spectrum of a localization is put together from
+# the fresh and the cached entries.
+#
+# Spectra are kept sparse: every test lists the indices of the elements it
+# covered in the element table of the cache or the spectrum.
+
+PASS = "PASS"
+FAIL = "FAIL"
+# formulas a spectrum put together from cached entries can be ranked with
+FORMULAS = ["ochiai", "tarantula", "jaccard", "dstar"]
+
+
+def class_of(element: str) -> str:
+    """Class an element or test id belongs to, e.g. org.foo$Bar$Baz#run():12
+    and org/foo/Bar$Baz.class both belong to org.foo.Bar.Baz"""
+    name = element.split("#", 1)[0]
+    if name.endswith(".class"):
+        name = name[: -len(".class")]
+    return name.lstrip("./").replace("/", ".").replace("$", ".")
+
+
+def parse_class_digests(lines: Iterable[str]) -> Dict[str, str]:
+    """Digests of class files from the output of sha1sum run in a class directory"""
+    digests: Dict[str, str] = dict()
+    for line in lines:
+        fields = line.strip().split(None, 1)
+        if len(fields) != 2 or not fields[1].endswith(".class"):
+            continue
+        digests[class_of(fields[1])] = fields[0]
+    return digests
+
+
+class CoverageCache:
+    def __init__(self, data: Optional[Dict[str, Any]] = None) -> None:
+        data = data or dict()
+        self.elements: List[str] = list(data.get("elements", []))
+        self.element_index = {e: i for i, e in enumerate(self.elements)}
+        self.tests: Dict[str, Dict[str, Any]] = dict(data.get("tests", {}))
+
+    def is_valid(self, test_id: str, digests: Dict[str, str]) -> bool:
+        entry = self.tests.get(test_id)
+        if entry is None:
+            return False
+        return all(
+            digests.get(name) == digest for name, digest in entry["classes"].items()
+        )
+
+    def stale(self, test_ids: Iterable[str], digests: Dict[str, str]) -> List[str]:
+        """Tests that have to run to know their coverage for the given classes"""
+        return [t for t in test_ids if not self.is_valid(t, digests)]
+
+    def store(
+        self,
+        test_id: str,
+        outcome: str,
+        covered: Iterable[str],
+        digests: Dict[str, str],
+    ) -> None:
+        covered = list(covered)
+        classes = {class_of(test_id)} | {class_of(element) for element in covered}
+        # classes outside the class directories (libraries) do not change
+        self.add(
+            test_id,
+            outcome,
+            covered,
+            {c: digests[c] for c in sorted(classes) if c in digests},
+        )
+
+    def add(
+        self,
+        test_id: str,
+        outcome: str,
+        covered: Iterable[str],
+        classes: Dict[str, str],
+    ) -> None:
+        covered_index = []
+        for element in covered:
+            if element not in self.element_index:
+                self.element_index[element] = len(self.elements)
+                self.elements.append(element)
+            covered_index.append(self.element_index[element])
+        self.tests[test_id] = {
+            "outcome": outcome,
+            "covered": sorted(covered_index),
+            "classes": classes,
+        }
+
+    def merge(self, other: "CoverageCache", test_ids: Iterable[str]) -> None:
+        """Takes the entries of the given tests from another cache"""
+        for test_id in test_ids:
+            entry = other.tests.get(test_id)
+            if entry is None:
+                continue
+            self.add(
+                test_id,
+                entry["outcome"],
+                [other.elements[index] for index in entry["covered"]],
+                dict(entry["classes"]),
+            )
+
+    def spectrum(self, test_ids: Iterable[str]) -> Dict[str, Any]:
+        """Sparse spectrum of the cached tests among the given ones"""
+        elements: List[str] = []
+        element_index: Dict[int, int] = dict()
+        tests = []
+        for test_id in test_ids:
+            entry = self.tests.get(test_id)
+            if entry is None:
+                continue
+            covered = []
+            for index in entry["covered"]:
+                if index not in element_index:
+                    element_index[index] = len(elements)
+                    elements.append(self.elements[index])
+                covered.append(element_index[index])
+            tests.append(
+                {"id": test_id, "outcome": entry["outcome"], "covered": covered}
+            )
+        return {"elements": elements, "tests": tests}
+
+    def to_json(self) -> Dict[str, Any]:
+        return {"elements": self.elements, "tests": self.tests}
+
+
+def parse_gzoltar_report(
+    spectra_lines: List[str], tests_lines: List[str], matrix_lines: List[str]
+) -> List[Tuple[str, str, List[str]]]:
+    """
+    (test id, outcome, covered elements) of every test of the txt report of
+    GZoltar: spectra.csv and tests.csv list the elements and the tests with a
+    header line, matrix.txt has a line of 0/1 columns per test
+    """
+    elements = [line.strip() for line in spectra_lines[1:] if line.strip()]
+    test_list = []
+    for line in tests_lines[1:]:
+        if not line.strip():
+            continue
+        test_id, outcome = line.strip().split(",")[:2]
+        test_list.append((test_id, outcome))
+    coverage = []
+    for (test_id, outcome), row in zip(test_list, matrix_lines):
+        columns = row.split()
+        covered = [e for e, c in zip(elements, columns) if c == "1"]
+        coverage.append((test_id, outcome, covered))
+    return coverage
+
+
+def _score(formula: str, ef: int, ep: int, nf: int, np: int) -> float:
+    if formula == "tarantula":
+        fail_ratio = ef / (ef + nf) if ef + nf else 0.0
+        pass_ratio = ep / (ep + np) if ep + np else 0.0
+        total = fail_ratio + pass_ratio
+        return fail_ratio / total if total else 0.0
+    if formula == "jaccard":
+        return ef / (ef + nf + ep) if ef + nf + ep else 0.0
+    if formula == "dstar":
+        if ep + nf == 0:
+            return math.inf if ef else 0.0
+        return float(ef * ef) / (ep + nf)
+    if formula == "ochiai":
+        return ef / math.sqrt((ef + nf) * (ef + ep)) if ef and ef + ep else 0.0
+    raise ValueError(f"unsupported formula {formula}")
+
+
+def rank(spectrum: Dict[str, Any], formula: str = "ochiai") -> List[Tuple[str, float]]:
+    """Elements of a sparse spectrum by decreasing suspiciousness, one of FORMULAS"""
+    if formula not in FORMULAS:
+        raise ValueError(f"unsupported formula {formula}")
+    elements = spectrum["elements"]
+    executed_failing = [0] * len(elements)
+    executed_passing = [0] * len(elements)
+    total_failing = total_passing = 0
+    for test in spectrum["tests"]:
+        is_failing = test["outcome"] == FAIL
+        if is_failing:
+            total_failing += 1
+        else:
+            total_passing += 1
+        counts = executed_failing if is_failing else executed_passing
+        for index in test["covered"]:
+            counts[index] += 1
+    ranking = []
+    for index, element in enumerate(elements):
+        ef, ep = executed_failing[index], executed_passing[index]
+        score = _score(formula, ef, ep, total_failing - ef, total_passing - ep)
+        ranking.append((element, score))
+    ranking.sort(key=lambda entry: -entry[1])
+    return ranking
@@ -72,6 +72,7 @@ KEY_ADV_TEST_SCRIPT = "adv_test_script"
 KEY_CONTAINER_CPU_COUNT = "cpu_count"
 KEY_CONTAINER_GPU_COUNT = "gpu_count"
 KEY_CONTAINER_MEM_LIMIT = "mem_limit"
+KEY_CONTAINER_MEM_RESERVATION = "mem_reservation"
 KEY_CONTAINER_ENABLE_NETWORK = "enable_network"
 KEY_LOCALIZATION = "localization"
 KEY_ENABLED = "enabled"
@@ -158,6 +159,8 @@ UI_SHOULD_FINISH = "Should finish by"
 UI_STATUS = "Status"
 UI_PLAUSIBLE_PATCHES = "Plausible Patches"
 UI_DURATION = "Duration"
+UI_RESOURCES = "Resources"
 
 GROUP_NAME = "cerberus"
 INTERNAL_METADATA_JSON = "cerberus_internal.json"
+VALIDATION_STREAM_JSONL = "result.jsonl"
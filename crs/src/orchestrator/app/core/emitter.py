@@ -5,6 +5,7 @@ import sys
 import textwrap
 from enum import Enum
 from typing import Any
+from typing import Callable
 from typing import List
 from typing import Optional
 from typing import Union
@@ -66,41 +67,69 @@ TEXTUALIZE_COLOR_MAP = {
 }
 
 
-def write(
+def renderer(
     print_message: Any,
     print_color: COLOR,
     new_line: bool = True,
     prefix: Optional[str] = None,
     indent_level: int = 0,
-) -> None:
-    if not values.ui_active:
-        message = "[bold {}]{} {}".format(
-            RICH_COLOR_MAP[print_color],
-            time.strftime("%b %d %H:%M:%S"),
-            str(print_message).replace("[", "\\["),
-        )
-        if prefix:
-            prefix = "[{}]{}".format(RICH_COLOR_MAP[print_color], prefix)
-            len_prefix = ((indent_level + 1) * 4) + len(prefix)
-            wrapper = textwrap.TextWrapper(
-                initial_indent=prefix,
-                subsequent_indent=" " * len_prefix,
-                width=int(columns),
+) -> Callable[[], None]:
+    """
+    Captures the message together with the time and job it was emitted for.
+    The returned callable does the (costly) rich/textual formatting and is run
+    by the log writer thread.
+    """
+    created = time.localtime()
+    ui_active = values.ui_active
+    job_identifier = values.job_identifier.get("Root")
+    session_identifier = values.session_identifier.get("(Root)")
+
+    def render() -> None:
+        timestamp = time.strftime("%b %d %H:%M:%S", created)
+        if not ui_active:
+            message = "[bold {}]{} {}".format(
+                RICH_COLOR_MAP[print_color],
+                timestamp,
+                str(print_message).replace("[", "\\["),
             )
-            message = wrapper.fill(message)
-        rich.print(message, end=("\n" if new_line else "\r"))
-    else:
-        if prefix:
-            print_message = prefix + str(print_message)
-
-        ui.post_write(
-            "[bold {}]{} {} {}".format(
-                TEXTUALIZE_COLOR_MAP[print_color],
-                time.strftime("%b %d %H:%M:%S"),
-                values.job_identifier.get("Root"),
-                str(print_message).replace("[", "\\[").replace("\t", " "),
+            if prefix:
+                styled_prefix = "[{}]{}".format(RICH_COLOR_MAP[print_color], prefix)
+                len_prefix = ((indent_level + 1) * 4) + len(styled_prefix)
+                wrapper = textwrap.TextWrapper(
+                    initial_indent=styled_prefix,
+                    subsequent_indent=" " * len_prefix,
+                    width=int(columns),
+                )
+                message = wrapper.fill(message)
+            rich.print(message, end=("\n" if new_line else "\r"))
+        else:
+            message = print_message
+            if prefix:
+                message = prefix + str(message)
+
+            ui.post_write(
+                "[bold {}]{} {} {}".format(
+                    TEXTUALIZE_COLOR_MAP[print_color],
+                    timestamp,
+                    job_identifier,
+                    str(message).replace("[", "\\[").replace("\t", " "),
+                ),
+                session_identifier,
             )
-        )
+
+    return render
+
+
+def write(
+    print_message: Any,
+    print_color: COLOR,
+    new_line: bool = True,
+    prefix: Optional[str] = None,
+    indent_level: int = 0,
+) -> None:
+    logger.console(
+        renderer(print_message, print_color, new_line, prefix, indent_level)
+    )
 
 
 def title(title: str) -> None:
@@ -119,31 +148,35 @@ def sub_sub_title(text: str) -> None:
 
 
 def command(message: Any) -> None:
+    console = None
     if values.debug:
         prefix = "\t\t[DEBUG] "
-        write(message, COLOR.ROSE, prefix=prefix, indent_level=2)
-    logger.command(message)
+        console = renderer(message, COLOR.ROSE, prefix=prefix, indent_level=2)
+    logger.command(message, console=console)
 
 
 def docker_command(message: Any) -> None:
+    console = None
     if values.debug:
         prefix = "\t\t[DEBUG] "
-        write(message, COLOR.ROSE, prefix=prefix, indent_level=2)
-    logger.docker_command(message)
+        console = renderer(message, COLOR.ROSE, prefix=prefix, indent_level=2)
+    logger.docker_command(message, console=console)
 
 
 def debug(message: Any) -> None:
+    console = None
     if values.debug:
         prefix = "\t\t[DEBUG] "
-        write(message, COLOR.GREY, prefix=prefix, indent_level=2)
-    logger.debug(message)
+        console = renderer(message, COLOR.GREY, prefix=prefix, indent_level=2)
+    logger.debug(message, console=console)
 
 
 def build(message: Any) -> None:
+    console = None
     if values.debug:
         prefix = "\t\t[DEBUG] "
-        write(message, COLOR.GREY, prefix=prefix, indent_level=2)
-    logger.build(message)
+        console = renderer(message, COLOR.GREY, prefix=prefix, indent_level=2)
+    logger.build(message, console=console)
 
 
 def data(message: Any, info: Any = None) -> None:
@@ -156,41 +189,43 @@ def data(message: Any, info: Any = None) -> None:
 
 
 def normal(message: Any, jump_line: bool = True) -> None:
-    write(message, COLOR.BLUE, jump_line, prefix="\t\t[INFO]")
-    logger.output(message)
+    logger.output(
+        message, console=renderer(message, COLOR.BLUE, jump_line, prefix="\t\t[INFO]")
+    )
 
 
 def highlight(message: Any, jump_line: bool = True) -> None:
     indent_length = message.count("\t")
     prefix = "\t" * indent_length
     message = message.replace("\t", "")
-    write(message, COLOR.WHITE, jump_line, indent_level=indent_length, prefix=prefix)
-    logger.note(message)
+    logger.note(
+        message,
+        console=renderer(
+            message, COLOR.WHITE, jump_line, indent_level=indent_length, prefix=prefix
+        ),
+    )
 
 
 def information(message: Any, jump_line: bool = True) -> None:
-    write(message, COLOR.GREY, jump_line, prefix="[INFO]")
-    logger.information(message)
+    logger.information(
+        message, console=renderer(message, COLOR.GREY, jump_line, prefix="[INFO]")
+    )
 
 
 def statistics(message: Any) -> None:
-    write(message, COLOR.WHITE, prefix="[STAT]")
-    logger.output(message)
+    logger.output(message, console=renderer(message, COLOR.WHITE, prefix="[STAT]"))
 
 
 def error(message: Any) -> None:
-    write(message, COLOR.RED, prefix="[ERROR]")
-    logger.error(message)
+    logger.error(message, console=renderer(message, COLOR.RED, prefix="[ERROR]"))
 
 
 def success(message: Any) -> None:
-    write(message, COLOR.GREEN, prefix="[INFO]")
-    logger.output(message)
+    logger.output(message, console=renderer(message, COLOR.GREEN, prefix="[INFO]"))
 
 
 def special(message: Any) -> None:
-    write(message, COLOR.ROSE, prefix="[SPECIAL]")
-    logger.note(message)
+    logger.note(message, console=renderer(message, COLOR.ROSE, prefix="[SPECIAL]"))
 
 
 def program_output(output_message: Union[str, List[str]]) -> None:
@@ -213,19 +248,21 @@ def emit_patch(
 
 
 def warning(message: Any) -> None:
-    write(message, COLOR.YELLOW, prefix="[WARNING]")
-    logger.warning(message)
+    logger.warning(
+        message, console=renderer(message, COLOR.YELLOW, prefix="[WARNING]")
+    )
 
 
 def note(message: Any) -> None:
-    write(message, COLOR.WHITE, prefix="[INFO]")
-    logger.note(message)
+    logger.note(message, console=renderer(message, COLOR.WHITE, prefix="[INFO]"))
 
 
 def configuration(setting: str, value: Any) -> None:
     message = "\t[config] " + setting + ": " + str(value)
-    write(message, COLOR.WHITE, True, prefix="[CONFIG]")
-    logger.configuration(setting + ":" + str(value))
+    logger.configuration(
+        setting + ":" + str(value),
+        console=renderer(message, COLOR.WHITE, True, prefix="[CONFIG]"),
+    )
 
 
 def end(time_total: str, experiments_executed: int, is_error: bool = False) -> None:
@@ -1,50 +1,286 @@
 # -*- coding: utf-8 -*-
-import logging
+import atexit
+import json
+import multiprocessing.util
 import os
+import queue
+import random
+import threading
 import time
-from logging import Formatter
-from logging import Logger
 from os.path import join
 from shutil import copyfile
 from typing import Any
+from typing import Callable
+from typing import Dict
+from typing import IO
+from typing import List
 from typing import Optional
+from typing import Tuple
 
 from app.core import values
 from app.core.task.stats.BenchmarkStats import BenchmarkStats
 from app.core.task.stats.ToolStats import ToolStats
 
-_logger_error: Logger
-_logger_command: Logger
-_logger_main: Logger
-_logger_build: Logger
-
-
-def setup_logger(
-    name: Optional[str],
-    log_file: str,
-    level: int = logging.INFO,
-    formatter: Optional[Formatter] = None,
-) -> Logger:
-    """To setup as many loggers as you want"""
-    if formatter is None:
-        formatter = logging.Formatter("%(asctime)s %(levelname)s %(message)s")
-    handler = logging.FileHandler(log_file)
-    handler.setFormatter(formatter)
-    logger = logging.getLogger(name)
-    logger.setLevel(level)
-    logger.addHandler(handler)
-    return logger
+# Producers only build a record and put it on a bounded queue; a single writer
+# thread formats the records, appends them in batches to the log files and
+# renders the console output.
+
+CHANNEL_MAIN = "main"
+CHANNEL_ERROR = "error"
+CHANNEL_COMMAND = "command"
+CHANNEL_BUILD = "build"
+
+Renderer = Callable[[], None]
+
+
+class LogRecord:
+    __slots__ = (
+        "created",
+        "level",
+        "channels",
+        "message",
+        "job",
+        "session",
+        "task_type",
+        "console",
+    )
+
+    def __init__(
+        self,
+        level: str,
+        channels: Tuple[str, ...],
+        message: str,
+        console: Optional[Renderer] = None,
+    ):
+        self.created = time.time()
+        self.level = level
+        self.channels = channels
+        self.message = message
+        self.job = values.job_identifier.get(None)
+        self.session = values.session_identifier.get(None)
+        task_type = values.task_type.get(None)
+        self.task_type = str(task_type) if task_type else None
+        self.console = console
+
+    def to_text(self) -> str:
+        timestamp = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(self.created))
+        context = " ".join(filter(None, [self.job, self.session]))
+        return "{},{:03d} {} {}{}\n".format(
+            timestamp,
+            int(self.created * 1000) % 1000,
+            self.level,
+            context + "    " if context else "",
+            self.message,
+        )
+
+    def to_json(self) -> str:
+        return (
+            json.dumps(
+                {
+                    "time": self.created,
+                    "level": self.level,
+                    "channels": self.channels,
+                    "job": self.job,
+                    "session": self.session,
+                    "task_type": self.task_type,
+                    "message": self.message,
+                }
+            )
+            + "\n"
+        )
+
+
+class _Admission:
+    """Per-level sampling and records-per-second limits"""
+
+    def __init__(self) -> None:
+        self.lock = threading.Lock()
+        self.window = 0
+        self.counts: Dict[str, int] = dict()
+        self.dropped: Dict[str, int] = dict()
+
+    def admit(self, level: str) -> bool:
+        sample_rate = values.log_sample_rates.get(level, 1.0)
+        if sample_rate < 1.0 and random.random() >= sample_rate:
+            return False
+        limit = values.log_rate_limits.get(level, 0)
+        if not limit:
+            return True
+        window = int(time.monotonic())
+        with self.lock:
+            if window != self.window:
+                self.window = window
+                self.counts.clear()
+            count = self.counts.get(level, 0) + 1
+            self.counts[level] = count
+            if count > limit:
+                self.dropped[level] = self.dropped.get(level, 0) + 1
+                return False
+        return True
+
+    def drop(self, level: str) -> None:
+        with self.lock:
+            self.dropped[level] = self.dropped.get(level, 0) + 1
+
+    def take_dropped(self) -> Dict[str, int]:
+        with self.lock:
+            dropped, self.dropped = self.dropped, dict()
+        return dropped
+
+
+class _Writer(threading.Thread):
+    def __init__(self, records: "queue.Queue[Any]", admission: _Admission):
+        super().__init__(name="log-writer", daemon=True)
+        self.records = records
+        self.admission = admission
+        self.files: Dict[str, IO[str]] = dict()
+
+    def channel_path(self, channel: str) -> str:
+        return {
+            CHANNEL_MAIN: values.file_main_log,
+            CHANNEL_ERROR: values.file_error_log,
+            CHANNEL_COMMAND: values.file_command_log,
+            CHANNEL_BUILD: values.file_build_log,
+        }[channel]
+
+    def open(self, path: str) -> Optional[IO[str]]:
+        if not path:
+            return None
+        if path not in self.files:
+            try:
+                self.files[path] = open(path, "a")
+            except OSError:
+                return None
+        return self.files[path]
+
+    def run(self) -> None:
+        while True:
+            batch = [self.records.get()]
+            while len(batch) < values.log_batch_size:
+                try:
+                    batch.append(self.records.get_nowait())
+                except queue.Empty:
+                    break
+            try:
+                self.write(batch)
+            except Exception:
+                # logging must never take the framework down
+                pass
+
+    def write(self, batch: List[Any]) -> None:
+        lines: Dict[str, List[str]] = dict()
+        waiters = []
+        for record in batch:
+            if isinstance(record, threading.Event):
+                waiters.append(record)
+                continue
+            if record.console:
+                try:
+                    record.console()
+                except Exception:
+                    pass
+            if not record.channels:
+                continue
+            text = record.to_text()
+            for channel in record.channels:
+                lines.setdefault(self.channel_path(channel), []).append(text)
+            lines.setdefault(values.file_structured_log, []).append(record.to_json())
+
+        for level, count in self.admission.take_dropped().items():
+            summary = LogRecord(
+                "WARNING",
+                (CHANNEL_MAIN,),
+                "[logger] dropped {} {} records".format(count, level),
+            )
+            lines.setdefault(values.file_main_log, []).append(summary.to_text())
+            lines.setdefault(values.file_structured_log, []).append(summary.to_json())
+
+        for path, path_lines in lines.items():
+            log_file = self.open(path)
+            if log_file:
+                log_file.writelines(path_lines)
+                log_file.flush()
+        for waiter in waiters:
+            waiter.set()
+
+
+_lock = threading.Lock()
+_admission = _Admission()
+_records: "queue.Queue[Any]" = queue.Queue(maxsize=values.log_queue_size)
+_writer: Optional[_Writer] = None
+
+
+def _ensure_writer() -> None:
+    global _writer
+    if _writer is None:
+        with _lock:
+            if _writer is None:
+                _writer = _Writer(_records, _admission)
+                _writer.start()
+
+
+def _reset_after_fork() -> None:
+    # the writer thread does not survive a fork, the child starts its own
+    global _lock, _admission, _records, _writer
+    _lock = threading.Lock()
+    _admission = _Admission()
+    _records = queue.Queue(maxsize=values.log_queue_size)
+    _writer = None
+    # multiprocessing children leave through os._exit and skip atexit
+    multiprocessing.util.Finalize(None, flush, exitpriority=100)
+
+
+os.register_at_fork(after_in_child=_reset_after_fork)
+atexit.register(lambda: flush())
+
+
+def emit(
+    level: str,
+    channels: Tuple[str, ...],
+    message: Any,
+    console: Optional[Renderer] = None,
+) -> None:
+    """Queues a record without blocking, the record is dropped if the level is
+    over its rate limit or the writer has fallen too far behind"""
+    if not _admission.admit(level):
+        return
+    _ensure_writer()
+    try:
+        _records.put_nowait(LogRecord(level, channels, str(message), console))
+    except queue.Full:
+        _admission.drop(level)
+
+
+def console(render: Renderer, level: str = "INFO") -> None:
+    emit(level, tuple(), "", render)
+
+
+def flush(timeout: float = 10.0) -> None:
+    """Blocks until every record queued so far has been written"""
+    if _writer is None or not _writer.is_alive():
+        return
+    done = threading.Event()
+    try:
+        _records.put(done, timeout=timeout)
+    except queue.Full:
+        return
+    done.wait(timeout)
 
 
 def create_log_files() -> None:
-    global _logger_main, _logger_build, _logger_command, _logger_error
     log_file_name = "log-{}".format(time.strftime("%b_%d_%H_%M"))
     log_file_path = join(values.dir_log_base, log_file_name)
     values.file_main_log = log_file_path
-    _logger_main = setup_logger("main", values.file_main_log, level=logging.DEBUG)
-    _logger_error = setup_logger("error", values.file_error_log)
-    _logger_command = setup_logger("command", values.file_command_log)
-    _logger_build = setup_logger("build", values.file_build_log)
+    values.file_structured_log = log_file_path + ".jsonl"
+    values.file_trace = log_file_path + ".trace.json"
+    for log_file_path in [
+        values.file_main_log,
+        values.file_structured_log,
+        values.file_error_log,
+        values.file_command_log,
+        values.file_build_log,
+    ]:
+        open(log_file_path, "a").close()
 
 
 def store_log_file(log_file_path: str) -> None:
@@ -53,12 +289,15 @@ def store_log_file(log_file_path: str) -> None:
 
 
 def store_logs() -> None:
+    flush()
     if os.path.isfile(values.file_main_log):
         copyfile(values.file_main_log, join(values.dir_logs, "log-latest"))
     log_file_list = [
         values.file_command_log,
         values.file_build_log,
         values.file_main_log,
+        values.file_structured_log,
+        values.file_trace,
         values.file_stats_log,
         values.file_error_log,
     ]
@@ -66,72 +305,60 @@ def store_logs() -> None:
         store_log_file(log_f)
 
 
-def track_job(txt: Any) -> str:
-    job = values.job_identifier.get("NAN")
-    session = values.session_identifier.get("NAN")
-    res = str(txt)
-    if job != "NAN":
-        res += job + "    " + str(txt)
-    if session != "NAN":
-        res += session + "    " + str(txt)
-    return res
-
-
-def build(message: Any) -> None:
-    _logger_build.info(track_job(message))
+def build(message: Any, console: Optional[Renderer] = None) -> None:
+    emit("BUILD", (CHANNEL_BUILD,), message, console)
 
 
-def information(message: Any) -> None:
-    _logger_main.info(track_job(message))
+def information(message: Any, console: Optional[Renderer] = None) -> None:
+    emit("INFO", (CHANNEL_MAIN,), message, console)
 
 
-def command(message: Any) -> None:
+def command(message: Any, console: Optional[Renderer] = None) -> None:
     message = str(message).strip().replace("[command]", "")
-    message = "[COMMAND]: {}\n".format(message)
-    _logger_main.info(track_job(message))
-    _logger_command.info(track_job(message))
+    message = "[COMMAND]: {}".format(message)
+    emit("COMMAND", (CHANNEL_MAIN, CHANNEL_COMMAND), message, console)
 
 
-def docker_command(message: Any) -> None:
+def docker_command(message: Any, console: Optional[Renderer] = None) -> None:
     message = str(message).strip().replace("[command]", "")
-    message = "[DOCKER-COMMAND]: {}\n".format(message)
-    _logger_main.info(track_job(message))
-    _logger_command.info(track_job(message))
+    message = "[DOCKER-COMMAND]: {}".format(message)
+    emit("COMMAND", (CHANNEL_MAIN, CHANNEL_COMMAND), message, console)
 
 
-def data(message: Any, info: Any) -> None:
-    _logger_main.info(track_job(message), info)
+def data(message: Any, info: Any = None, console: Optional[Renderer] = None) -> None:
+    if info:
+        message = "{} {}".format(message, info)
+    emit("INFO", (CHANNEL_MAIN,), message, console)
 
 
-def debug(message: Any) -> None:
+def debug(message: Any, console: Optional[Renderer] = None) -> None:
     message = str(message).strip()
-    _logger_main.debug(track_job(message))
+    emit("DEBUG", (CHANNEL_MAIN,), message, console)
 
 
-def error(message: Any) -> None:
-    _logger_main.error(track_job(message))
-    _logger_error.error(track_job(message))
+def error(message: Any, console: Optional[Renderer] = None) -> None:
+    emit("ERROR", (CHANNEL_MAIN, CHANNEL_ERROR), message, console)
 
 
-def note(message: Any) -> None:
-    _logger_main.info(track_job(message))
+def note(message: Any, console: Optional[Renderer] = None) -> None:
+    emit("INFO", (CHANNEL_MAIN,), message, console)
 
 
-def configuration(message: Any) -> None:
+def configuration(message: Any, console: Optional[Renderer] = None) -> None:
     message = str(message).strip().lower().replace("[config]", "")
-    message = "[CONFIGURATION]: {}\n".format(message)
-    _logger_main.info(track_job(message))
+    message = "[CONFIGURATION]: {}".format(message)
+    emit("INFO", (CHANNEL_MAIN,), message, console)
 
 
-def output(message: Any) -> None:
+def output(message: Any, console: Optional[Renderer] = None) -> None:
     message = str(message).strip()
     message = "[OUTPUT]: {}".format(message)
-    _logger_main.info(track_job(message))
+    emit("INFO", (CHANNEL_MAIN,), message, console)
 
 
-def warning(message: Any) -> None:
+def warning(message: Any, console: Optional[Renderer] = None) -> None:
     message = str(message).strip().lower().replace("[warning]", "")
-    _logger_main.warning(track_job(message))
+    emit("WARNING", (CHANNEL_MAIN,), message, console)
 
 
 def log_tool_stats(task_tag_name: str, tool_stats: ToolStats) -> None:
@@ -21,6 +21,7 @@ from app.core import container
 from app.core import definitions
 from app.core import emitter
 from app.core import logger
+from app.core import registry
 from app.core import utilities
 from app.core import values
 from app.core.args import parse_args
@@ -30,6 +31,7 @@ from app.core.configs.ConfigDataLoader import ConfigDataLoader
 from app.core.configs.ConfigValidationSchemas import config_validation_schema
 from app.core.configs.tasks_data.TaskConfig import TaskConfig
 from app.core.configuration import Configurations
+from app.core.container_pool import container_pool
 from app.core.identifiers import create_bug_image_identifier
 from app.core.identifiers import create_task_identifier
 from app.core.identifiers import create_task_image_identifier
@@ -114,6 +116,7 @@ def main() -> None:
     utilities.create_output_directories()
     values.gpus = utilities.get_gpu_count()
     logger.create_log_files()
+    registry.index_tools()
 
     # return_code, (output, _) = utilities.run_command(
     #     f"groups {getpass.getuser()} | grep {definitions.GROUP_NAME}"
@@ -164,6 +167,8 @@ def main() -> None:
         emitter.error(str(e))
         logger.error(traceback.format_exc())
     finally:
+        utilities.wait_for_archives()
+        container_pool.shutdown()
         container.clean_containers()
         get_console().show_cursor(True)
         # Final running time and exit message
@@ -0,0 +1,78 @@
+import copy
+import pathlib
+import threading
+from typing import Any
+from typing import cast
+from typing import Dict
+from typing import Optional
+from typing import Tuple
+
+from app.core import values
+from app.drivers.tools.AbstractTool import AbstractTool
+
+# Index of the tool drivers, keyed by (tool type, lower case tool name) and
+# holding (class name, language directory). It is built once from the driver
+# tree, driver modules are only imported when a tool is first requested.
+_tool_index: Optional[Dict[Tuple[str, str], Tuple[str, str]]] = None
+_tool_classes: Dict[Tuple[str, str], Any] = dict()
+_tool_prototypes: Dict[Tuple[str, str], AbstractTool] = dict()
+_lock = threading.RLock()
+
+
+def index_tools() -> Dict[Tuple[str, str], Tuple[str, str]]:
+    global _tool_index
+    with _lock:
+        if _tool_index is None:
+            index: Dict[Tuple[str, str], Tuple[str, str]] = dict()
+            for path in pathlib.Path(values.dir_tool_drivers).glob("*/*/*.py"):
+                language = path.parent.name
+                tool_type = path.parent.parent.name
+                index[(tool_type, path.stem.lower())] = (path.stem, language)
+            _tool_index = index
+        return _tool_index
+
+
+def lookup_tool(tool_name: str, tool_type: str) -> Optional[Tuple[str, str]]:
+    """(class name, language) of the driver of a tool, None if it is unknown"""
+    return index_tools().get((tool_type, tool_name.lower()))
+
+
+def tool_class(tool_name: str, tool_type: str) -> Any:
+    key = (tool_type, tool_name.lower())
+    with _lock:
+        if key not in _tool_classes:
+            entry = lookup_tool(tool_name, tool_type)
+            if entry is None:
+                return None
+            tool_class_name, tool_language = entry
+            mod = __import__(
+                f"app.drivers.tools.{tool_type}.{tool_language}",
+                fromlist=[tool_class_name],
+            )
+            tool_module = getattr(mod, tool_class_name)
+            _tool_classes[key] = getattr(tool_module, tool_class_name)
+        return _tool_classes[key]
+
+
+def create_tool(tool_name: str, tool_type: str) -> Optional[AbstractTool]:
+    """
+    Returns a fresh tool instance. The first instance of a tool is kept as a
+    prototype, later requests receive a copy of it instead of running the
+    driver constructor again.
+    """
+    key = (tool_type, tool_name.lower())
+    with _lock:
+        prototype = _tool_prototypes.get(key)
+        if prototype is None:
+            initializer = tool_class(tool_name, tool_type)
+            if initializer is None:
+                return None
+            prototype = cast(AbstractTool, initializer())
+            _tool_prototypes[key] = prototype
+    try:
+        tool = cast(AbstractTool, copy.deepcopy(prototype))
+    except (TypeError, copy.Error):
+        # drivers holding state that can not be copied are constructed anew
+        return cast(AbstractTool, tool_class(tool_name, tool_type)())
+    tool.refresh_settings()
+    return tool
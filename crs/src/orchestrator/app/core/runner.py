@@ -0,0 +1,295 @@
+import os
+import shlex
+import signal
+import subprocess
+import threading
+import time
+from os.path import join
+from typing import Any
+from typing import BinaryIO
+from typing import Callable
+from typing import Dict
+from typing import List
+from typing import Optional
+from typing import Tuple
+
+from app.core import emitter
+from app.core import values
+
+# Upper bound of the output (stdout and stderr together) that is kept in
+# memory and written to the log of a single command
+default_max_output = 256 * 1024 * 1024
+# Seconds between the polite SIGTERM and the SIGKILL of a timed out command
+kill_grace_period = 5
+
+OutputCallback = Callable[[str, bytes], None]
+
+
+class CommandResult:
+    """Outcome of a command executed through the runner"""
+
+    def __init__(
+        self,
+        return_code: int,
+        stdout: bytes,
+        stderr: bytes,
+        duration: float,
+        timed_out: bool,
+        truncated: bool,
+        log_path: Optional[str],
+        user_time: float = 0.0,
+        system_time: float = 0.0,
+        max_rss_kb: int = 0,
+    ):
+        self.return_code = return_code
+        self.stdout = stdout
+        self.stderr = stderr
+        self.duration = duration
+        self.timed_out = timed_out
+        self.truncated = truncated
+        self.log_path = log_path
+        self.user_time = user_time
+        self.system_time = system_time
+        self.max_rss_kb = max_rss_kb
+
+    def __repr__(self) -> str:
+        return (
+            f"CommandResult(return_code={self.return_code}, "
+            f"duration={self.duration:.2f}, timed_out={self.timed_out}, "
+            f"truncated={self.truncated}, max_rss_kb={self.max_rss_kb})"
+        )
+
+
+def job_log_path(job_id: Optional[str] = None) -> str:
+    """Log file collecting the output of all commands of a job"""
+    job_id = job_id or values.job_identifier.get("root")
+    return join(values.dir_command_logs, "{}.log".format(job_id.replace("/", "_")))
+
+
+class _OutputCollector:
+    def __init__(
+        self,
+        log_file: Optional[BinaryIO],
+        callback: Optional[OutputCallback],
+        max_output: int,
+    ):
+        self.log_file = log_file
+        self.callback = callback
+        self.max_output = max_output
+        self.size = 0
+        self.truncated = False
+        self.buffers: Dict[str, List[bytes]] = {"stdout": [], "stderr": []}
+        self.lock = threading.Lock()
+
+    def feed(self, stream_name: str, line: bytes, capture: bool) -> None:
+        with self.lock:
+            if self.size + len(line) > self.max_output:
+                # keep draining the stream so that the command never blocks
+                self.truncated = True
+                return
+            self.size += len(line)
+            if capture:
+                self.buffers[stream_name].append(line)
+            if self.log_file:
+                self.log_file.write(line)
+                self.log_file.flush()
+        if self.callback:
+            self.callback(stream_name, line)
+
+    def consume(self, stream_name: str, stream: BinaryIO, capture: bool) -> None:
+        for line in iter(stream.readline, b""):
+            self.feed(stream_name, line, capture)
+        stream.close()
+
+
+def _kill_group(process: subprocess.Popen, sig: int) -> None:  # type: ignore
+    try:
+        os.killpg(process.pid, sig)
+    except (ProcessLookupError, PermissionError):
+        pass
+
+
+def _open_log(log_path: Optional[str]) -> Tuple[str, BinaryIO]:
+    if not log_path or log_path == "/dev/null":
+        log_path = job_log_path()
+    os.makedirs(os.path.dirname(os.path.abspath(log_path)), exist_ok=True)
+    return log_path, open(log_path, "ab")
+
+
+def run(
+    command: str,
+    env: Dict[str, str] = dict(),
+    directory: Optional[str] = None,
+    log_path: Optional[str] = None,
+    timeout: Optional[float] = None,
+    max_output: int = default_max_output,
+    on_output: Optional[OutputCallback] = None,
+    capture_stdout: bool = True,
+) -> CommandResult:
+    """
+    Runs a shell command in its own process group.
+    stdout and stderr are streamed line by line into the log file (the job log
+    if none or /dev/null is given) and to the callback while the command runs. After
+    [timeout] seconds the whole process group is terminated and the result
+    reports return code 124, like coreutils timeout.
+    """
+    log_path, log_file = _open_log(log_path)
+
+    new_env = os.environ.copy()
+    new_env.update(env)
+    collector = _OutputCollector(log_file, on_output, max_output)
+    start_time = time.monotonic()
+    process = subprocess.Popen(
+        [command],
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        stdin=subprocess.DEVNULL,
+        shell=True,
+        env=new_env,
+        cwd=directory,
+        start_new_session=True,
+    )
+    readers = [
+        threading.Thread(
+            target=collector.consume,
+            args=("stdout", process.stdout, capture_stdout),
+            daemon=True,
+        ),
+        threading.Thread(
+            target=collector.consume, args=("stderr", process.stderr, True), daemon=True
+        ),
+    ]
+    for reader in readers:
+        reader.start()
+
+    timed_out = threading.Event()
+
+    def expire() -> None:
+        timed_out.set()
+        _kill_group(process, signal.SIGTERM)
+        killer = threading.Timer(kill_grace_period, _kill_group, [process, signal.SIGKILL])
+        killer.daemon = True
+        killer.start()
+
+    timer = None
+    if timeout:
+        timer = threading.Timer(timeout, expire)
+        timer.daemon = True
+        timer.start()
+
+    try:
+        # wait4 reaps the shell and reports the resources used by it and
+        # every child it waited for
+        _, status, usage = os.wait4(process.pid, 0)
+        process.returncode = os.waitstatus_to_exitcode(status)
+    finally:
+        if timer:
+            timer.cancel()
+    for reader in readers:
+        reader.join()
+    if log_file:
+        log_file.close()
+
+    return_code = 124 if timed_out.is_set() else int(process.returncode)
+    return CommandResult(
+        return_code=return_code,
+        stdout=b"".join(collector.buffers["stdout"]),
+        stderr=b"".join(collector.buffers["stderr"]),
+        duration=time.monotonic() - start_time,
+        timed_out=timed_out.is_set(),
+        truncated=collector.truncated,
+        log_path=log_path,
+        user_time=usage.ru_utime,
+        system_time=usage.ru_stime,
+        max_rss_kb=usage.ru_maxrss,
+    )
+
+
+def run_exec(
+    api: Any,
+    container_id: str,
+    command: str,
+    env: Dict[str, str] = dict(),
+    directory: Optional[str] = None,
+    log_path: Optional[str] = None,
+    timeout: Optional[float] = None,
+    max_output: int = default_max_output,
+    on_output: Optional[OutputCallback] = None,
+    capture_stdout: bool = True,
+) -> CommandResult:
+    """
+    Runs a command in a running container through the exec API of the docker
+    client [api], with the same streaming, output limit and timeout as run.
+    The timeout is enforced in the container by coreutils timeout, which
+    terminates the process group of the command and then kills it after the
+    grace period.
+    """
+    log_path, log_file = _open_log(log_path)
+    command_list = shlex.split(command)
+    if timeout:
+        command_list = [
+            "timeout",
+            "-k",
+            str(kill_grace_period),
+            str(timeout),
+        ] + command_list
+
+    collector = _OutputCollector(log_file, on_output, max_output)
+    start_time = time.monotonic()
+    exec_id = api.exec_create(
+        container_id,
+        command_list,
+        privileged=True,
+        tty=True,
+        environment=env,
+        workdir=directory,
+    )["Id"]
+    pending = {"stdout": b"", "stderr": b""}
+    capture = {"stdout": capture_stdout, "stderr": True}
+    try:
+        for chunks in api.exec_start(exec_id, tty=True, stream=True, demux=True):
+            for stream_name, chunk in zip(["stdout", "stderr"], chunks):
+                if not chunk:
+                    continue
+                # the stream delivers chunks, the log and callback get lines
+                *lines, pending[stream_name] = (pending[stream_name] + chunk).split(
+                    b"\n"
+                )
+                for line in lines:
+                    collector.feed(stream_name, line + b"\n", capture[stream_name])
+        for stream_name, rest in pending.items():
+            if rest:
+                collector.feed(stream_name, rest, capture[stream_name])
+    finally:
+        log_file.close()
+
+    duration = time.monotonic() - start_time
+    exit_code = api.exec_inspect(exec_id).get("ExitCode")
+    return_code = -1 if exit_code is None else int(exit_code)
+    # 137 is also the status of a command killed for its memory use
+    timed_out = (
+        bool(timeout) and return_code in [124, 137] and duration >= float(timeout)
+    )
+    return CommandResult(
+        return_code=124 if timed_out else return_code,
+        stdout=b"".join(collector.buffers["stdout"]),
+        stderr=b"".join(collector.buffers["stderr"]),
+        duration=duration,
+        timed_out=timed_out,
+        truncated=collector.truncated,
+        log_path=log_path,
+    )
+
+
+def debug_output() -> OutputCallback:
+    """Callback that emits every line of the output as a debug message"""
+    job_id = values.job_identifier.get("NONE")
+
+    def emit(name: str, line: bytes) -> None:
+        emitter.debug(
+            "[execute-command][{}][{}] {}".format(
+                job_id, name, line.decode("utf-8", "ignore").rstrip("\n")
+            )
+        )
+
+    return emit
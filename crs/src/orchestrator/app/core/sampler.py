@@ -0,0 +1,408 @@
+import json
+import os
+import threading
+import time
+from array import array
+from os.path import join
+from typing import Any
+from typing import Dict
+from typing import List
+from typing import Optional
+from typing import Tuple
+
+import docker
+
+from app.core import container
+from app.core import definitions
+from app.core import emitter
+from app.core import values
+
+# Samples the resource usage of the running task containers in the background.
+# Every container keeps a fixed size ring buffer of (time, cpu%, rss, read and
+# written bytes) samples. The usage counters are read from the cgroup of the
+# container where the cgroup file system is visible and from the Docker stats
+# endpoint otherwise.
+
+SAMPLE_FIELDS = ("time", "cpu_percent", "rss_bytes", "read_bytes", "write_bytes")
+
+# cumulative cpu time in nanoseconds, resident memory, read and written bytes
+RawUsage = Tuple[float, float, float, float]
+
+
+class ResourceSeries:
+    """Ring buffer holding the last [capacity] samples of a container"""
+
+    def __init__(self, capacity: int):
+        self.capacity = max(1, capacity)
+        self.columns = {
+            field: array("d", [0.0] * self.capacity) for field in SAMPLE_FIELDS
+        }
+        self.next = 0
+        self.count = 0
+        self.cpu_peak = 0.0
+        self.cpu_total = 0.0
+        self.rss_peak = 0.0
+        self.total_count = 0
+
+    def append(self, sample: Tuple[float, float, float, float, float]) -> None:
+        for field, value in zip(SAMPLE_FIELDS, sample):
+            self.columns[field][self.next] = value
+        self.next = (self.next + 1) % self.capacity
+        self.count = min(self.count + 1, self.capacity)
+        # the peaks and the mean cover every sample, not only the buffered ones
+        _, cpu_percent, rss_bytes, _, _ = sample
+        self.cpu_peak = max(self.cpu_peak, cpu_percent)
+        self.cpu_total += cpu_percent
+        self.rss_peak = max(self.rss_peak, rss_bytes)
+        self.total_count += 1
+
+    def series(self, field: str) -> List[float]:
+        """Buffered values of a field, oldest first"""
+        column = self.columns[field]
+        start = (self.next - self.count) % self.capacity
+        return [column[(start + i) % self.capacity] for i in range(self.count)]
+
+    def latest(self) -> Optional[Dict[str, float]]:
+        if not self.count:
+            return None
+        index = (self.next - 1) % self.capacity
+        return {field: self.columns[field][index] for field in SAMPLE_FIELDS}
+
+    def summary(self) -> Dict[str, float]:
+        latest = self.latest() or {}
+        times = self.series("time")
+        return {
+            "samples": self.total_count,
+            "duration": round(times[-1] - times[0], 3) if times else 0.0,
+            "cpu_mean_percent": round(self.cpu_total / max(1, self.total_count), 3),
+            "cpu_peak_percent": round(self.cpu_peak, 3),
+            "rss_peak_bytes": self.rss_peak,
+            "read_bytes": latest.get("read_bytes", 0.0),
+            "write_bytes": latest.get("write_bytes", 0.0),
+        }
+
+
+def _read_lines(path: str) -> List[str]:
+    with open(path, "r") as cgroup_file:
+        return cgroup_file.read().splitlines()
+
+
+def _read_number(path: str) -> float:
+    return float(_read_lines(path)[0])
+
+
+def _stat_value(path: str, key: str) -> float:
+    for line in _read_lines(path):
+        name, _, value = line.partition(" ")
+        if name == key:
+            return float(value)
+    return 0.0
+
+
+def _find_cgroup(full_id: str) -> Optional[Tuple[str, Dict[str, str]]]:
+    """cgroup version and the directories holding the counters of a container,
+    for the cgroupfs and the systemd driver"""
+    base = values.dir_cgroup
+    for scope in ["docker/" + full_id, "system.slice/docker-{}.scope".format(full_id)]:
+        if os.path.isfile(join(base, scope, "cpu.stat")):
+            directory = join(base, scope)
+            return "v2", {"cpu": directory, "memory": directory, "io": directory}
+        directories = {
+            "cpu": join(base, "cpuacct", scope),
+            "memory": join(base, "memory", scope),
+            "io": join(base, "blkio", scope),
+        }
+        if all(os.path.isdir(directory) for directory in directories.values()):
+            return "v1", directories
+    return None
+
+
+def _read_cgroup(version: str, directories: Dict[str, str]) -> RawUsage:
+    read_bytes = 0.0
+    write_bytes = 0.0
+    if version == "v2":
+        cpu_ns = _stat_value(join(directories["cpu"], "cpu.stat"), "usage_usec") * 1000
+        rss = _read_number(join(directories["memory"], "memory.current"))
+        rss -= _stat_value(join(directories["memory"], "memory.stat"), "inactive_file")
+        for line in _read_lines(join(directories["io"], "io.stat")):
+            for entry in line.split()[1:]:
+                name, _, value = entry.partition("=")
+                if name == "rbytes":
+                    read_bytes += float(value)
+                elif name == "wbytes":
+                    write_bytes += float(value)
+    else:
+        cpu_ns = _read_number(join(directories["cpu"], "cpuacct.usage"))
+        rss = _read_number(join(directories["memory"], "memory.usage_in_bytes"))
+        rss -= _stat_value(
+            join(directories["memory"], "memory.stat"), "total_inactive_file"
+        )
+        io_path = join(directories["io"], "blkio.throttle.io_service_bytes")
+        for line in _read_lines(io_path):
+            fields = line.split()
+            if len(fields) == 3 and fields[1] == "Read":
+                read_bytes += float(fields[2])
+            elif len(fields) == 3 and fields[1] == "Write":
+                write_bytes += float(fields[2])
+    return cpu_ns, max(0.0, rss), read_bytes, write_bytes
+
+
+def _read_docker_stats(container_stats: Dict[str, Any]) -> RawUsage:
+    cpu_ns = float(container_stats["cpu_stats"]["cpu_usage"]["total_usage"])
+    memory_stats = container_stats.get("memory_stats", {})
+    inactive = memory_stats.get("stats", {}).get(
+        "inactive_file", memory_stats.get("stats", {}).get("total_inactive_file", 0)
+    )
+    rss = float(memory_stats.get("usage", 0)) - inactive
+    read_bytes = 0.0
+    write_bytes = 0.0
+    blkio_stats = container_stats.get("blkio_stats", {})
+    for entry in blkio_stats.get("io_service_bytes_recursive") or []:
+        if entry.get("op", "").lower() == "read":
+            read_bytes += entry.get("value", 0)
+        elif entry.get("op", "").lower() == "write":
+            write_bytes += entry.get("value", 0)
+    return cpu_ns, max(0.0, rss), read_bytes, write_bytes
+
+
+class _TrackedContainer:
+    def __init__(self, container_id: str, profile_name: str, cpus: List[str]):
+        self.container_id = container_id
+        self.profile_name = profile_name
+        self.cpus = cpus
+        self.series = ResourceSeries(values.stats_buffer_size)
+        self.full_id: Optional[str] = None
+        self.cgroup: Optional[Tuple[str, Dict[str, str]]] = None
+        self.previous: Optional[Tuple[float, float]] = None
+        self.io_base: Optional[Tuple[float, float]] = None
+        self.gone = False
+        self.gone_at = 0.0
+
+    def read(self) -> Optional[RawUsage]:
+        if self.full_id is None:
+            docker_container = container.get_client().containers.get(
+                self.container_id
+            )
+            self.full_id = str(docker_container.id)
+            self.cgroup = _find_cgroup(self.full_id)
+        if self.cgroup:
+            try:
+                return _read_cgroup(*self.cgroup)
+            except (OSError, ValueError, IndexError):
+                # the cgroup is removed when the container stops
+                self.cgroup = None
+        container_stats = container.get_client().api.stats(
+            self.full_id, stream=False, one_shot=True
+        )
+        if not container_stats.get("cpu_stats", {}).get("cpu_usage"):
+            return None
+        return _read_docker_stats(container_stats)
+
+    def sample(self) -> None:
+        usage = self.read()
+        now = time.time()
+        if usage is None:
+            self.stop()
+            return
+        cpu_ns, rss, read_bytes, write_bytes = usage
+        previous, self.previous = self.previous, (now, cpu_ns)
+        # pooled containers carry the io counters of their earlier leases
+        if self.io_base is None:
+            self.io_base = (read_bytes, write_bytes)
+        read_bytes -= self.io_base[0]
+        write_bytes -= self.io_base[1]
+        # the cpu usage is the difference of two readings, the first one only
+        # serves as the base
+        if previous is None or now <= previous[0]:
+            return
+        previous_time, previous_cpu_ns = previous
+        cpu_percent = (cpu_ns - previous_cpu_ns) / ((now - previous_time) * 1e9) * 100
+        self.series.append(
+            (now, round(max(0.0, cpu_percent), 3), rss, read_bytes, write_bytes)
+        )
+
+    def stop(self) -> None:
+        if not self.gone:
+            self.gone = True
+            self.gone_at = time.monotonic()
+
+
+class ContainerSampler:
+    """
+    Background sampler of the registered task containers. Finished containers
+    fold their samples into a per tool profile (peak memory and cpu usage) that
+    is kept across runs and used to size later containers of the same tool.
+    """
+
+    def __init__(self) -> None:
+        self.lock = threading.Lock()
+        self.tracked: Dict[str, _TrackedContainer] = dict()
+        self.profiles: Optional[Dict[str, Dict[str, float]]] = None
+        self.thread: Optional[threading.Thread] = None
+        self.wakeup = threading.Event()
+
+    def start(self) -> None:
+        with self.lock:
+            if self.thread is None or not self.thread.is_alive():
+                self.thread = threading.Thread(
+                    target=self.run, name="container-sampler", daemon=True
+                )
+                self.thread.start()
+
+    def register(self, container_id: str, profile_name: str, cpus: List[str]) -> None:
+        if values.stats_sample_interval <= 0:
+            return
+        with self.lock:
+            self.tracked[container_id] = _TrackedContainer(
+                container_id, profile_name, list(cpus)
+            )
+        self.start()
+        self.wakeup.set()
+
+    def unregister(self, container_id: str) -> Optional[ResourceSeries]:
+        """Stops sampling a container, returns its samples and updates the
+        profile of its tool"""
+        with self.lock:
+            tracked = self.tracked.pop(container_id, None)
+        if tracked is None:
+            return None
+        if tracked.series.count:
+            self.update_profile(tracked.profile_name, tracked.series)
+        return tracked.series
+
+    def run(self) -> None:
+        while True:
+            self.wakeup.wait(values.stats_sample_interval)
+            self.wakeup.clear()
+            with self.lock:
+                # containers of tasks that never collected their stats
+                expired = time.monotonic() - values.stats_retention
+                for container_id, tracked in list(self.tracked.items()):
+                    if tracked.gone and tracked.gone_at < expired:
+                        del self.tracked[container_id]
+                tracked_list = [t for t in self.tracked.values() if not t.gone]
+            for tracked in tracked_list:
+                try:
+                    tracked.sample()
+                except Exception as ex:
+                    # NotFound and friends, the container has gone away
+                    emitter.debug(
+                        "[sampler] stopped sampling {}: {}".format(
+                            tracked.container_id, ex
+                        )
+                    )
+                    tracked.stop()
+
+    def series(self, container_id: str) -> Optional[ResourceSeries]:
+        with self.lock:
+            tracked = self.tracked.get(container_id)
+        return tracked.series if tracked else None
+
+    def describe(self, container_id: str) -> Optional[str]:
+        tracked_series = self.series(container_id)
+        latest = tracked_series.latest() if tracked_series else None
+        if not latest:
+            return None
+        return "{:.0f}% CPU, {:.2f} GiB".format(
+            latest["cpu_percent"], latest["rss_bytes"] / (1024 * 1024 * 1024)
+        )
+
+    def cpu_load(self) -> Dict[str, float]:
+        """Latest cpu usage (percent of one core) per host cpu, the usage of a
+        container is spread evenly over its cpu set"""
+        load: Dict[str, float] = dict()
+        with self.lock:
+            tracked_list = list(self.tracked.values())
+        for tracked in tracked_list:
+            latest = tracked.series.latest()
+            if not latest or not tracked.cpus or tracked.gone:
+                continue
+            share = latest["cpu_percent"] / len(tracked.cpus)
+            for cpu in tracked.cpus:
+                load[cpu] = load.get(cpu, 0.0) + share
+        return load
+
+    def load_profiles(self) -> Dict[str, Dict[str, float]]:
+        if self.profiles is None:
+            self.profiles = dict()
+            if os.path.isfile(values.file_resource_profiles):
+                try:
+                    with open(values.file_resource_profiles, "r") as profile_file:
+                        self.profiles = json.load(profile_file)
+                except (OSError, ValueError):
+                    pass
+        return self.profiles
+
+    def profile(self, profile_name: str) -> Optional[Dict[str, float]]:
+        with self.lock:
+            return self.load_profiles().get(profile_name)
+
+    def update_profile(self, profile_name: str, series: ResourceSeries) -> None:
+        summary = series.summary()
+        with self.lock:
+            profiles = self.load_profiles()
+            profile = profiles.setdefault(
+                profile_name,
+                {"runs": 0, "rss_peak_bytes": 0.0, "cpu_peak_percent": 0.0},
+            )
+            profile["runs"] += 1
+            profile["rss_peak_bytes"] = max(
+                profile["rss_peak_bytes"], summary["rss_peak_bytes"]
+            )
+            profile["cpu_peak_percent"] = max(
+                profile["cpu_peak_percent"], summary["cpu_peak_percent"]
+            )
+            try:
+                os.makedirs(os.path.dirname(values.file_resource_profiles), exist_ok=True)
+                tmp_path = "{}.{}".format(values.file_resource_profiles, os.getpid())
+                with open(tmp_path, "w") as profile_file:
+                    json.dump(profiles, profile_file, indent=2)
+                os.replace(tmp_path, values.file_resource_profiles)
+            except OSError as ex:
+                emitter.debug("[sampler] could not store the profiles: {}".format(ex))
+
+    def size_container(
+        self, profile_name: str, container_config_info: Dict[str, Any]
+    ) -> Dict[str, Any]:
+        """
+        Container profile with a memory reservation derived from the peak memory
+        of the earlier runs of the tool. An explicit reservation of the profile
+        is kept, the hard memory limit of the profile is never changed.
+        """
+        profile = self.profile(profile_name)
+        if not profile or not profile.get("rss_peak_bytes"):
+            return container_config_info
+        if definitions.KEY_CONTAINER_MEM_RESERVATION in (container_config_info or {}):
+            return container_config_info
+        sized = dict(container_config_info or {})
+        reservation = int(profile["rss_peak_bytes"] * values.container_mem_headroom)
+        mem_limit = sized.get(definitions.KEY_CONTAINER_MEM_LIMIT)
+        if mem_limit:
+            limit_bytes = docker.utils.parse_bytes(str(mem_limit))
+            if profile["rss_peak_bytes"] > 0.9 * limit_bytes:
+                emitter.warning(
+                    "\t\t[framework] {} used up to {:.2f} GiB, close to its limit of {}".format(
+                        profile_name,
+                        profile["rss_peak_bytes"] / (1024 * 1024 * 1024),
+                        mem_limit,
+                    )
+                )
+            reservation = min(reservation, limit_bytes)
+        sized[definitions.KEY_CONTAINER_MEM_RESERVATION] = reservation
+        emitter.debug(
+            "\t\t[framework] reserving {:.2f} GiB for {} based on {} earlier run(s)".format(
+                reservation / (1024 * 1024 * 1024), profile_name, profile["runs"]
+            )
+        )
+        return sized
+
+    def after_fork(self) -> None:
+        self.lock = threading.Lock()
+        self.tracked = dict()
+        self.profiles = None
+        self.thread = None
+        self.wakeup = threading.Event()
+
+
+container_sampler = ContainerSampler()
+os.register_at_fork(after_in_child=container_sampler.after_fork)
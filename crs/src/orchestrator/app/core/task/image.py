@@ -1,4 +1,8 @@
+import glob
+import hashlib
+import json
 import os
+import re
 import shutil
 from os.path import dirname
 from os.path import isdir
@@ -8,6 +12,8 @@ from typing import cast
 from typing import Dict
 from typing import List
 from typing import Optional
+from typing import Pattern
+from typing import Tuple
 
 from app.core import container
 from app.core import definitions
@@ -20,6 +26,12 @@ from app.core.task.typing.DirectoryInfo import DirectoryInfo
 from app.drivers.benchmarks.AbstractBenchmark import AbstractBenchmark
 from app.drivers.tools.AbstractTool import AbstractTool
 
+# Experiment images are additionally tagged as RECIPE_REPOSITORY:<recipe hash>
+# and labelled with the full hash of the inputs they were built from
+RECIPE_REPOSITORY = "cerberus-recipe"
+RECIPE_LABEL = "cerberus.recipe"
+CONTEXT_DOCKERFILE = "Dockerfile.experiment"
+
 
 def construct_container_volumes(
     dir_info: DirectoryInfo, extra_volumes: Optional[Dict[str, Any]] = None
@@ -180,6 +192,193 @@ def _subject_based_image(
     return tmp_dockerfile
 
 
+def _instructions(dockerfile_path: str) -> List[str]:
+    """Instructions of a Dockerfile, with continued lines joined"""
+    instruction_list: List[str] = []
+    current = ""
+    with open(dockerfile_path, "r") as dock_file:
+        for line in dock_file:
+            stripped = line.strip()
+            if stripped.startswith("#") or (not current and not stripped):
+                continue
+            if stripped.endswith("\\"):
+                current += stripped[:-1] + " "
+                continue
+            instruction_list.append(current + stripped)
+            current = ""
+    if current.strip():
+        instruction_list.append(current)
+    return instruction_list
+
+
+def _copy_sources(dockerfile_path: str) -> Optional[List[str]]:
+    """
+    Sources of the COPY/ADD instructions that are taken from the context, None if
+    they cannot be told without the whole context (e.g. COPY . or variables)
+    """
+    sources: List[str] = []
+    for instruction in _instructions(dockerfile_path):
+        words = instruction.split(None, 1)
+        if len(words) < 2 or words[0].upper() not in ["COPY", "ADD"]:
+            continue
+        arguments = words[1].strip()
+        flags = []
+        while arguments.startswith("--"):
+            flag, _, arguments = arguments.partition(" ")
+            flags.append(flag)
+            arguments = arguments.strip()
+        if any(flag.startswith("--from") for flag in flags):
+            # taken from another stage or image
+            continue
+        if arguments.startswith("<<"):
+            # here-document
+            return None
+        if arguments.startswith("["):
+            try:
+                argument_list = [str(a) for a in json.loads(arguments)]
+            except ValueError:
+                return None
+        else:
+            argument_list = arguments.split()
+        for source in argument_list[:-1]:
+            if "://" in source or source.startswith("git@"):
+                continue
+            if "$" in source or os.path.normpath(source.lstrip("/")) == ".":
+                return None
+            sources.append(source)
+    return sources
+
+
+def _dockerignore_rules(source_context: str) -> List[Tuple[Pattern[str], bool]]:
+    """(pattern, is exception) of every rule of the .dockerignore of a context"""
+    ignore_path = join(source_context, ".dockerignore")
+    rule_list: List[Tuple[Pattern[str], bool]] = []
+    if not os.path.isfile(ignore_path):
+        return rule_list
+    with open(ignore_path, "r") as ignore_file:
+        for line in ignore_file:
+            rule = line.strip()
+            if not rule or rule.startswith("#"):
+                continue
+            is_exception = rule.startswith("!")
+            rule = os.path.normpath(rule.lstrip("!").strip().lstrip("/"))
+            regex = ""
+            index = 0
+            while index < len(rule):
+                if rule.startswith("**/", index):
+                    regex += "(?:.*/)?"
+                    index += 3
+                elif rule.startswith("**", index):
+                    regex += ".*"
+                    index += 2
+                elif rule[index] == "*":
+                    regex += "[^/]*"
+                    index += 1
+                elif rule[index] == "?":
+                    regex += "[^/]"
+                    index += 1
+                elif rule[index] == "[" and "]" in rule[index:]:
+                    end = rule.index("]", index)
+                    regex += rule[index : end + 1].replace("[!", "[^", 1)
+                    index = end + 1
+                else:
+                    regex += re.escape(rule[index])
+                    index += 1
+            # a rule on a directory covers everything below it
+            rule_list.append((re.compile(regex + "(?:/.*)?$"), is_exception))
+    return rule_list
+
+
+def _is_ignored(relative: str, rule_list: List[Tuple[Pattern[str], bool]]) -> bool:
+    ignored = False
+    for pattern, is_exception in rule_list:
+        if pattern.match(relative):
+            ignored = not is_exception
+    return ignored
+
+
+def _link_or_copy(source: str, destination: str) -> None:
+    try:
+        os.link(source, destination)
+    except OSError:
+        shutil.copy2(source, destination)
+
+
+def _prepare_build_context(
+    dockerfile_path: str, source_context: str, source_list: List[str]
+) -> str:
+    """
+    Creates a build context holding only the Dockerfile and the files its
+    COPY/ADD instructions refer to, instead of sending the whole source context;
+    files excluded by the .dockerignore of the source context are left out
+    """
+    context_dir = dockerfile_path + ".context"
+    shutil.rmtree(context_dir, ignore_errors=True)
+    os.makedirs(context_dir)
+    rule_list = _dockerignore_rules(source_context)
+
+    def ignore(directory: str, names: List[str]) -> List[str]:
+        return [
+            name
+            for name in names
+            if join(directory, name) == context_dir
+            or _is_ignored(
+                os.path.relpath(join(directory, name), source_context), rule_list
+            )
+        ]
+
+    for pattern in source_list:
+        for source in glob.glob(join(source_context, pattern.lstrip("/"))):
+            relative = os.path.relpath(source, source_context)
+            if relative.startswith("..") or _is_ignored(relative, rule_list):
+                continue
+            destination = join(context_dir, relative)
+            if isdir(source):
+                shutil.copytree(
+                    source,
+                    destination,
+                    symlinks=True,
+                    copy_function=_link_or_copy,
+                    dirs_exist_ok=True,
+                    ignore=ignore,
+                )
+            elif os.path.lexists(source):
+                os.makedirs(dirname(destination), exist_ok=True)
+                _link_or_copy(source, destination)
+    shutil.copy2(dockerfile_path, join(context_dir, CONTEXT_DOCKERFILE))
+    return context_dir
+
+
+def _hash_recipe(base_image_id: str, context_dir: str) -> str:
+    """Content hash of the base image, the Dockerfile and the build context"""
+    base_image = container.get_image(base_image_id)
+    recipe = hashlib.sha256(
+        (base_image.id if base_image else base_image_id).encode()
+    )
+    for root, dirs, files in os.walk(context_dir):
+        dirs.sort()
+        for file_name in sorted(files):
+            file_path = join(root, file_name)
+            recipe.update(os.path.relpath(file_path, context_dir).encode())
+            if os.path.islink(file_path):
+                recipe.update(os.readlink(file_path).encode())
+                continue
+            with open(file_path, "rb") as context_file:
+                for chunk in iter(lambda: context_file.read(1 << 20), b""):
+                    recipe.update(chunk)
+    return recipe.hexdigest()
+
+
+def _find_recipe_image(image_name: str, recipe_hash: str) -> Any:
+    image = container.get_image(image_name)
+    if image and image.labels.get(RECIPE_LABEL) == recipe_hash:
+        return image
+    image = container.get_image(RECIPE_REPOSITORY, recipe_hash[:16])
+    if image:
+        container.tag_image(image, image_name)
+    return image
+
+
 def construct_experiment_tool_image(
     bug_image_id: str,
     tool: AbstractTool,
@@ -187,16 +386,61 @@ def construct_experiment_tool_image(
     image_name: str,
     bug_info: Dict[str, Any],
     tag: Optional[str],
+    reuse: bool = True,
 ) -> str:
+    """
+    Builds the image of a tool for an experiment. Images are addressed by the
+    hash of their recipe, an image built from the same base image, Dockerfile
+    and context files is reused instead of rebuilt. Images taking the whole
+    context are reused by name.
+    """
     if values.use_subject_as_base:
         tmp_dockerfile = _subject_based_image(
             bug_image_id, tool, dir_info, bug_info, tag
         )
     else:
         tmp_dockerfile = _tool_based_image(bug_image_id, tool, dir_info, bug_info, tag)
-    id = container.build_image(tmp_dockerfile, image_name)
-    os.remove(tmp_dockerfile)
-    return id
+    source_context = os.getenv(
+        "AIXCC_CRS_SCRATCH_SPACE", os.path.abspath(dirname(tmp_dockerfile))
+    )
+    source_list = _copy_sources(tmp_dockerfile)
+    if source_list is None:
+        # the image takes the whole context (e.g. ADD .), which holds the files of
+        # every experiment; such images are reused by name as they cannot be told
+        # apart by their recipe
+        try:
+            if reuse and container.image_exists(image_name):
+                image = container.get_image(image_name)
+                if image:
+                    return cast(str, image.id)
+            return container.build_image(tmp_dockerfile, image_name)
+        finally:
+            os.remove(tmp_dockerfile)
+
+    context_dir = _prepare_build_context(tmp_dockerfile, source_context, source_list)
+    try:
+        recipe_hash = _hash_recipe(bug_image_id, context_dir)
+        if reuse:
+            image = _find_recipe_image(image_name, recipe_hash)
+            if image:
+                emitter.information(
+                    "\t\t[framework] reusing image {} for recipe {}".format(
+                        image.id, recipe_hash[:16]
+                    )
+                )
+                return cast(str, image.id)
+        with open(join(context_dir, CONTEXT_DOCKERFILE), "a") as dock_file:
+            dock_file.write('\nLABEL {}="{}"\n'.format(RECIPE_LABEL, recipe_hash))
+        id = container.build_image(
+            join(context_dir, CONTEXT_DOCKERFILE), image_name, context_dir
+        )
+        image = container.get_image(image_name)
+        if image:
+            container.tag_image(image, RECIPE_REPOSITORY, recipe_hash[:16])
+        return id
+    finally:
+        os.remove(tmp_dockerfile)
+        shutil.rmtree(context_dir, ignore_errors=True)
 
 
 def prepare_experiment_image(
@@ -267,19 +511,15 @@ def prepare_experiment_tool(
         if not bug_image_id:
             utilities.error_exit("Bug image id not provided")
         emitter.information("\t\t[framework] preparing image {}".format(image_name))
-        if (
-            not container.image_exists(image_name)
-            or values.rebuild_base
-            or values.rebuild_all
-        ):
-            return construct_experiment_tool_image(
-                bug_image_id, tool, dir_info, image_name, bug_info, tag
-            )
-        else:
-            img = container.get_image(image_name)
-            if not img:
-                utilities.error_exit("Image exists yet was not found??")
-            return cast(str, img.id)
+        return construct_experiment_tool_image(
+            bug_image_id,
+            tool,
+            dir_info,
+            image_name,
+            bug_info,
+            tag,
+            reuse=not (values.rebuild_base or values.rebuild_all),
+        )
 
     dir_local_patch = dir_info["local"]["patches"]
     config_patch_dir = task_profile.get(definitions.KEY_CONFIG_PATCH_DIR, None)
@@ -5,6 +5,7 @@ from os.path import join
 from typing import Any
 from typing import Dict
 
+from app.core import archiver
 from app.core import definitions
 from app.core import emitter
 from app.core import logger
@@ -66,17 +67,20 @@ def collect_tool_result(
         valkyrie.analyse_output(patch_dir, tool.stats)
 
 
-def retrieve_results(archive_name: str, tool: AbstractTool) -> bool:
+def retrieve_results(experiment_id: str, tool: AbstractTool) -> bool:
     emitter.normal("\t\tretrieving results")
-    archive_path = join(values.dir_main, "results", tool.name.lower(), archive_name)
-    if os.path.isfile(archive_path):
-        extract_command = "cp {} {} ; ".format(archive_path, values.dir_results)
-        extract_command += "cd {} ; ".format(values.dir_results)
-        extract_command += "tar -xf {}" + archive_name
-        utilities.execute_command(extract_command)
-        return True
+    dir_archive = join(values.dir_results, tool.name)
+    # the archive may still be written by this process
+    utilities.wait_for_archives()
+    archive_file = archiver.find_archive(dir_archive, experiment_id)
+    if archive_file:
+        return archiver.extract_archive(archive_file, values.dir_results)
     else:
-        emitter.error("\t\t[error] Result archive not found at {}".format(archive_path))
+        emitter.error(
+            "\t\t[error] Result archive not found at {}".format(
+                archiver.archive_path(dir_archive, experiment_id)
+            )
+        )
         return False
 
 
@@ -91,6 +95,7 @@ def save_artifacts(dir_info: DirectoryInfo, tool: AbstractTool) -> None:
     os.makedirs(dir_results, exist_ok=True)
     tool.save_artifacts(local_info)
     tool.post_process()
+    logger.flush()
     save_command = "cp -f {} {} ; ".format(values.file_main_log, dir_results)
     save_command += "cp -f {}/* {}".format(values.file_error_log, dir_results)
     utilities.execute_command(save_command)
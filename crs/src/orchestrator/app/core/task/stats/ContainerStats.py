@@ -1,6 +1,7 @@
 from datetime import datetime
 from typing import Any
 from typing import Dict
+from typing import List
 from typing import Tuple
 
 from app.core import emitter
@@ -13,30 +14,42 @@ class ContainerStats:
     total_rx_bytes: float
     total_tx_bytes: float
     network_int_count: int
+    cpu_usage_percent: float
+    cpu_peak_percent: float
+    total_read_bytes: float
+    total_write_bytes: float
+    usage_series: Dict[str, List[float]]
 
     def __init__(self) -> None:
         self.mem_usage_gb = 0
         self.total_rx_bytes = 0
         self.total_tx_bytes = 0
         self.network_int_count = 0
+        self.cpu_usage_percent = 0
+        self.cpu_peak_percent = 0
+        self.total_read_bytes = 0
+        self.total_write_bytes = 0
+        self.usage_series = dict()
 
     @staticmethod
     def compute_cpu_usage(container_stats: Dict[str, Any]) -> float:
-        cpu_usage_delta = (
-            container_stats["cpu_stats"]["cpu_usage"]["total_usage"]
-            - container_stats["precpu_stats"]["cpu_usage"]["total_usage"]
+        cpu_stats = container_stats.get("cpu_stats", {})
+        precpu_stats = container_stats.get("precpu_stats", {})
+        cpu_usage = cpu_stats.get("cpu_usage", {})
+        cpu_usage_delta = cpu_usage.get("total_usage", 0) - precpu_stats.get(
+            "cpu_usage", {}
+        ).get("total_usage", 0)
+        system_cpu_usage_delta = cpu_stats.get("system_cpu_usage", 0) - (
+            precpu_stats.get("system_cpu_usage", 0)
         )
-        system_cpu_usage_delta = (
-            container_stats["cpu_stats"]["system_cpu_usage"]
-            - container_stats["precpu_stats"]["system_cpu_usage"]
+        online_cpus = cpu_stats.get(
+            "online_cpus", len(cpu_usage.get("percpu_usage") or [])
         )
 
-        percentage_usage = 0
-        if system_cpu_usage_delta != 0:
-            round(
-                (cpu_usage_delta / system_cpu_usage_delta)
-                * container_stats["cpu_stats"]["online_cpus"]
-                * 100,
+        percentage_usage = 0.0
+        if system_cpu_usage_delta > 0 and cpu_usage_delta > 0:
+            percentage_usage = round(
+                (cpu_usage_delta / system_cpu_usage_delta) * max(1, online_cpus) * 100,
                 3,
             )
 
@@ -69,14 +82,36 @@ class ContainerStats:
             self.total_rx_bytes,
             self.total_tx_bytes,
         ) = ContainerStats.compute_network_usage(container_stats)
+        if not self.usage_series:
+            self.cpu_usage_percent = ContainerStats.compute_cpu_usage(container_stats)
 
-    def get_dict(self) -> Dict[str, Any]:
+    def load_resource_usage(
+        self, summary: Dict[str, float], series: Dict[str, List[float]]
+    ) -> None:
+        """Usage recorded by the container sampler over the whole run"""
+        self.cpu_usage_percent = summary["cpu_mean_percent"]
+        self.cpu_peak_percent = summary["cpu_peak_percent"]
+        mem_peak_gb = round(summary["rss_peak_bytes"] / (1024 * 1024 * 1024), 3)
+        self.mem_usage_gb = max(self.mem_usage_gb, mem_peak_gb)
+        self.total_read_bytes = summary["read_bytes"]
+        self.total_write_bytes = summary["write_bytes"]
+        self.usage_series = series
 
-        return {
+    def get_dict(self) -> Dict[str, Any]:
+        container_dict: Dict[str, Any] = {
             "mem_usage": f"{self.mem_usage_gb} GiB",
+            "cpu_usage": f"{self.cpu_usage_percent} %",
+            "cpu_peak_usage": f"{self.cpu_peak_percent} %",
+            "io_usage": {
+                "total_read": f"{self.total_read_bytes} bytes",
+                "total_written": f"{self.total_write_bytes} bytes",
+            },
             "network_usage": {
                 "total_received": f"{self.total_rx_bytes} bytes",
                 "total_transmitted": f"{self.total_tx_bytes} bytes",
                 "interfaces_count": self.network_int_count,
             },
         }
+        if self.usage_series:
+            container_dict["usage_series"] = self.usage_series
+        return container_dict
@@ -18,8 +18,11 @@ from app.core import container
 from app.core import definitions
 from app.core import emitter
 from app.core import parallel
+from app.core import tracing
 from app.core import utilities
 from app.core import values
+from app.core.container_pool import container_pool
+from app.core.sampler import container_sampler
 from app.core.task.dir_info import add_instrumentation_dir_info
 from app.core.task.dir_info import generate_tool_dir_info
 from app.core.task.image import construct_container_volumes
@@ -109,8 +112,7 @@ def run(
             not os.path.isdir(dir_result_local)
             or len(os.listdir(dir_result_local)) == 0
         ):
-            archive_name = task_identifier + ".tar.gz"
-            can_analyse_results = retrieve_results(archive_name, tool)
+            can_analyse_results = retrieve_results(task_identifier, tool)
         if can_analyse_results:
             collect_tool_result(dir_info, bug_info, tool)
     else:
@@ -134,18 +136,32 @@ def run(
                     "No task image provided, though container mode is selected"
                 )
 
-            container_id = container.create_running_container(
-                construct_container_volumes(dir_info, tool.bindings),
-                task_image,
-                task_identifier,
-                cpu,
-                gpu,
-                container_config_info,
-                dir_info["container"]["logs"],
-                dir_info["local"]["logs"],
-            )
+            with tracing.span("container-create", "container", image=task_image):
+                volume_list = construct_container_volumes(dir_info, tool.bindings)
+                sized_config_info = container_sampler.size_container(
+                    tool.name, container_config_info
+                )
+                container_id = container_pool.lease(
+                    volume_list,
+                    task_image,
+                    cpu,
+                    gpu,
+                    sized_config_info,
+                    dir_info["container"]["logs"],
+                    dir_info["local"]["logs"],
+                ) or container.create_running_container(
+                    volume_list,
+                    task_image,
+                    task_identifier,
+                    cpu,
+                    gpu,
+                    sized_config_info,
+                    dir_info["container"]["logs"],
+                    dir_info["local"]["logs"],
+                )
             if not container_id:
                 utilities.error_exit("Could not get container id!")
+            container_sampler.register(container_id, tool.name, cpu)
 
     if not values.only_setup:
         task_type = values.task_type.get()
@@ -160,17 +176,18 @@ def run(
                 task_config_info[definitions.KEY_CONFIG_TIMEOUT],
             )
 
-        execute(
-            dir_info,
-            bug_info,
-            tool,
-            task_config_info,
-            container_config_info,
-            container_id,
-            benchmark,
-            run_index,
-            hash,
-        )
+        with tracing.span("tool-run", str(task_type), tool=tool.name):
+            execute(
+                dir_info,
+                bug_info,
+                tool,
+                task_config_info,
+                container_config_info,
+                container_id,
+                benchmark,
+                run_index,
+                hash,
+            )
 
         # update container stats
         if values.use_container and not tool.locally_running:
@@ -179,13 +196,14 @@ def run(
             tool.update_container_stats(container_id)
 
         if not values.only_instrument:
-            collect_tool_result(dir_info, bug_info, tool)
-            save_artifacts(dir_info, tool)
-            dir_archive = join(values.dir_results, tool.name)
-            dir_result = dir_info["local"]["results"]
-            utilities.archive_results(dir_result, dir_archive)
-            if values.compact_results:
-                utilities.clean_artifacts(dir_result)
+            with tracing.span("artifact-copy", "io", tool=tool.name):
+                collect_tool_result(dir_info, bug_info, tool)
+                save_artifacts(dir_info, tool)
+                dir_archive = join(values.dir_results, tool.name)
+                dir_result = dir_info["local"]["results"]
+                utilities.archive_results(
+                    dir_result, dir_archive, clean=values.compact_results
+                )
 
         final_status = values.experiment_status.get(TaskStatus.NONE)
         if final_status != TaskStatus.SUCCESS and final_status != TaskStatus.TIMEOUT:
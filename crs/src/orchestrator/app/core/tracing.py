@@ -0,0 +1,273 @@
+import atexit
+import contextlib
+import json
+import os
+import threading
+import time
+import uuid
+from contextvars import ContextVar
+from typing import Any
+from typing import Dict
+from typing import IO
+from typing import Iterator
+from typing import List
+from typing import Optional
+from typing import Sequence
+
+from app.core import values
+
+# Spans of the work done for a task, linked to their parent span. The span that
+# encloses the caller is tracked in a context variable, work that continues on
+# another thread or in another subtask passes the (trace id, span id) context of
+# its parent explicitly. Finished spans are appended to values.file_trace as
+# Chrome trace events (chrome://tracing, Perfetto) and kept in memory for the
+# summary of their trace.
+
+SpanContext = Sequence[str]
+
+
+class Span:
+    __slots__ = (
+        "name",
+        "category",
+        "trace_id",
+        "span_id",
+        "parent_id",
+        "start",
+        "end",
+        "thread",
+        "status",
+        "attributes",
+    )
+
+    def __init__(
+        self,
+        name: str,
+        category: str,
+        trace_id: str,
+        parent_id: Optional[str],
+        attributes: Dict[str, Any],
+    ):
+        self.name = name
+        self.category = category
+        self.trace_id = trace_id
+        self.span_id = uuid.uuid4().hex[:16]
+        self.parent_id = parent_id
+        self.start = time.time()
+        self.end: Optional[float] = None
+        self.thread = threading.get_ident()
+        self.status = "ok"
+        self.attributes = attributes
+
+    def context(self) -> List[str]:
+        """Link to this span that survives a JSON round trip"""
+        return [self.trace_id, self.span_id]
+
+    def duration(self) -> float:
+        return (self.end or time.time()) - self.start
+
+    def to_event(self) -> Dict[str, Any]:
+        arguments = dict(self.attributes)
+        arguments.update(
+            {
+                "trace_id": self.trace_id,
+                "span_id": self.span_id,
+                "parent_id": self.parent_id,
+                "status": self.status,
+            }
+        )
+        return {
+            "name": self.name,
+            "cat": self.category,
+            "ph": "X",
+            "ts": int(self.start * 1e6),
+            "dur": int(self.duration() * 1e6),
+            "pid": os.getpid(),
+            "tid": self.thread,
+            "args": arguments,
+        }
+
+
+_current_span: ContextVar[Optional[Span]] = ContextVar("current_span", default=None)
+
+
+class _Recorder:
+    def __init__(self) -> None:
+        self.lock = threading.Lock()
+        self.trace_file: Optional[IO[str]] = None
+        self.trace_path = ""
+        self.finished: Dict[str, List[Span]] = dict()
+
+    def record(self, span: Span) -> None:
+        with self.lock:
+            self.finished.setdefault(span.trace_id, []).append(span)
+            trace_file = self.open()
+            if trace_file:
+                trace_file.write(json.dumps(span.to_event()) + ",\n")
+                trace_file.flush()
+
+    def open(self) -> Optional[IO[str]]:
+        if not values.file_trace:
+            return None
+        if self.trace_path != values.file_trace:
+            self.close()
+            try:
+                is_new = not os.path.isfile(values.file_trace)
+                self.trace_file = open(values.file_trace, "a")
+                # the JSON array format of the trace event format allows the
+                # closing bracket to be missing, so the trace stays readable
+                # when the run is killed
+                if is_new:
+                    self.trace_file.write("[\n")
+            except OSError:
+                self.trace_file = None
+            self.trace_path = values.file_trace
+        return self.trace_file
+
+    def close(self) -> None:
+        if self.trace_file:
+            self.trace_file.close()
+        self.trace_file = None
+        self.trace_path = ""
+
+    def spans(self, trace_id: str) -> List[Span]:
+        with self.lock:
+            return list(self.finished.get(trace_id, []))
+
+    def after_fork(self) -> None:
+        self.lock = threading.Lock()
+        self.trace_file = None
+        self.trace_path = ""
+        self.finished = dict()
+
+
+_recorder = _Recorder()
+os.register_at_fork(after_in_child=_recorder.after_fork)
+atexit.register(_recorder.close)
+
+
+def current_context() -> Optional[List[str]]:
+    current = _current_span.get()
+    return current.context() if current else None
+
+
+def start_span(
+    name: str,
+    category: str = "",
+    parent: Optional[SpanContext] = None,
+    **attributes: Any,
+) -> Span:
+    """Opens a span below the given parent context, or below the span of the
+    caller if there is none. Spans without any parent start a new trace."""
+    if parent:
+        trace_id, parent_id = parent[0], parent[1]
+    else:
+        current = _current_span.get()
+        if current:
+            trace_id, parent_id = current.trace_id, current.span_id
+        else:
+            trace_id, parent_id = uuid.uuid4().hex[:16], None
+    return Span(name, category, trace_id, parent_id, attributes)
+
+
+def attach(span: Span) -> Any:
+    """Makes the span the parent of the spans opened by the caller, returns the
+    token for detach"""
+    return _current_span.set(span)
+
+
+def detach(token: Any) -> None:
+    _current_span.reset(token)
+
+
+def end_span(span: Span, status: str = "ok") -> None:
+    if span.end is not None:
+        return
+    span.end = time.time()
+    span.status = status
+    if values.use_tracing:
+        _recorder.record(span)
+
+
+@contextlib.contextmanager
+def span(
+    name: str,
+    category: str = "",
+    parent: Optional[SpanContext] = None,
+    **attributes: Any,
+) -> Iterator[Span]:
+    new_span = start_span(name, category, parent, **attributes)
+    token = attach(new_span)
+    status = "ok"
+    try:
+        yield new_span
+    except BaseException:
+        status = "error"
+        raise
+    finally:
+        detach(token)
+        end_span(new_span, status)
+
+
+def _percentile(durations: List[float], fraction: float) -> float:
+    return durations[min(len(durations) - 1, int(len(durations) * fraction))]
+
+
+def summarize(trace_id: str) -> Dict[str, Any]:
+    """
+    Time spent per span name in a trace and the critical path, the chain of
+    parents of the innermost span that finished last
+    """
+    spans = _recorder.spans(trace_id)
+    if not spans:
+        return {"trace_id": trace_id, "spans": 0}
+
+    by_name: Dict[str, List[float]] = dict()
+    for finished in spans:
+        by_name.setdefault(finished.name, []).append(finished.duration())
+    start = min(finished.start for finished in spans)
+    end = max(finished.end or finished.start for finished in spans)
+    wall_time = max(end - start, 1e-9)
+
+    operations = dict()
+    for name, durations in by_name.items():
+        durations.sort()
+        operations[name] = {
+            "count": len(durations),
+            "total": round(sum(durations), 3),
+            "mean": round(sum(durations) / len(durations), 3),
+            "p95": round(_percentile(durations, 0.95), 3),
+            "max": round(durations[-1], 3),
+            "share_of_wall_time": round(sum(durations) / wall_time, 4),
+        }
+
+    by_id = {finished.span_id: finished for finished in spans}
+    parent_ids = {finished.parent_id for finished in spans}
+    leaves = [finished for finished in spans if finished.span_id not in parent_ids]
+    critical_path = []
+    last = max(leaves or spans, key=lambda finished: finished.end or finished.start)
+    node: Optional[Span] = last
+    while node is not None:
+        critical_path.append(
+            {"name": node.name, "duration": round(node.duration(), 3)}
+        )
+        node = by_id.get(node.parent_id) if node.parent_id else None
+    critical_path.reverse()
+
+    return {
+        "trace_id": trace_id,
+        "spans": len(spans),
+        "wall_time": round(wall_time, 3),
+        "operations": dict(
+            sorted(operations.items(), key=lambda item: -item[1]["total"])
+        ),
+        "critical_path": critical_path,
+    }
+
+
+def write_summary(trace_id: str, summary_path: str) -> Dict[str, Any]:
+    summary = summarize(trace_id)
+    os.makedirs(os.path.dirname(os.path.abspath(summary_path)), exist_ok=True)
+    with open(summary_path, "w") as summary_file:
+        json.dump(summary, summary_file, indent=2)
+    return summary
@@ -7,8 +7,6 @@ import signal
 import subprocess
 import sys
 from contextlib import contextmanager
-from os.path import abspath
-from os.path import dirname
 from os.path import join
 from typing import Any
 from typing import Callable
@@ -19,8 +17,10 @@ from typing import NoReturn
 from typing import Optional
 from typing import Tuple
 
+from app.core import archiver
 from app.core import emitter
 from app.core import logger
+from app.core import runner
 from app.core import values
 from app.notification import notification
 
@@ -68,36 +68,11 @@ def execute_command(
     show_output: bool = True,
     env: Dict[str, str] = dict(),
     directory: Optional[str] = None,
+    timeout: Optional[float] = None,
+    log_path: Optional[str] = None,
 ) -> int:
     # Print executed command and execute it in console
-    command = command.encode().decode("ascii", "ignore")
-    if not directory:
-        directory = os.getcwd()
-        print_command = "[{}] {}".format(directory, command)
-    else:
-        print_command = "[{}] {}".format(directory, command)
-
-    if env:
-        print_command += f""" ({' '.join(f"{k}={v}" for k, v in env.items())})"""
-
-    emitter.command(print_command)
-    command = "{{ {} ;}} 2> {}".format(command, values.file_error_log)
-    if not show_output:
-        command += " > /dev/null"
-    # print(command)
-    new_env = os.environ.copy()
-    new_env.update(env)
-    process = subprocess.Popen(
-        [command], stdout=subprocess.PIPE, shell=True, env=new_env, cwd=directory
-    )
-    (output, error) = process.communicate()
-    if output:
-        for line in output.decode("utf-8", "ignore").splitlines():
-            emitter.debug(f"[execute-command][{values.job_identifier.get('NONE')}][stdout] {line}")
-    if error:
-        emitter.error(f"[execute-command][stderr] {error.decode('utf-8','ignore')}")
-    # out is the output of the command, and err is the exit value
-    return int(process.returncode)
+    return run_command(command, show_output, env, directory, timeout, log_path)[0]
 
 
 def run_command(
@@ -105,8 +80,23 @@ def run_command(
     show_output: bool = True,
     env: Dict[str, str] = dict(),
     directory: Optional[str] = None,
+    timeout: Optional[float] = None,
+    log_path: Optional[str] = None,
 ) -> Tuple[int, Tuple[bytes, bytes]]:
     # Print executed command and execute it in console
+    result = run_command_result(command, show_output, env, directory, timeout, log_path)
+    # out is the output of the command, and err is the exit value
+    return result.return_code, (result.stdout, result.stderr)
+
+
+def run_command_result(
+    command: str,
+    show_output: bool = True,
+    env: Dict[str, str] = dict(),
+    directory: Optional[str] = None,
+    timeout: Optional[float] = None,
+    log_path: Optional[str] = None,
+) -> runner.CommandResult:
     command = command.encode().decode("ascii", "ignore")
     if not directory:
         directory = os.getcwd()
@@ -118,22 +108,25 @@ def run_command(
         print_command += f""" ({' '.join(f"{k}={v}" for k, v in env.items())})"""
 
     emitter.command(print_command)
-    command = "{{ {} ;}} 2> {}".format(command, values.file_error_log)
-    if not show_output:
-        command += " > /dev/null"
-    # print(command)
-    new_env = os.environ.copy()
-    new_env.update(env)
-    process = subprocess.Popen(
-        [command], stdout=subprocess.PIPE, shell=True, env=new_env, cwd=directory
+    result = runner.run(
+        command,
+        env=env,
+        directory=directory,
+        log_path=log_path,
+        timeout=timeout,
+        on_output=runner.debug_output() if show_output else None,
+        capture_stdout=show_output,
     )
-    (output, error) = process.communicate()
-    if output:
-        emitter.debug(output.decode("utf-8", "ignroe"))
-    if error:
-        emitter.error(error.decode("utf-8", "ignore"))
-    # out is the output of the command, and err is the exit value
-    return int(process.returncode), (output, error)
+    if result.timed_out:
+        emitter.warning(
+            f"[execute-command][{values.job_identifier.get('NONE')}] timed out after {timeout}s"
+        )
+    if result.truncated:
+        emitter.warning(
+            f"[execute-command][{values.job_identifier.get('NONE')}] output truncated, see {result.log_path}"
+        )
+    logger.debug(f"[execute-command] {result}")
+    return result
 
 
 def error_exit(*arg_list: Any) -> NoReturn:
@@ -171,23 +164,24 @@ def flat_map(f: Callable[[Any], Any], xs: List[Any]) -> Generator[Any, None, Non
 
 def clean_artifacts(output_dir: str) -> None:
     emitter.debug(f"[framework] cleaning artifacts at {output_dir}")
+    # results that are still being archived must not be removed underneath
+    archiver.result_archiver.wait(output_dir)
     if os.path.isdir(output_dir):
-        execute_command("rm -rf {}".format(output_dir))
-    execute_command("mkdir {}".format(output_dir))
-
+        shutil.rmtree(output_dir, ignore_errors=True)
+    os.makedirs(output_dir, exist_ok=True)
 
-def archive_results(dir_results: str, dir_archive: str) -> int:
-    for output_dir in [dir_results, dir_archive]:
-        if not os.path.isdir(output_dir):
-            os.makedirs(output_dir)
 
-    experiment_id = dir_results.split("/")[-1]
+def archive_results(dir_results: str, dir_archive: str, clean: bool = False) -> int:
+    """
+    Queues the results for archiving into dir_archive and returns immediately.
+    With [clean] the results directory is emptied once it is archived.
+    """
+    archiver.result_archiver.submit(dir_results, dir_archive, clean)
+    return 0
 
-    archive_command = "cd {res} ; tar czf {id}.tar.gz {id} ; mv {id}.tar.gz {arc}".format(
-        res=dirname(abspath(dir_results)), id=experiment_id, arc=dir_archive
-    )
 
-    return execute_command(archive_command)
+def wait_for_archives() -> None:
+    archiver.result_archiver.wait()
 
 
 @contextmanager
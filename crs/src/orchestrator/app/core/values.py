@@ -5,6 +5,7 @@ from contextvars import ContextVar
 from os.path import dirname
 from os.path import join
 from typing import Any
+from typing import Dict
 from typing import List
 from typing import Optional
 
@@ -13,6 +14,8 @@ from app.core.task.typing.TaskType import TaskType
 
 tool_name = "Healing Touch CRS"
 docker_host = os.getenv("DOCKER_HOST", "unix:///var/run/docker.sock")
+# Seconds during which a pulled image is not checked against the registry again
+image_pull_ttl = 600
 
 dir_main: str = dirname(dirname(dirname(os.path.realpath(__file__))))
 dir_infra = join(dir_main, "infra")
@@ -24,11 +27,13 @@ dir_benchmark: str = join(
     os.getenv("AIXCC_CRS_SCRATCH_SPACE", dir_main), "benchmark", ""
 )
 dir_log_base = join(dir_main, "logs")
+dir_command_logs = join(dir_log_base, "commands")
 dir_output_base = join(os.getenv("AIXCC_CRS_SCRATCH_SPACE", dir_main), "output")
 dir_results = join(os.getenv("AIXCC_CRS_SCRATCH_SPACE", dir_main), "results")
 dir_experiments = join(os.getenv("AIXCC_CRS_SCRATCH_SPACE", dir_main), "experiments")
 dir_logs = join(dir_output_base, "logs")
 dir_libs = join(os.getenv("AIXCC_CRS_SCRATCH_SPACE", dir_main), "libs")
+dir_build_cache = join(os.getenv("AIXCC_CRS_SCRATCH_SPACE", dir_main), "build-cache")
 dir_scripts = join(dir_main, "scripts")
 dir_artifacts = join(dir_output_base, "artifacts")
 dir_summaries = join(dir_main, "summaries")
@@ -48,8 +53,11 @@ file_last_log = dir_log_base + "/log-latest"
 file_command_log = dir_log_base + "/log-command"
 file_build_log = dir_log_base + "/log-build"
 file_stats_log = dir_log_base + "/log-stats"
+file_structured_log = ""
+file_trace = ""
 file_task_profiles = join(dir_main, "profiles", "task-default.json")
 file_container_profiles = join(dir_main, "profiles", "container-default.json")
+file_resource_profiles = join(dir_log_base, "resource-profiles.json")
 file_output_log = ""
 file_setup_log = ""
 file_instrument_log = ""
@@ -68,12 +76,48 @@ use_valkyrie = False
 use_gpu = False
 use_vthreads = False
 use_cache = False
+use_build_cache = True
+# Subject builds kept in the build cache, the least recently used are evicted
+build_cache_entries = 32
+use_tracing = True
+# Seconds between two resource samples of a running task container (0 disables
+# the sampler), samples kept per container, seconds the samples of a stopped
+# container are kept for its task and the memory reserved for a tool relative to
+# the peak memory of its earlier runs
+stats_sample_interval = 2.0
+stats_buffer_size = 1800
+stats_retention = 3600
+container_mem_headroom = 1.25
+# Idle pre-warmed containers kept per tool image and container profile (0
+# disables the pool) and the task types that lease their containers from it
+container_pool_size = 2
+container_pool_task_types = ["analyze", "localize", "validate"]
+# Idle pooled containers kept over all images and profiles, and the seconds an
+# idle container is kept before it is removed
+container_pool_limit = 8
+container_pool_idle_ttl = 600
+# Results waiting for the background archiver, archiver threads, zstd threads
+# (0 uses all cores) and the size from which archived files are deduplicated
+archive_queue_size = 8
+archive_workers = 2
+archive_threads = 0
+archive_dedup_min_size = 1024 * 1024
 rebuild_all = False
 rebuild_base = False
 ui_active = False
+# Log records waiting for the background writer, records written per batch and
+# records per second accepted for a level before the rest of the second is dropped
+log_queue_size = 100000
+log_batch_size = 512
+log_rate_limits = {"DEBUG": 2000, "COMMAND": 500, "BUILD": 2000}
+# Fraction of the records of a level that is kept, missing levels keep everything
+log_sample_rates: Dict[str, float] = dict()
 use_parallel = False
 compact_results = False
 cpus = max(1, multiprocessing.cpu_count() - 2)
+# Share of the cpus of a workflow that a tool running work in parallel may lease
+# on top of its own cpu, leased only while no other subtask waits for a cpu
+extra_cpu_share = 0.25
 gpus: int = 0
 # cpu_task = 1
 task_type: ContextVar[Optional[TaskType]] = ContextVar("task_type", default=None)
@@ -85,6 +129,8 @@ secure_hash = False
 special_meta = ""
 
 container_base_experiment = "/experiment"
+container_build_cache = "/build-cache"
+dir_cgroup = "/sys/fs/cgroup"
 
 default_valkyrie_patch_limit = 200000
 default_stack_size = 600000
@@ -10,6 +10,7 @@ from typing import List
 from typing import Optional
 
 from app.core import abstractions
+from app.core import build_cache
 from app.core import container
 from app.core import definitions
 from app.core import emitter
@@ -73,6 +74,9 @@ class AbstractBenchmark(AbstractDriver):
     key_test_timeout = definitions.KEY_TEST_TIMEOUT
     key_subject = definitions.KEY_SUBJECT
     key_language = definitions.KEY_LANGUAGE
+    key_analysis_output = definitions.KEY_ANALYSIS_OUTPUT
+    key_exploit_inputs = definitions.KEY_EXPLOIT_INPUTS
+    key_benign_inputs = definitions.KEY_BENIGN_INPUTS
     has_standard_name: bool = False
 
     def __init__(self) -> None:
@@ -80,6 +84,8 @@ class AbstractBenchmark(AbstractDriver):
         self.bench_dir_path = os.path.abspath(values.dir_benchmark)
         self.stats = BenchmarkStats()
         self.pre_built = False
+        self.build_key: Optional[str] = None
+        self.build_restored = False
 
         if not self.name:
             utilities.error_exit(
@@ -253,11 +259,11 @@ class AbstractBenchmark(AbstractDriver):
                             container_id, [stderr.decode("iso-8859-1")], log_file_path
                         )
         else:
-            command_str += "  2>&1 | tee -a {0}".format(log_file_path)
             exit_code = utilities.execute_command(
                 command_str,
                 directory=dir_path,
                 env={"EXPERIMENT_DIR": self.dir_base_expr},
+                log_path=log_file_path,
             )
         return exit_code
 
@@ -334,6 +340,12 @@ class AbstractBenchmark(AbstractDriver):
                 "mode": "rw",
             },
         }
+        if values.use_build_cache:
+            os.makedirs(values.dir_build_cache, exist_ok=True)
+            volume_list[values.dir_build_cache] = {
+                "bind": values.container_build_cache,
+                "mode": "rw",
+            }
 
         container_name = "-".join([self.name, subject_name, bug_id]).lower()
         container_id = container.get_container_id(container_name, ignore_not_found=True)
@@ -420,6 +432,95 @@ class AbstractBenchmark(AbstractDriver):
         self.emit_success("setting up completed successfully")
         return False
 
+    def get_build_key(self, bug_index: int, container_id: Optional[str]) -> str:
+        """Build cache key of a subject: the setup directory with its sources and
+        scripts, the build related meta-data and the environment it is built in"""
+        experiment_item = self.experiment_subjects[bug_index - 1]
+        build_config = {
+            key: experiment_item.get(key)
+            for key in [
+                self.key_language,
+                "build_script",
+                "build_script_internal",
+                "config_script",
+                "instrument_script",
+                "sanitizers",
+            ]
+        }
+        build_config["benchmark"] = self.name
+        build_config["use_valkyrie"] = values.use_valkyrie
+        build_config["environment"] = "local"
+        if container_id:
+            image = container.get_image(self.image_name)
+            build_config["environment"] = image.id if image else self.image_name
+        return build_cache.build_key(
+            self.__dir_info["local"]["setup"],
+            "{}/{}/{}".format(
+                self.name,
+                experiment_item[self.key_subject],
+                experiment_item[self.key_bug_id],
+            ),
+            build_config,
+            self.get_build_ignored(bug_index),
+        )
+
+    def get_build_ignored(self, bug_index: int) -> List[str]:
+        """Entries of the setup directory that are not inputs of the build: the
+        task outputs and the test inputs of the experiment"""
+        experiment_item = self.experiment_subjects[bug_index - 1]
+        ignored = list(build_cache.IGNORED_NAMES)
+        for analysis_output in experiment_item.get(self.key_analysis_output, []):
+            for input_info in analysis_output.get(
+                self.key_exploit_inputs, []
+            ) + analysis_output.get(self.key_benign_inputs, []):
+                ignored.append(os.path.normpath(str(input_info["dir"])))
+        return ignored
+
+    def restore_build(self, bug_index: int, container_id: Optional[str]) -> bool:
+        """
+        Restores the built subject into the experiment directory if a build
+        with the same inputs is cached. Returns whether it was restored.
+        """
+        self.build_key = None
+        self.build_restored = False
+        if not values.use_build_cache:
+            return False
+        self.build_key = self.get_build_key(bug_index, container_id)
+        if not build_cache.has_entry(self.build_key):
+            return False
+        build_cache.mark_used(self.build_key)
+        status = self.run_command(
+            container_id,
+            build_cache.restore_command(
+                self.build_key, self.dir_setup, join(self.dir_expr, "src"), container_id
+            ),
+            dir_path="/",
+        )
+        self.build_restored = status == 0
+        if self.build_restored:
+            self.emit_normal(
+                "restored subject build {} from cache".format(self.build_key[:16])
+            )
+        return self.build_restored
+
+    def store_build(self, bug_index: int, container_id: Optional[str]) -> None:
+        """Stores the built subject of the experiment directory in the build cache"""
+        if not self.build_key or build_cache.has_entry(self.build_key):
+            return
+        status = self.run_command(
+            container_id,
+            build_cache.store_command(
+                self.build_key,
+                join(self.dir_expr, "src"),
+                container_id,
+                self.get_build_ignored(bug_index),
+            ),
+            dir_path="/",
+        )
+        if status != 0:
+            self.emit_warning("could not store subject build in cache")
+        build_cache.evict(values.build_cache_entries)
+
     def get_exp_image(
         self,
         bug_index: int,
@@ -55,6 +55,8 @@ class DARPA(AbstractBenchmark):
         self.log_deploy_path = (
             self.dir_logs + "/" + self.name + "-" + bug_id + "-deploy.log"
         )
+        if self.restore_build(bug_index, container_id):
+            return True
         time = datetime.now()
         command_str = f"bash setup.sh"
         status = self.run_command(
@@ -77,7 +79,10 @@ class DARPA(AbstractBenchmark):
             self.dir_logs + "/" + self.name + "-" + bug_id + "-build.log"
         )
         time = datetime.now()
-        
+
+        if self.build_restored:
+            self.emit_normal("Restored from build cache. Skipping")
+            return True
         if not self.is_file(join(self.dir_setup,'.build_default'),container_id):
             command_str = "bash build.sh"
 
@@ -87,6 +92,8 @@ class DARPA(AbstractBenchmark):
             self.emit_debug(
                 "build took {} second(s)".format((datetime.now() - time).total_seconds())
             )
+            if status == 0:
+                self.store_build(bug_index, container_id)
             return status == 0
         else:
             self.emit_normal("Already built. Skipping")
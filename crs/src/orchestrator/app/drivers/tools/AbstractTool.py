@@ -1,4 +1,6 @@
 import abc
+import contextlib
+import fcntl
 import os
 import re
 import shutil
@@ -6,18 +8,23 @@ import time
 from datetime import datetime
 from os.path import join
 from typing import Any
+from typing import Callable
 from typing import Dict
+from typing import Iterator
 from typing import List
 from typing import Optional
 from typing import Sequence
+from typing import Set
 from typing import Tuple
 
 from app.core import abstractions
 from app.core import container
 from app.core import definitions
 from app.core import emitter
+from app.core import sampler
 from app.core import utilities
 from app.core import values
+from app.core.container_pool import container_pool
 from app.core.task.stats.ToolStats import ToolStats
 from app.core.task.TaskStatus import TaskStatus
 from app.core.task.typing.DirectoryInfo import DirectoryInfo
@@ -42,9 +49,16 @@ class AbstractTool(AbstractDriver):
     dir_base_expr = ""
     dir_inst = ""
     dir_setup = ""
+    # directory of the subject shared by all its tasks (the setup directory is
+    # copied for every subtask), as seen by the tool and by the framework
+    dir_aux = ""
+    dir_aux_local = ""
+    dir_logs_local = ""
 
     cpu_usage = 1
     gpu_usage = 0
+    # set by the workflow when cpus were leased on top of the first one
+    extra_cpu_release: Optional[Callable[[], None]] = None
     hash_digest = ""
     container_id: Optional[str] = None
     is_instrument_only = False
@@ -123,6 +137,8 @@ class AbstractTool(AbstractDriver):
     sudo_password: str = ""
     image_user: str = "root"
     command_history: List[Tuple[str, str, Dict[str, str]]]
+    # images and local installations already checked by ensure_tool_exists
+    verified_tools: Set[Tuple[str, ...]] = set()
 
     required_fields = ["stats", "tool_type"]
 
@@ -140,6 +156,11 @@ class AbstractTool(AbstractDriver):
         self.command_history = []
         self.portable_dirs: List[str] = []
         self.path_to_binaries: List[str] = []
+        self.refresh_settings()
+
+    def refresh_settings(self) -> None:
+        """Take over the current framework settings, used when a tool is
+        cloned from a prototype that was created earlier"""
         self.is_ui_active = values.ui_active
         self.is_only_instrument = values.only_instrument
         self.is_debug = values.debug
@@ -266,7 +287,8 @@ class AbstractTool(AbstractDriver):
     def clean_up(self) -> None:
         self.emit_debug("cleaning up")
         if self.container_id:
-            container.remove_container(self.container_id)
+            if not container_pool.owns(self.container_id):
+                container.remove_container(self.container_id)
         else:
             if os.path.isdir(self.dir_expr):
                 rm_command = "rm -rf {}".format(self.dir_expr)
@@ -389,6 +411,14 @@ class AbstractTool(AbstractDriver):
         container_stats = container.get_container_stats(container_id)
         if container_stats:
             self.stats.container_stats.load_container_stats(container_stats)
+        resource_series = sampler.container_sampler.unregister(container_id)
+        if resource_series:
+            usage_series = {
+                field: resource_series.series(field) for field in sampler.SAMPLE_FIELDS
+            }
+            self.stats.container_stats.load_resource_usage(
+                resource_series.summary(), usage_series
+            )
 
     def update_dir_info(self, dir_info: DirectoryInfo) -> None:
         if self.container_id:
@@ -396,6 +426,7 @@ class AbstractTool(AbstractDriver):
             self.dir_logs = dir_info["container"]["logs"]
             self.dir_inst = dir_info["container"]["instrumentation"]
             self.dir_setup = dir_info["container"]["setup"]
+            self.dir_aux = dir_info["container"]["aux"]
             self.dir_output = dir_info["container"]["artifacts"]
             self.dir_base_expr = values.container_base_experiment
         else:
@@ -403,6 +434,7 @@ class AbstractTool(AbstractDriver):
             self.dir_logs = dir_info["local"]["logs"]
             self.dir_inst = dir_info["local"]["instrumentation"]
             self.dir_setup = dir_info["local"]["setup"]
+            self.dir_aux = dir_info["local"]["aux"]
             self.dir_output = dir_info["local"]["artifacts"]
             # Standard depth procedure is experiment_dir/(tag)/benchmark/subject/bug_id
             self.dir_base_expr = os.path.dirname(
@@ -410,12 +442,29 @@ class AbstractTool(AbstractDriver):
                     os.path.dirname(os.path.normpath(dir_info["local"]["experiment"]))
                 )
             )
+        self.dir_aux_local = dir_info["local"]["aux"]
+        self.dir_logs_local = dir_info["local"]["logs"]
         self.dir_patch = join(
             self.dir_output, "patch-valid" if self.use_valkyrie else "patches"
         )
         self.dir_selection = join(self.dir_output, "selection")
         self.dir_localization = join(self.dir_output, "localization")
 
+    @contextlib.contextmanager
+    def aux_lock(self, name: str) -> Iterator[None]:
+        """
+        Exclusive lock on a name in the shared directory of the subject, held by
+        the framework on the host for all tasks of the subject
+        """
+        lock_path = join(self.dir_aux_local, f"{name}.lock")
+        os.makedirs(os.path.dirname(lock_path), exist_ok=True)
+        with open(lock_path, "a") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
     def timestamp_log(self) -> None:
         time_now = time.strftime("%a %d %b %Y %H:%M:%S %p")
         timestamp_txt = f"{time_now}"
@@ -440,6 +489,7 @@ class AbstractTool(AbstractDriver):
         dir_path: Optional[str] = None,
         env: Dict[str, str] = dict(),
         run_as_sudo: bool = False,
+        timeout: Optional[float] = None,
     ) -> int:
         """executes the specified command at the given dir_path and save the output to log_file without returning the result"""
         temp_env = {
@@ -462,56 +512,88 @@ class AbstractTool(AbstractDriver):
         if self.container_id:
             if not dir_path:
                 dir_path = values.container_base_experiment
-            exit_code, output = container.exec_command(
-                self.container_id, command, dir_path, temp_env
+            exit_code, _ = self.exec_in_container(
+                command, log_file_path, dir_path, temp_env, timeout
             )
-            if output:
-                stdout, stderr = output
-                if "/dev/null" not in log_file_path:
-                    if stdout:
-                        self.append_file([stdout.decode("iso-8859-1")], log_file_path)
-                    if stderr:
-                        self.append_file([stderr.decode("iso-8859-1")], log_file_path)
         else:
             if not dir_path:
                 dir_path = self.dir_expr
-            command += " 2>&1 | tee -a {0}".format(log_file_path)
-            exit_code = execute_command(command, env=temp_env, directory=dir_path)
+            exit_code = execute_command(
+                command,
+                env=temp_env,
+                directory=dir_path,
+                timeout=timeout,
+                log_path=log_file_path,
+            )
 
         self.command_history.append((dir_path, command, temp_env))
         return exit_code
 
+    def exec_in_container(
+        self,
+        command: str,
+        log_file_path: str,
+        dir_path: str,
+        env: Dict[str, str],
+        timeout: Optional[float],
+    ) -> Tuple[int, Optional[Tuple[Optional[bytes], Optional[bytes]]]]:
+        """
+        executes the command in the container of the tool, the output is streamed
+        into the log file if it is in the (mounted) log directory of the tool and
+        appended to it afterwards otherwise
+        """
+        host_log_path = None
+        if self.dir_logs_local and log_file_path.startswith(join(self.dir_logs, "")):
+            host_log_path = join(
+                self.dir_logs_local, os.path.relpath(log_file_path, self.dir_logs)
+            )
+        exit_code, output = container.exec_command(
+            self.container_id, command, dir_path, env, host_log_path, timeout
+        )
+        if output and not host_log_path and "/dev/null" not in log_file_path:
+            stdout, stderr = output
+            if stdout:
+                self.append_file([stdout.decode("iso-8859-1")], log_file_path)
+            if stderr:
+                self.append_file([stderr.decode("iso-8859-1")], log_file_path)
+        return exit_code, output
+
     def exec_command(
         self,
         command: str,
         log_file_path: str = "/dev/null",
         dir_path: Optional[str] = None,
         env: Dict[str, str] = dict(),
+        timeout: Optional[float] = None,
     ) -> Tuple[int, Optional[Tuple[Optional[bytes], Optional[bytes]]]]:
         """executes the specified command at the given dir_path and save the output to log_file"""
         if self.container_id:
             if not dir_path:
                 dir_path = values.container_base_experiment
-            exit_code, output = container.exec_command(
-                self.container_id, command, dir_path, env
+            return self.exec_in_container(
+                command, log_file_path, dir_path, env, timeout
             )
-            if output:
-                stdout, stderr = output
-                if "/dev/null" not in log_file_path:
-                    if stdout:
-                        self.append_file([stdout.decode("iso-8859-1")], log_file_path)
-                    if stderr:
-                        self.append_file([stderr.decode("iso-8859-1")], log_file_path)
-            return exit_code, output
         else:
             if not dir_path:
                 dir_path = self.dir_expr
-            command += " >> {0} 2>&1".format(log_file_path)
-            exit_code = execute_command(command, env=env, directory=dir_path)
+            exit_code = execute_command(
+                command,
+                show_output=False,
+                env=env,
+                directory=dir_path,
+                timeout=timeout,
+                log_path=log_file_path,
+            )
 
         self.command_history.append((dir_path, command, env))
         return exit_code, None
 
+    def release_extra_cpus(self) -> None:
+        """gives the cpus leased on top of the first one back to the workflow"""
+        if self.extra_cpu_release:
+            release, self.extra_cpu_release = self.extra_cpu_release, None
+            release()
+
     def process_status(self, status: int) -> None:
         """Process the status of running a command"""
         if status != 0:
@@ -528,6 +610,7 @@ class AbstractTool(AbstractDriver):
                 # Due to the container being killed, we restart it to be able to pull out the analysis info
                 container.stop_container(self.container_id, 5)
                 container.start_container(self.container_id)
+                container_pool.restore(self.container_id)
 
         else:
             values.experiment_status.set(TaskStatus.SUCCESS)
@@ -541,8 +624,25 @@ class AbstractTool(AbstractDriver):
         return
 
     def ensure_tool_exists(self, tag_name_default: str = "latest") -> None:
-        """Check that the tool is available either as an image or locally"""
+        """Check that the tool is available either as an image or locally.
+        The outcome is remembered for the lifetime of the process, so that
+        spawning more instances of a tool does not query the Docker daemon"""
+        if values.use_container and not self.locally_running:
+            verification_key: Tuple[str, ...] = (
+                "image",
+                str(self.image_name),
+                self.hash_digest.replace("sha256:", "", 1),
+                str(values.secure_hash),
+                str(values.use_latest_image),
+            )
+        else:
+            verification_key = ("local", self.name)
+        if verification_key in AbstractTool.verified_tools:
+            return
+        self.check_tool_exists(tag_name_default)
+        AbstractTool.verified_tools.add(verification_key)
 
+    def check_tool_exists(self, tag_name_default: str = "latest") -> None:
         def get_digest(image: Any) -> str:
             return "".join(
                 next(iter(image.attrs.get("RepoDigests", [])), "@").split("@")[1:]
@@ -663,7 +763,7 @@ class AbstractTool(AbstractDriver):
 
     def post_process(self) -> None:
         """Any post-processing required for the tool"""
-        if self.container_id:
+        if self.container_id and not container_pool.release(self.container_id):
             container.stop_container(self.container_id)
         if values.use_purge:
             self.clean_up()
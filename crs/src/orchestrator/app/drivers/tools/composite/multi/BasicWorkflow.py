@@ -14,6 +14,7 @@ from multiprocessing.synchronize import Lock as LockType
 from os.path import basename
 from os.path import dirname
 from os.path import join
+from queue import Empty
 from queue import Queue
 from queue import PriorityQueue
 from typing import Any
@@ -36,11 +37,13 @@ from watchdog.observers.polling import PollingObserver as Observer
 from app.core import configuration
 from app.core import definitions
 from app.core import reader
+from app.core import tracing
 from app.core import values
 from app.core import writer
 from app.core.identifiers import create_task_identifier
 from app.core.identifiers import create_task_image_identifier
 from app.core.metadata.MetadataValidationSchemas import general_section_schema
+from app.core.sampler import container_sampler
 from app.core.task import task
 from app.core.task.dir_info import generate_tool_dir_info
 from app.core.task.image import prepare_experiment_image
@@ -88,6 +91,10 @@ class BasicWorkflow(AbstractCompositeTool):
             "quit_delayed"  # Message for a termination that will happen after a delay
         )
         self.patch_validation_map = {}
+        # patches already submitted while their validation was streamed
+        self.streamed_patches: Set[str] = set()
+        # output directories of the subtasks whose tool has exited
+        self.finished_output_dirs: Set[str] = set()
         self.repair_retry_map = {}
         self.vulnerability_validation_map = {}
         self.execution_counters: Dict[CompositeTaskType, int] = {}
@@ -146,6 +153,9 @@ class BasicWorkflow(AbstractCompositeTool):
             initargs=(global_job_lock,),
         )
 
+        # followers of the verdict streams of running validations
+        self.validation_stream_pool = ThreadPool(processes=max(1, cpu_count // 8))
+
         composite_sequence: CompositeSequence = cast(
             CompositeSequence, task_config_info[self.key_composite_sequence]
         )
@@ -356,6 +366,9 @@ class BasicWorkflow(AbstractCompositeTool):
         )
         # start running
         self.timestamp_log_start()
+        self.trace_root = tracing.start_span(
+            "workflow", "composite", run=run_index, bug=bug_info.get(self.key_bug_id)
+        )
 
         if not self.do_step(
             bug_info,
@@ -374,6 +387,7 @@ class BasicWorkflow(AbstractCompositeTool):
                 "iterative-repair",
             ],
             [],
+            self.trace_root.context(),
         ):
             self.observer.stop()  # type:ignore
             for _ in range(self.file_processor_count):
@@ -383,12 +397,41 @@ class BasicWorkflow(AbstractCompositeTool):
         watcher_handle.wait()
         self.file_pool.terminate()
         self.processed_file_pool.terminate()
+        self.validation_stream_pool.terminate()
         for x in self.task_pools.values():
             x.terminate()
         self.emit_highlight("Terminated")
         self.timestamp_log_end()
+        tracing.end_span(self.trace_root)
+        self.report_trace(dir_info["local"]["artifacts"])
         self.emit_highlight("log file: {0}".format(self.log_output_path))
 
+    def report_trace(self, dir_artifacts: str) -> None:
+        summary = tracing.write_summary(
+            self.trace_root.trace_id, join(dir_artifacts, "trace-summary.json")
+        )
+        self.emit_highlight(
+            "[TRACE] {} spans over {} seconds".format(
+                summary["spans"], summary.get("wall_time", 0)
+            )
+        )
+        for name, operation in list(summary.get("operations", {}).items())[:10]:
+            self.emit_highlight(
+                "[TRACE] {}: {} x, {} seconds total, {} seconds p95".format(
+                    name, operation["count"], operation["total"], operation["p95"]
+                )
+            )
+        critical_path = summary.get("critical_path", [])
+        if critical_path:
+            self.emit_highlight(
+                "[TRACE] critical path: {}".format(
+                    " -> ".join(
+                        "{} ({}s)".format(step["name"], step["duration"])
+                        for step in critical_path
+                    )
+                )
+            )
+
     def get_cpu(self, task_type, task_name):
         task_priority = self.tool_priority[task_type]
         with self.request_queue_lock:
@@ -403,10 +446,48 @@ class BasicWorkflow(AbstractCompositeTool):
             top_task_name = self.cpu_request_queue.queue[0][1]
 
         avail_cpu = self.cpu_queue.get()
-        self.emit_normal(f"task {task_name} acquired cpu with priority {task_priority}")
+        # among the free cpus prefer the one least used by the containers that
+        # are still pinned to it, e.g. the fuzzers
+        cpu_load = container_sampler.cpu_load()
+        if cpu_load:
+            free_cpus = [avail_cpu]
+            while True:
+                try:
+                    free_cpus.append(self.cpu_queue.get_nowait())
+                except Empty:
+                    break
+            avail_cpu = min(free_cpus, key=lambda cpu: cpu_load.get(cpu, 0.0))
+            for cpu in free_cpus:
+                if cpu != avail_cpu:
+                    self.cpu_queue.put(cpu)
+        self.emit_normal(
+            f"task {task_name} acquired cpu {avail_cpu} with priority {task_priority}"
+        )
         self.cpu_request_queue.queue.remove((task_priority, task_name))
         return avail_cpu
 
+    def get_extra_cpus(self, count, task_name):
+        """
+        lease up to count more cpus that are free right now, without waiting,
+        bounded by values.extra_cpu_share of the cpus and only if no other
+        subtask is waiting for a cpu
+        """
+        extra_cpus: List[str] = []
+        with self.request_queue_lock:
+            if not self.cpu_request_queue.empty():
+                return extra_cpus
+        count = min(count, int(values.extra_cpu_share * self.cpu_count))
+        while len(extra_cpus) < count:
+            try:
+                extra_cpus.append(self.cpu_queue.get_nowait())
+            except Empty:
+                break
+        if extra_cpus:
+            self.emit_normal(
+                f"task {task_name} acquired additional cpus {','.join(extra_cpus)}"
+            )
+        return extra_cpus
+
     def release_cpu(self, cpu_id, task_name):
         self.emit_normal(f"task {task_name} releases cpu")
         self.cpu_queue.put(cpu_id)
@@ -426,6 +507,7 @@ class BasicWorkflow(AbstractCompositeTool):
         path: List[
             str
         ],  # List of previously executed tools that were used to reach this point
+        trace_parent: Optional[List[str]] = None,  # Span of the step leading here
     ) -> str:
         """
         Common entry point for a subtask, we take the original task tag to not create new images.
@@ -459,7 +541,21 @@ class BasicWorkflow(AbstractCompositeTool):
             # self.emit_debug(f"Active jobs: {self.active_jobs}")
 
         cpu = None
+        extra_cpus: List[str] = []
+        extra_cpus_lock = Lock()
+
+        def release_extra_cpus() -> None:
+            with extra_cpus_lock:
+                released = list(extra_cpus)
+                extra_cpus.clear()
+            for extra_cpu in released:
+                self.release_cpu(extra_cpu, f"{tool.name}-{tool.tool_tag}")
+
         key = None
+        subtask_span = tracing.start_span(
+            str(task_type), "subtask", trace_parent, tool=tool.name, tag=tool.tool_tag
+        )
+        trace_token = tracing.attach(subtask_span)
         try:
             values.task_type.set(task_type)
             values.current_task_profile_id.set(task_config_info["id"])
@@ -470,8 +566,14 @@ class BasicWorkflow(AbstractCompositeTool):
                 benchmark, tool, bug_info, image_tag
             )
 
-            # TODO track multiple cpus
-            cpu = self.get_cpu(task_type, f"{image_name}-{tool_tag}")
+            with tracing.span("queued-for-cpu", "scheduler"):
+                cpu = self.get_cpu(task_type, f"{image_name}-{tool_tag}")
+                # tools that run work in parallel get the cpus that are idle
+                extra_cpus.extend(
+                    self.get_extra_cpus(tool.cpu_usage - 1, f"{image_name}-{tool_tag}")
+                )
+            # the tool gives them back as soon as its parallel phase is over
+            tool.extra_cpu_release = release_extra_cpus
 
             dir_setup_extended = (
                 join(
@@ -512,24 +614,25 @@ class BasicWorkflow(AbstractCompositeTool):
             # self.emit_debug(f"Dir info is {dir_info}")
             benchmark.update_dir_info(dir_info, tool.locally_running)
 
-            experiment_image_id = prepare_experiment_image(
-                benchmark,
-                bug_info,
-                task_config_info[self.key_cpus],
-                [],
-                tool_tag,
-                locally_running=tool.locally_running,
-            )
+            with tracing.span("image-prepare", "image"):
+                experiment_image_id = prepare_experiment_image(
+                    benchmark,
+                    bug_info,
+                    task_config_info[self.key_cpus],
+                    [],
+                    tool_tag,
+                    locally_running=tool.locally_running,
+                )
 
-            experiment_image_tool_id = prepare_experiment_tool(
-                experiment_image_id,
-                tool,
-                task_config_info,
-                dir_info,
-                image_name,
-                bug_info,
-                tool_tag,
-            )
+                experiment_image_tool_id = prepare_experiment_tool(
+                    experiment_image_id,
+                    tool,
+                    task_config_info,
+                    dir_info,
+                    image_name,
+                    bug_info,
+                    tool_tag,
+                )
 
             bug_info["image_id"] = experiment_image_tool_id or bug_info["base_image"]
 
@@ -549,6 +652,7 @@ class BasicWorkflow(AbstractCompositeTool):
                             "task_config_info": task_config_info,
                             "bug_info": bug_info,
                             "path": path + [tool_tag],
+                            "trace_span": subtask_span.context(),
                         }
                     )
                 )
@@ -562,7 +666,7 @@ class BasicWorkflow(AbstractCompositeTool):
                 task_config_info,
                 container_config_info,
                 key,
-                [cpu],
+                [cpu] + extra_cpus,
                 task_config_info[self.key_gpus],
                 run_index,
                 image_name,
@@ -574,6 +678,7 @@ class BasicWorkflow(AbstractCompositeTool):
             if err:
                 self.stats.error_stats.is_error = True
         except Exception as e:
+            subtask_span.status = "error"
             tb = traceback.format_exc()
             self.emit_error(e)
             self.emit_error(tb)
@@ -595,8 +700,14 @@ class BasicWorkflow(AbstractCompositeTool):
                 + [tool.stats]
             )
 
+            for host_dir in new_mappings:
+                self.finished_output_dirs.add(os.path.normpath(host_dir))
             if cpu is not None:
                 self.release_cpu(cpu, f"{image_name}-{tool_tag}")
+            release_extra_cpus()
+            tracing.detach(trace_token)
+            subtask_span.attributes["task_status"] = str(status)
+            tracing.end_span(subtask_span, subtask_span.status)
 
         with active_jobs_lock:
             self.active_jobs -= 1
@@ -605,6 +716,21 @@ class BasicWorkflow(AbstractCompositeTool):
                 self.message_queue.put(self.exit_message_delayed)
         return list(new_mappings.keys())[0]
 
+    def trace_parent_of(self, path: str) -> Optional[List[str]]:
+        """Span of the subtask whose artifacts hold the path, the workflow span
+        if there is none"""
+        directory = path
+        while directory.startswith(self.root_artifact_dir):
+            internal_data = reader.read_json(
+                join(directory, definitions.INTERNAL_METADATA_JSON)
+            )
+            if internal_data and internal_data.get("trace_span"):
+                return cast(List[str], internal_data["trace_span"])
+            if directory == self.root_artifact_dir:
+                break
+            directory = dirname(directory)
+        return self.trace_root.context()
+
     def track_test_count(
         self,
         dir_info: DirectoryInfo,
@@ -744,6 +870,16 @@ class BasicWorkflow(AbstractCompositeTool):
                     self.emit_highlight("{} update".format(type))
                     handler(event)
                     break
+        elif basename(
+            event.src_path
+        ) == definitions.VALIDATION_STREAM_JSONL and event.src_path.startswith(
+            self.validate_root
+        ):
+            self.validation_stream_pool.apply_async(
+                self.on_validation_stream,
+                [event],
+                error_callback=self.error_callback_handler,
+            )
         else:
             if event.src_path.startswith(self.fuzz_root):
                 # self.emit_highlight("Fuzz Update")
@@ -797,32 +933,33 @@ class BasicWorkflow(AbstractCompositeTool):
             # self.emit_debug(f"Setup dir is {base_setup}")
             # self.emit_debug(f"New setup dir is {enhanced_setup}")
 
-            try:
-                shutil.copytree(base_setup, enhanced_setup, dirs_exist_ok=True)
-            except Exception as e:
-                self.emit_warning(e)
-                traceback.print_exc()
-
-            os.makedirs(join(enhanced_setup, "benign_tests"), exist_ok=True)
-            os.makedirs(join(enhanced_setup, "crashing_tests"), exist_ok=True)
-
-            self.copy_tests(
-                crash_dir,
-                enhanced_setup,
-                "crashing_tests",
-                self.task_config_info.get(
-                    definitions.KEY_CONFIG_FAILING_TEST_COUNT, -1
-                ),
-            )
+            with tracing.span("setup-copy", "io", self.trace_parent_of(base_dir)):
+                try:
+                    shutil.copytree(base_setup, enhanced_setup, dirs_exist_ok=True)
+                except Exception as e:
+                    self.emit_warning(e)
+                    traceback.print_exc()
 
-            self.copy_tests(
-                benign_dir,
-                enhanced_setup,
-                "benign_tests",
-                self.task_config_info.get(
-                    definitions.KEY_CONFIG_PASSING_TEST_COUNT, -1
-                ),
-            )
+                os.makedirs(join(enhanced_setup, "benign_tests"), exist_ok=True)
+                os.makedirs(join(enhanced_setup, "crashing_tests"), exist_ok=True)
+
+                self.copy_tests(
+                    crash_dir,
+                    enhanced_setup,
+                    "crashing_tests",
+                    self.task_config_info.get(
+                        definitions.KEY_CONFIG_FAILING_TEST_COUNT, -1
+                    ),
+                )
+
+                self.copy_tests(
+                    benign_dir,
+                    enhanced_setup,
+                    "benign_tests",
+                    self.task_config_info.get(
+                        definitions.KEY_CONFIG_PASSING_TEST_COUNT, -1
+                    ),
+                )
 
             self.emit_debug(
                 f"Looking for! {join(base_dir,definitions.INTERNAL_METADATA_JSON)}"
@@ -874,6 +1011,7 @@ class BasicWorkflow(AbstractCompositeTool):
                     subtask_tag,
                     ["crash-analyze", "localize", "repair"],
                     internal_data["path"],
+                    internal_data.get("trace_span"),
                 )
 
         except Exception as e:
@@ -909,24 +1047,26 @@ class BasicWorkflow(AbstractCompositeTool):
             )
             # self.emit_debug(f"New setup dir is {enhanced_setup}")
 
-            try:
-                shutil.copytree(base_setup, enhanced_setup, dirs_exist_ok=True)
-            except Exception as e:
-                self.emit_warning(e)
-                traceback.print_exc()
-
-            os.makedirs(join(enhanced_setup, "benign_tests"), exist_ok=True)
-            os.makedirs(join(enhanced_setup, "crashing_tests"), exist_ok=True)
-
-            shutil.copy(event.src_path, join(enhanced_setup, "crashing_tests", ""))
-            self.copy_tests(
-                benign_dir,
-                enhanced_setup,
-                "benign_tests",
-                self.task_config_info.get(
-                    definitions.KEY_CONFIG_PASSING_TEST_COUNT, -1
-                ),
-            )
+            trace_parent = self.trace_parent_of(crash_dir)
+            with tracing.span("setup-copy", "io", trace_parent):
+                try:
+                    shutil.copytree(base_setup, enhanced_setup, dirs_exist_ok=True)
+                except Exception as e:
+                    self.emit_warning(e)
+                    traceback.print_exc()
+
+                os.makedirs(join(enhanced_setup, "benign_tests"), exist_ok=True)
+                os.makedirs(join(enhanced_setup, "crashing_tests"), exist_ok=True)
+
+                shutil.copy(event.src_path, join(enhanced_setup, "crashing_tests", ""))
+                self.copy_tests(
+                    benign_dir,
+                    enhanced_setup,
+                    "benign_tests",
+                    self.task_config_info.get(
+                        definitions.KEY_CONFIG_PASSING_TEST_COUNT, -1
+                    ),
+                )
 
             new_bug_info = deepcopy(self.bug_info)
 
@@ -956,6 +1096,7 @@ class BasicWorkflow(AbstractCompositeTool):
                 subtask_tag,
                 ["crash-analyze", "localize", "repair"],
                 [],
+                trace_parent,
             )
         except Exception as e:
             self.emit_warning(e)
@@ -1034,34 +1175,35 @@ class BasicWorkflow(AbstractCompositeTool):
             # self.emit_debug(f"Setup dir is {base_setup}")
             # self.emit_debug(f"New setup dir is {enhanced_setup}")
 
-            try:
-                shutil.copytree(
-                    base_setup,
+            with tracing.span("setup-copy", "io", internal_data.get("trace_span")):
+                try:
+                    shutil.copytree(
+                        base_setup,
+                        enhanced_setup,
+                        dirs_exist_ok=True,  # Unsafe - , ignore=shutil.ignore_patterns("core.[0-9]*")
+                    )
+                except Exception as e:
+                    self.emit_error(f"exception while copying: {e}")
+
+                os.makedirs(join(enhanced_setup, "benign_tests"), exist_ok=True)
+                os.makedirs(join(enhanced_setup, "crashing_tests"), exist_ok=True)
+
+                self.copy_tests(
+                    crash_dir,
                     enhanced_setup,
-                    dirs_exist_ok=True,  # Unsafe - , ignore=shutil.ignore_patterns("core.[0-9]*")
+                    "crashing_tests",
+                    self.task_config_info.get(
+                        definitions.KEY_CONFIG_FAILING_TEST_COUNT, -1
+                    ),
+                )
+                self.copy_tests(
+                    benign_dir,
+                    enhanced_setup,
+                    "benign_tests",
+                    self.task_config_info.get(
+                        definitions.KEY_CONFIG_PASSING_TEST_COUNT, -1
+                    ),
                 )
-            except Exception as e:
-                self.emit_error(f"exception while copying: {e}")
-
-            os.makedirs(join(enhanced_setup, "benign_tests"), exist_ok=True)
-            os.makedirs(join(enhanced_setup, "crashing_tests"), exist_ok=True)
-
-            self.copy_tests(
-                crash_dir,
-                enhanced_setup,
-                "crashing_tests",
-                self.task_config_info.get(
-                    definitions.KEY_CONFIG_FAILING_TEST_COUNT, -1
-                ),
-            )
-            self.copy_tests(
-                benign_dir,
-                enhanced_setup,
-                "benign_tests",
-                self.task_config_info.get(
-                    definitions.KEY_CONFIG_PASSING_TEST_COUNT, -1
-                ),
-            )
 
             writer.write_as_json(
                 new_bug_info,
@@ -1077,6 +1219,7 @@ class BasicWorkflow(AbstractCompositeTool):
                 subtask_tag,
                 ["bisect", "localize", "repair"],
                 internal_data["path"],
+                internal_data.get("trace_span"),
             )
         except Exception as e:
             self.emit_warning(e)
@@ -1117,66 +1260,67 @@ class BasicWorkflow(AbstractCompositeTool):
     patch_validation_map: Dict[str, Tuple[LockType, bool]]
     vulnerability_validation_map: Dict[str, Tuple[LockType, bool]]
 
-    def on_validation_finished(self, event: FileSystemEvent) -> None:
-        def check(patch_path: str, vulnerability_id: str) -> Tuple[bool, str]:
-
-            base64_input = ""
-            with open(patch_path, "rb") as f:
-                base64_input = base64.encodebytes(f.read())
-            patch_input = {
-                "cpv_uuid": vulnerability_id,
-                "data": base64_input.decode("ascii").strip(),
-            }
-            with open(patch_path, "r") as f:
-                patch = f.read()
-                self.emit_debug(f"[STEP] Patch for {vulnerability_id} is:\n{patch}")
-            self.emit_debug(
-                f"[STEP] Sending input {patch_input} for {vulnerability_id}"
-            )
+    def submit_to_api(
+        self, patch_path: str, vulnerability_id: str
+    ) -> Tuple[bool, Optional[str]]:
+        base64_input = ""
+        with open(patch_path, "rb") as f:
+            base64_input = base64.encodebytes(f.read())
+        patch_input = {
+            "cpv_uuid": vulnerability_id,
+            "data": base64_input.decode("ascii").strip(),
+        }
+        with open(patch_path, "r") as f:
+            patch = f.read()
+            self.emit_debug(f"[STEP] Patch for {vulnerability_id} is:\n{patch}")
+        self.emit_debug(
+            f"[STEP] Sending input {patch_input} for {vulnerability_id}"
+        )
 
-            if os.getenv("AIXCC_API_HOSTNAME") or os.getenv("HEALING_TOUCH_IAPI"):
-                # with self.patch_validation_map[vulnerability_id]:
-                gp_uuid_received = False
-                gp_uuid = None
-                while not gp_uuid_received:
-                    (success, patch_response) = self.try_call(
-                        "submission/gp/", patch_input
-                    )
-                    if not success:
-                        continue
+        if os.getenv("AIXCC_API_HOSTNAME") or os.getenv("HEALING_TOUCH_IAPI"):
+            # with self.patch_validation_map[vulnerability_id]:
+            gp_uuid_received = False
+            gp_uuid = None
+            while not gp_uuid_received:
+                (success, patch_response) = self.try_call(
+                    "submission/gp/", patch_input
+                )
+                if not success:
+                    continue
 
-                    if patch_response["status"] == "rejected":
-                        self.emit_highlight(f"Patch rejected")
-                        return (False, None)
+                if patch_response["status"] == "rejected":
+                    self.emit_highlight(f"Patch rejected")
+                    return (False, None)
 
-                    gp_uuid = str(patch_response["gp_uuid"])
-                    gp_uuid_received = True
+                gp_uuid = str(patch_response["gp_uuid"])
+                gp_uuid_received = True
 
-                gp_validated = False
-                while not gp_validated:
-                    (success, patch_decision) = self.try_call(
-                        f"submission/gp/{gp_uuid}", {}, "get"
-                    )
-                    if not success:
-                        time.sleep(0.5)
-                        continue
+            gp_validated = False
+            while not gp_validated:
+                (success, patch_decision) = self.try_call(
+                    f"submission/gp/{gp_uuid}", {}, "get"
+                )
+                if not success:
+                    time.sleep(0.5)
+                    continue
 
-                    if patch_decision["status"] == "pending":
-                        time.sleep(5)
-                        continue
-                    if patch_decision["status"] == "rejected":
-                        return (False, None)
+                if patch_decision["status"] == "pending":
+                    time.sleep(5)
+                    continue
+                if patch_decision["status"] == "rejected":
+                    return (False, None)
 
-                    if patch_decision["status"] == "accepted":
-                        return (True, gp_uuid)
+                if patch_decision["status"] == "accepted":
+                    return (True, gp_uuid)
 
-                    self.emit_highlight(f"Got data {patch_decision}")
-                    return (False, None)
-            else:
-                import uuid
+                self.emit_highlight(f"Got data {patch_decision}")
+                return (False, None)
+        else:
+            import uuid
 
-                return (True, str(uuid.uuid4()))
+            return (True, str(uuid.uuid4()))
 
+    def on_validation_finished(self, event: FileSystemEvent) -> None:
         self.emit_highlight("Validation finished")
 
         internal_data = self.read_json(
@@ -1203,9 +1347,19 @@ class BasicWorkflow(AbstractCompositeTool):
             generator = p_obj.get("generator")
         retry_id = (vulnerability_id, generator)
         plausible_patches = []
+        streamed_patches = []
         for patch_name, patch_class in patch_info:
             if patch_class.startswith("pass"):
-                plausible_patches.append(join(patch_dir, *patch_name.split(":")))
+                patch_path = join(patch_dir, *patch_name.split(":"))
+                if patch_path in self.streamed_patches:
+                    streamed_patches.append(patch_path)
+                else:
+                    plausible_patches.append(patch_path)
+
+        if len(plausible_patches) < 1 and streamed_patches:
+            self.emit_warning("Plausible patches were already submitted when streamed")
+            self.clear_storage(internal_data, dir_info, bug_info)
+            return
 
         if len(plausible_patches) < 1:
             with self.repair_retry_map_lock:
@@ -1235,18 +1389,36 @@ class BasicWorkflow(AbstractCompositeTool):
                 self.clear_storage(internal_data, dir_info, bug_info)
                 return
 
-        patch_path = plausible_patches[-1]
+        self.submit_patch(internal_data, plausible_patches[-1])
+
+    def submit_patch(
+        self, internal_data: Dict[str, Any], patch_path: str, clear: bool = True
+    ) -> bool:
+        """
+        Submits a plausible patch unless a patch was already accepted for the
+        vulnerability, True if one was
+        """
+        dir_info = internal_data["dir_info"]
+        bug_info = internal_data["bug_info"]
+        vulnerability_id = bug_info.get("cpv_uuid", "")
         with self.patch_validation_map_lock:
             if vulnerability_id not in self.patch_validation_map:
                 self.patch_validation_map[vulnerability_id] = (Lock(), False)
 
+        with self.patch_validation_map[vulnerability_id][0]:
+            # a streamed verdict may have been submitted while waiting
             if self.patch_validation_map[vulnerability_id][1]:
                 self.emit_warning(f"Already submitted a patch for {vulnerability_id}")
-                self.clear_storage(internal_data, dir_info, bug_info)
-                return
+                if clear:
+                    self.clear_storage(internal_data, dir_info, bug_info)
+                return True
 
-        with self.patch_validation_map[vulnerability_id][0]:
-            successful, identifier = check(patch_path, vulnerability_id)
+            with tracing.span(
+                "submission", "api", internal_data.get("trace_span"), kind="patch"
+            ):
+                successful, identifier = self.submit_to_api(
+                    patch_path, vulnerability_id
+                )
             if successful:
                 with self.patch_validation_map_lock:
                     self.patch_validation_map[vulnerability_id] = (
@@ -1258,7 +1430,64 @@ class BasicWorkflow(AbstractCompositeTool):
                 self.emit_warning(
                     "Vulnerability submission was not successful. Please check why"
                 )
-            self.clear_storage(internal_data, dir_info, bug_info)
+            if clear:
+                self.clear_storage(internal_data, dir_info, bug_info)
+        return successful
+
+    def on_validation_stream(self, event: FileSystemEvent) -> None:
+        """
+        Follows the verdicts Valkyrie appends while it validates and submits the
+        first plausible patch, instead of waiting for the whole batch; the final
+        meta-data.json is handled by on_validation_finished as before. Stops when
+        the validation subtask has exited or its timeout has passed.
+        """
+        dir_output = dirname(event.src_path)
+        internal_data = self.read_json(
+            join(dir_output, definitions.INTERNAL_METADATA_JSON)
+        )
+        if not internal_data:
+            return
+        patch_dir = internal_data["dir_info"]["local"]["patches"]
+        task_config = internal_data["task_config_info"]
+        timeout_h = float(
+            task_config.get(
+                definitions.KEY_CONFIG_VALIDATE_TIMEOUT,
+                task_config.get(self.key_timeout, 1),
+            )
+        )
+        deadline = time.time() + 60 * 60 * timeout_h
+        offset = 0
+        while True:
+            if not os.path.isfile(event.src_path):
+                return
+            # read once more after the subtask exited, for its last verdicts
+            finished = os.path.normpath(dir_output) in self.finished_output_dirs
+            if os.path.getsize(event.src_path) < offset:
+                # restarted validation
+                offset = 0
+            with open(event.src_path, "rb") as stream_file:
+                stream_file.seek(offset)
+                line_list = stream_file.readlines()
+            for line in line_list:
+                if not line.endswith(b"\n"):
+                    break
+                offset += len(line)
+                entry = json.loads(line)
+                if entry.get("done"):
+                    return
+                if str(entry.get("class", "")).startswith("pass"):
+                    patch_name = str(entry["patch"])
+                    patch_path = join(patch_dir, *patch_name.split(":"))
+                    self.emit_highlight(f"Streamed plausible patch {patch_name}")
+                    # recorded first so that the final verdicts skip it
+                    self.streamed_patches.add(patch_path)
+                    self.submit_patch(internal_data, patch_path, False)
+                    return
+            if finished or time.time() > deadline:
+                return
+            if not line_list and self.is_file(join(dir_output, "meta-data.json")):
+                return
+            time.sleep(1)
 
     def clear_storage(self, internal_data, dir_info, bug_info):
         if values.use_purge:
@@ -1409,9 +1638,15 @@ class BasicWorkflow(AbstractCompositeTool):
                 return
 
         with self.vulnerability_validation_map[failure_signature][0]:
-            found_new_vulnerability, identifier = check(
-                failing_test, sanitizer, bug_info["name"], harness, commit
-            )
+            with tracing.span(
+                "submission",
+                "api",
+                internal_data.get("trace_span"),
+                kind="vulnerability",
+            ):
+                found_new_vulnerability, identifier = check(
+                    failing_test, sanitizer, bug_info["name"], harness, commit
+                )
             if found_new_vulnerability:
                 with self.vulnerability_validation_map_lock:
                     self.vulnerability_validation_map[failure_signature] = (
@@ -1526,11 +1761,12 @@ class BasicWorkflow(AbstractCompositeTool):
             # self.emit_debug(f"Setup dir is {base_setup}")
             # self.emit_debug(f"New setup dir is {enhanced_setup}")
 
-            try:
-                shutil.copytree(base_setup, enhanced_setup, dirs_exist_ok=True)
-            except Exception as e:
-                self.emit_warning(e)
-                traceback.print_exc()
+            with tracing.span("setup-copy", "io", self.trace_parent_of(root_folder)):
+                try:
+                    shutil.copytree(base_setup, enhanced_setup, dirs_exist_ok=True)
+                except Exception as e:
+                    self.emit_warning(e)
+                    traceback.print_exc()
 
             bug_info_extension = reader.read_json(event.src_path)
             if bug_info_extension is None:
@@ -1572,6 +1808,7 @@ class BasicWorkflow(AbstractCompositeTool):
                 subtask_tag,
                 next_task_options,
                 internal_data["path"],
+                internal_data.get("trace_span"),
             )
 
         except Exception as e:
@@ -1641,6 +1878,7 @@ class BasicWorkflow(AbstractCompositeTool):
         subtask_tag: Optional[str],
         next_task_options: List[CompositeTaskType],
         path: Optional[List[str]] = None,
+        trace_parent: Optional[List[str]] = None,
     ) -> bool:
         """
         Start subsequent tasks in the workflow.
@@ -1689,6 +1927,7 @@ class BasicWorkflow(AbstractCompositeTool):
                                 task_type=type,
                             ),
                             path or list(),
+                            trace_parent,
                         ],
                         callback=callbacks.get(next_task, None),
                         error_callback=self.error_callback_handler,
@@ -1,5 +1,6 @@
 from queue import Queue
 from typing import Union
+from app.core import definitions
 from app.core import emitter
 import time
 from watchdog.events import FileSystemEvent
@@ -21,7 +22,9 @@ class FileCreationHandler(FileSystemEventHandler):
             self.last_check = time.time()
 
         if not (
-            "crashes" in event.src_path or event.src_path.endswith("meta-data.json")
+            "crashes" in event.src_path
+            or event.src_path.endswith("meta-data.json")
+            or event.src_path.endswith(definitions.VALIDATION_STREAM_JSONL)
         ):
             # Short circuit to skip crashes
             return
@@ -5,12 +5,23 @@ from typing import Any
 from typing import Dict
 from typing import List
 
+from app.core import values
 from app.core.task.stats.FuzzToolStats import FuzzToolStats
 from app.core.task.typing.DirectoryInfo import DirectoryInfo
 from app.drivers.tools.fuzz.AbstractFuzzTool import AbstractFuzzTool
 
 
 class AbstractAFL(AbstractFuzzTool):
+    # seconds between two exports of new queue and crash entries
+    export_interval = 10
+    # cpus requested for a campaign (the workflow leases those that are idle when
+    # no other subtask waits, up to values.extra_cpu_share of its cpus) and upper
+    # bound of its instances, AFL++ binds every instance to a core
+    cpu_usage = 8
+    max_instances = 64
+    # share of the timeout kept for the minimization of the exported tests
+    minimize_budget_ratio = 0.1
+
     def __init__(self) -> None:
         super().__init__(self.name)
 
@@ -71,51 +82,63 @@ class AbstractAFL(AbstractFuzzTool):
             )
         self.clean_subject(bug_info)
         self.prepare_for_fuzz(bug_info)
-        self.timestamp_log_start()
-        fuzz_command = "bash -c 'stty cols 100 && stty rows 100 && timeout -k 5m {timeout}m afl-fuzz -i {input_folder} -o {output_folder} -d -m none {dict} {additional_params} -- {binary} {binary_input}'".format(
-            timeout=timeout,
-            additional_params=additional_params,
-            input_folder=initial_corpus,
-            output_folder=self.dir_output,
-            dict=dictionary,
-            binary=join(self.dir_expr, "src", bug_info[self.key_bin_path]),
-            binary_input=bug_info[self.key_crash_cmd].replace("$POC", "@@"),
-        )
-        self.emit_normal(f"executing fuzz command with {self.name}")
-        status = self.run_command(
-            fuzz_command,
-            self.log_output_path,
-            join(self.dir_expr, "src"),
-            env={"AFL_NO_UI": str(1), "AFL_CRASHING_SEEDS_AS_NEW_CRASH": str(1)},
-        )
-
-        self.process_status(status)
-
-        self.timestamp_log_end()
-
-        self.emit_normal("Genrating meta-data.json")
-
-        base_dir = join(self.dir_output, "default")
-        source_crash_dir = join(base_dir, "crashes")
-        source_benign_dir = join(base_dir, "queue")
 
         target_benign_dir = join(self.dir_output, "benign_tests")
         target_crash_dir = join(self.dir_output, "crashing_tests")
 
-        self.run_command("mkdir {}".format(target_benign_dir))
-        self.run_command("mkdir {}".format(target_crash_dir))
+        self.run_command("mkdir -p {}".format(target_benign_dir))
+        self.run_command("mkdir -p {}".format(target_crash_dir))
 
         if "-C" not in additional_params:
             # Crash exploration will be more focused on generating crashing tests but we cannot be sure
             self.copy_benign_tests(target_benign_dir)
         self.copy_crashing_tests(target_crash_dir)
 
-        self.run_command(
-            "bash -c 'cp -r {}/id* {} '".format(source_benign_dir, target_benign_dir)
+        instances = self.get_instance_count(task_config_info)
+        minimize_budget = int(timeout * self.minimize_budget_ratio)
+        test_command = "{} {}".format(
+            join(self.dir_expr, "src", bug_info[self.key_bin_path]),
+            bug_info[self.key_crash_cmd].replace("$POC", "@@"),
         )
-        self.run_command(
-            "bash -c 'cp -r {}/id* {} '".format(source_crash_dir, target_crash_dir)
+
+        self.timestamp_log_start()
+        campaign_env = {
+            "AFL_NO_UI": str(1),
+            "AFL_CRASHING_SEEDS_AS_NEW_CRASH": str(1),
+            "AFL_CAMPAIGN_INPUT": initial_corpus,
+            "AFL_CAMPAIGN_OUTPUT": self.dir_output,
+            "AFL_CAMPAIGN_FLAGS": "{} {}".format(dictionary, additional_params),
+            "AFL_CAMPAIGN_BENIGN_TESTS": target_benign_dir,
+            "AFL_CAMPAIGN_CRASHING_TESTS": target_crash_dir,
+            "AFL_CAMPAIGN_EXPORT_INTERVAL": str(self.export_interval),
+        }
+        self.emit_normal(
+            f"executing fuzz command with {self.name} on {instances} instance(s)"
+        )
+        status = self.run_campaign(
+            timeout - minimize_budget, instances, test_command, campaign_env
         )
+        self.process_status(status)
+
+        if minimize_budget > 0:
+            if self.has_tests_to_minimize(target_benign_dir, target_crash_dir):
+                self.minimize_tests(
+                    test_command, minimize_budget, target_benign_dir, target_crash_dir
+                )
+            else:
+                # nothing was found that could be minimized, the budget kept for the
+                # minimization goes back to the campaign, which resumes its state
+                self.emit_normal(
+                    f"nothing to minimize, fuzzing for {minimize_budget} more minute(s)"
+                )
+                status = self.run_campaign(
+                    minimize_budget, instances, test_command, campaign_env
+                )
+                self.process_status(status)
+
+        self.timestamp_log_end()
+
+        self.emit_normal("Genrating meta-data.json")
 
         new_bug_info: Dict[str, Any] = {
             self.key_generator: self.name,
@@ -128,6 +151,96 @@ class AbstractAFL(AbstractFuzzTool):
             join(self.dir_output, "meta-data.json"),
         )
 
+    def get_instance_count(self, task_config_info: Dict[str, Any]) -> int:
+        # one instance per cpu of the cpuset the container is pinned to
+        cpus = task_config_info.get(self.key_cpus, [])
+        count = len(cpus) if isinstance(cpus, list) else int(cpus)
+        return max(1, min(count, self.max_instances))
+
+    def run_campaign(
+        self,
+        timeout: int,
+        instances: int,
+        test_command: str,
+        campaign_env: Dict[str, str],
+    ) -> int:
+        fuzz_command = "bash {script} {timeout} {instances} {command}".format(
+            script=self.install_script("campaign.sh"),
+            timeout=timeout,
+            instances=instances,
+            command=test_command,
+        )
+        return self.run_command(
+            fuzz_command,
+            self.log_output_path,
+            join(self.dir_expr, "src"),
+            env=campaign_env,
+        )
+
+    def has_tests_to_minimize(self, benign_dir: str, crash_dir: str) -> bool:
+        """whether the campaign exported crashes or a queue that can be reduced"""
+        # exported entries are named <instance>-id:..., seeds are left untouched
+        exported_benign = self.list_dir(benign_dir, "*-id:*")
+        exported_crashes = self.list_dir(crash_dir, "*-id:*")
+        return len(exported_benign) > 1 or len(exported_crashes) > 0
+
+    def install_script(self, script_name: str) -> str:
+        """copies a script of afl_campaign into the experiment directory"""
+        with open(join(values.dir_main, "afl_campaign", script_name), "r") as script:
+            content = script.readlines()
+        script_path = self.dir_expr + f"/{self.name}-{script_name}"
+        self.write_file(content, script_path)
+        return script_path
+
+    def minimize_tests(
+        self, test_command: str, budget: int, benign_dir: str, crash_dir: str
+    ) -> None:
+        """
+        reduces the exported queue to the tests needed for its coverage and the
+        crashes to minimal inputs, within budget minutes; the originals are kept
+        in the minimization directory and minimization.json maps every kept test
+        to the originals it replaced
+        """
+        self.emit_normal(f"minimizing fuzzing tests within {budget} minute(s)")
+        dir_minimize = join(self.dir_output, "minimization")
+        status = self.run_command(
+            "bash {} {} {}".format(
+                self.install_script("minimize.sh"), budget * 60, test_command
+            ),
+            self.log_output_path,
+            join(self.dir_expr, "src"),
+            env={
+                "AFL_MINIMIZE_DIR": dir_minimize,
+                "AFL_MINIMIZE_BENIGN_TESTS": benign_dir,
+                "AFL_MINIMIZE_CRASHING_TESTS": crash_dir,
+            },
+        )
+        if status != 0:
+            self.emit_warning(f"test minimization exited with status {status}")
+
+        replaced_path = join(dir_minimize, "replaced")
+        if not self.is_file(replaced_path):
+            return
+        replacements: Dict[str, Dict[str, str]] = {}
+        for line in self.read_file(replaced_path):
+            fields = line.rstrip("\n").split("\t")
+            if len(fields) != 3:
+                continue
+            test_dir, kept, original = fields
+            # a crash that was minimized may later turn out to be a duplicate
+            replacements.setdefault(test_dir, {})[original] = kept
+
+        mapping: Dict[str, Dict[str, List[str]]] = {}
+        for test_dir, kept_list in replacements.items():
+            for original, kept in sorted(kept_list.items()):
+                mapping.setdefault(test_dir, {}).setdefault(kept, []).append(original)
+            self.emit_normal(
+                "{} {} test(s) replaced by {}".format(
+                    test_dir, len(kept_list), len(mapping[test_dir])
+                )
+            )
+        self.write_json(mapping, join(self.dir_output, "minimization.json"))
+
     def copy_crashing_tests(self, corpus_path: str) -> None:
         # Get Crashing tests
         self.run_command(
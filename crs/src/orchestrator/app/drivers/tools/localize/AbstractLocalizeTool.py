@@ -1,4 +1,5 @@
 import abc
+import hashlib
 import os
 import shutil
 from datetime import datetime
@@ -6,6 +7,7 @@ from os.path import join
 from typing import Any
 from typing import Dict
 from typing import List
+from typing import Optional
 
 from app.core import container
 from app.core import definitions
@@ -51,6 +53,52 @@ class AbstractLocalizeTool(AbstractTool):
         super().save_artifacts(dir_info)
         return
 
+    def instrumentation_cache_entry(
+        self, binary_path: str, tool_file_list: List[str], options: str
+    ) -> Optional[str]:
+        """
+        path of the instrumented binary in the instrumentation cache of the subject,
+        keyed by the digests of the binary and of the files of the instrumentation
+        (script, plugin) and its options; None if the binary cannot be hashed
+        """
+        digest_file = join(self.dir_output, "instrumentation-digests.txt")
+        status = self.run_command(
+            "bash -c 'sha256sum {} > {}'".format(
+                " ".join([binary_path] + tool_file_list), digest_file
+            )
+        )
+        if status != 0 or not self.is_file(digest_file):
+            return None
+        digest = hashlib.sha256(options.encode())
+        for line in self.read_file(digest_file):
+            digest.update(line.split(" ", 1)[0].encode())
+        return join(
+            self.dir_aux,
+            "instrumentation-cache",
+            "{}-{}".format(os.path.basename(binary_path), digest.hexdigest()),
+        )
+
+    def restore_instrumentation(
+        self, cache_entry: Optional[str], binary_path: str
+    ) -> bool:
+        if not cache_entry or not self.is_file(cache_entry):
+            return False
+        self.emit_normal(f"using cached instrumentation of {binary_path}")
+        return self.run_command(f"cp -p {cache_entry} {binary_path}") == 0
+
+    def store_instrumentation(
+        self, cache_entry: Optional[str], binary_path: str
+    ) -> None:
+        if not cache_entry or not self.is_file(binary_path):
+            return
+        # localizations of the subject running in parallel may store the same entry
+        self.run_command(f"mkdir -p {os.path.dirname(cache_entry)}")
+        self.run_command(
+            "bash -c 'cp -p {0} {1}.$$ && mv -f {1}.$$ {1}'".format(
+                binary_path, cache_entry
+            )
+        )
+
     def analyse_output(
         self, dir_info: DirectoryInfo, bug_id: str, fail_list: List[str]
     ) -> LocalizeToolStats:
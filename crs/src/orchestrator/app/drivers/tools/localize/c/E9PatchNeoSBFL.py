@@ -68,14 +68,13 @@ class E9PatchNeoSBFL(AbstractLocalizeTool):
                         (out, err) = output
                         if "elf" not in out.decode().lower():
                             continue
-                    self.run_command(
-                        f"{tool_folder}/sbfl-tool replace {join(self.dir_expr,'src',artifact)}",
-                        dir_path=tool_folder,
+                    self.instrument_artifact(
+                        tool_folder, join(self.dir_expr, "src", artifact)
                     )
 
-        self.run_command(
-            f"{tool_folder}/sbfl-tool replace {join(self.dir_expr,'src',bug_info['harnesses'][0]['binary'])}",
-            dir_path=tool_folder,
+        self.instrument_artifact(
+            tool_folder,
+            join(self.dir_expr, "src", bug_info["harnesses"][0]["binary"]),
         )
 
         dir_failing_traces = join(self.dir_output, self.key_failing_test_identifiers)
@@ -158,6 +157,29 @@ class E9PatchNeoSBFL(AbstractLocalizeTool):
 
         self.emit_highlight("log file: {0}".format(self.log_output_path))
 
+    def instrument_artifact(self, tool_folder: str, artifact_path: str) -> None:
+        """sbfl-tool replace, reusing the instrumentation of an identical artifact"""
+        # sbfl-tool holds the e9tool options, sbfl is the plugin built from sbfl.c
+        cache_entry = self.instrumentation_cache_entry(
+            artifact_path,
+            [join(tool_folder, "sbfl-tool"), join(tool_folder, "sbfl")],
+            "replace",
+        )
+        if cache_entry and self.is_file(cache_entry):
+            # like sbfl-tool, keep the original next to the tool
+            self.run_command(
+                "cp -p {} {}.orig".format(
+                    artifact_path, join(tool_folder, os.path.basename(artifact_path))
+                )
+            )
+            if self.restore_instrumentation(cache_entry, artifact_path):
+                return
+        status = self.run_command(
+            f"{tool_folder}/sbfl-tool replace {artifact_path}", dir_path=tool_folder
+        )
+        if status == 0:
+            self.store_instrumentation(cache_entry, artifact_path)
+
     def process_localization_file(self, bug_info: Dict[str, Any]):
 
         lines = self.read_file(join(self.dir_expr, "src", "out", "SBFL.prof"))
@@ -1,5 +1,6 @@
 import os
 import re
+from multiprocessing.pool import ThreadPool
 from os.path import join
 from typing import Any
 from typing import Dict
@@ -20,6 +21,8 @@ class E9PatchSBFL(AbstractLocalizeTool):
         self.name = os.path.basename(__file__)[:-3].lower()
         super().__init__(self.name)
         self.image_name = "mirchevmp/sbfl-e9patch:addr"
+        # the tests are traced in parallel on the cpus that are free
+        self.cpu_usage = 8
 
     def locate(self) -> None:
         pass
@@ -53,12 +56,22 @@ class E9PatchSBFL(AbstractLocalizeTool):
         if os.path.exists(join(self.dir_expr, "src", "instrument.sh")):
             self.run_command("bash instrument.sh", dir_path=join(self.dir_expr, "src"))
         else:
+            binary_path = join(self.dir_expr, "src", bug_info[self.key_bin_path])
             self.run_command("bash build.sh", dir_path=join(self.dir_expr, "src"))
-            instrument_comand = f"python3 {join(tool_folder,'instrument.py')} {join(self.dir_expr,'src',bug_info[self.key_bin_path])}"
-            self.run_command(instrument_comand, self.log_output_path)
-            self.run_command(
-                f"bash -c 'mv {join(self.dir_expr,'src',bug_info[self.key_bin_path])}*.tracer {join(self.dir_expr,'src',bug_info[self.key_bin_path])}'"
+            # the e9tool command and plugin are part of instrument.py and the image
+            cache_entry = self.instrumentation_cache_entry(
+                binary_path, [join(tool_folder, "instrument.py")], self.image_name
             )
+            if not self.restore_instrumentation(cache_entry, binary_path):
+                instrument_comand = (
+                    f"python3 {join(tool_folder,'instrument.py')} {binary_path}"
+                )
+                self.run_command(instrument_comand, self.log_output_path)
+                status = self.run_command(
+                    f"bash -c 'mv {binary_path}*.tracer {binary_path}'"
+                )
+                if status == 0:
+                    self.store_instrumentation(cache_entry, binary_path)
 
         dir_failing_traces = join(self.dir_output, self.key_failing_test_identifiers)
         dir_passing_traces = join(self.dir_output, self.key_passing_test_identifiers)
@@ -73,25 +86,28 @@ class E9PatchSBFL(AbstractLocalizeTool):
 
         has_trace = self.is_file(join(self.dir_expr, "src", "trace.sh"))
 
-        for failing_test_identifier in bug_info[self.key_failing_test_identifiers]:
-            if has_trace:
-                self.run_trace(
-                    bug_info,
-                    dir_failing_traces,
-                    join(self.dir_expr, "src", "tests", failing_test_identifier),
-                )
-            else:
-                self.run_test(bug_info, dir_failing_traces, failing_test_identifier)
-
-        for passing_test_identifier in bug_info[self.key_passing_test_identifiers]:
-            if has_trace:
-                self.run_trace(
-                    bug_info,
-                    dir_passing_traces,
-                    join(self.dir_expr, "src", "tests", passing_test_identifier),
+        test_list = [
+            (dir_failing_traces, test_identifier)
+            for test_identifier in bug_info[self.key_failing_test_identifiers]
+        ] + [
+            (dir_passing_traces, test_identifier)
+            for test_identifier in bug_info[self.key_passing_test_identifiers]
+        ]
+        worker_count = min(self.get_worker_count(task_config_info), len(test_list))
+        self.emit_normal(
+            "running {} test(s) with {} worker(s)".format(len(test_list), worker_count)
+        )
+        if test_list:
+            # every test writes its own trace file
+            with ThreadPool(processes=worker_count) as pool:
+                pool.starmap(
+                    lambda target_dir, test_identifier: self.trace_test(
+                        bug_info, has_trace, target_dir, test_identifier
+                    ),
+                    test_list,
                 )
-            else:
-                self.run_test(bug_info, dir_passing_traces, passing_test_identifier)
+        # the rest of the localization runs on a single cpu
+        self.release_extra_cpus()
 
         cp_sources = list(map(lambda x: x["name"], bug_info["cp_sources"]))
         harness_sources = list(
@@ -152,6 +168,21 @@ class E9PatchSBFL(AbstractLocalizeTool):
 
         self.emit_highlight("log file: {0}".format(self.log_output_path))
 
+    def get_worker_count(self, task_config_info: Dict[str, Any]) -> int:
+        cpus = task_config_info.get(self.key_cpus, [])
+        count = len(cpus) if isinstance(cpus, list) else int(cpus)
+        return max(1, count)
+
+    def trace_test(self, bug_info, has_trace, target_dir, test_identifier):
+        if has_trace:
+            self.run_trace(
+                bug_info,
+                target_dir,
+                join(self.dir_expr, "src", "tests", test_identifier),
+            )
+        else:
+            self.run_test(bug_info, target_dir, test_identifier)
+
     def run_test(self, bug_info, target_dir, test_identifier):
         self.run_command(
             "bash {} {}".format(bug_info[self.key_test_script], test_identifier),
@@ -6,6 +6,7 @@ from typing import Any
 from typing import Dict
 from typing import List
 
+from app.core import coverage_cache
 from app.core.task.stats.LocalizeToolStats import LocalizeToolStats
 from app.core.task.typing.DirectoryInfo import DirectoryInfo
 from app.drivers.tools.localize.AbstractLocalizeTool import AbstractLocalizeTool
@@ -97,74 +98,113 @@ class GZoltar(AbstractLocalizeTool):
         if not self.is_file(tests_list):
             self.error_exit("No test list generated")
 
-        self.emit_normal("Instrumenting project")
+        formula = bug_info.get("fl_formula", "Ochiai").lower()
+        metric = bug_info.get("fl_metric", "entropy").lower()
+        granularity = bug_info.get("fl_granularity", "line").lower()
 
-        self.run_command(
-            "mv {class_dir} {backup_dir}".format(
-                class_dir=join(self.dir_expr, "src", bug_info[self.key_dir_class]),
-                backup_dir=join(self.dir_expr, "src", "class-backup"),
+        # only tests without coverage for the current class files are run
+        test_method_lines = [t for t in self.read_file(tests_list) if t.strip()]
+        test_ids = [t.strip().split(",")[-1] for t in test_method_lines]
+        digests = self.class_digests(
+            [
+                join(self.dir_expr, "src", bug_info[self.key_dir_class]),
+                join(self.dir_expr, "src", bug_info[self.key_dir_test_class]),
+            ]
+        )
+        cache_name = join("coverage-cache", f"{self.name}-{granularity}")
+        cache_path = join(self.dir_aux, f"{cache_name}.json")
+        with self.aux_lock(cache_name):
+            cache = coverage_cache.CoverageCache(
+                self.read_json(cache_path) if self.is_file(cache_path) else None
+            )
+        if formula in coverage_cache.FORMULAS:
+            stale_ids = set(cache.stale(test_ids, digests))
+        else:
+            # the ranking of other formulas is left to GZoltar, for all tests
+            stale_ids = set(test_ids)
+        self.emit_normal(
+            "{} of {} test(s) have cached coverage".format(
+                len(test_ids) - len(stale_ids), len(test_ids)
             )
         )
-
-        self.run_command(
-            "java -cp {backup_dir}:{gzoltar_agent}:{gzoltar_cli}{deps} com.gzoltar.cli.Main instrument --outputDirectory {class_dir} {backup_dir}".format(
-                backup_dir=join(self.dir_expr, "src", "class-backup"),
-                deps=deps_location,
-                class_dir=join(self.dir_expr, "src", bug_info[self.key_dir_class]),
-                gzoltar_agent="/gzoltar/com.gzoltar.agent.rt/target/com.gzoltar.agent.rt-{}-all.jar".format(
-                    gzoltar_version
-                ),
-                gzoltar_cli="/gzoltar/com.gzoltar.cli/target/com.gzoltar.cli-{}-jar-with-dependencies.jar".format(
-                    gzoltar_version
-                ),
-            ),
-            log_file_path=self.log_output_path,
-            env=env,
+        self.write_file(
+            [
+                line if line.endswith("\n") else line + "\n"
+                for line, test_id in zip(test_method_lines, test_ids)
+                if test_id in stale_ids
+            ],
+            tests_list,
         )
 
-        self.emit_normal("Running each unit test case in isolation")
+        status = 0
+        if stale_ids:
+            self.emit_normal("Instrumenting project")
 
-        ser_file = join(self.dir_output, "ser_file.ser")
-        self.run_command(
-            """java -cp {test_dir}:{class_dir}:{junit}:{hamcrest}:{gzoltar_agent}:{gzoltar_cli}{deps} -Dgzoltar-agent.destfile={ser_file} -Dgzoltar-agent.output="file" \
-                            com.gzoltar.cli.Main runTestMethods --testMethods {test_method} --offline --collectCoverage""".format(
-                test_dir=join(self.dir_expr, "src", bug_info[self.key_dir_test_class]),
-                deps=deps_location,
-                class_dir=join(self.dir_expr, "src", bug_info[self.key_dir_class]),
-                junit="/gzoltar/libs/junit.jar",
-                hamcrest="/gzoltar/libs/hamcrest-core.jar",
-                gzoltar_agent="/gzoltar/com.gzoltar.agent.rt/target/com.gzoltar.agent.rt-{}-all.jar".format(
-                    gzoltar_version
+            self.run_command(
+                "mv {class_dir} {backup_dir}".format(
+                    class_dir=join(self.dir_expr, "src", bug_info[self.key_dir_class]),
+                    backup_dir=join(self.dir_expr, "src", "class-backup"),
+                )
+            )
+
+            self.run_command(
+                "java -cp {backup_dir}:{gzoltar_agent}:{gzoltar_cli}{deps} com.gzoltar.cli.Main instrument --outputDirectory {class_dir} {backup_dir}".format(
+                    backup_dir=join(self.dir_expr, "src", "class-backup"),
+                    deps=deps_location,
+                    class_dir=join(self.dir_expr, "src", bug_info[self.key_dir_class]),
+                    gzoltar_agent="/gzoltar/com.gzoltar.agent.rt/target/com.gzoltar.agent.rt-{}-all.jar".format(
+                        gzoltar_version
+                    ),
+                    gzoltar_cli="/gzoltar/com.gzoltar.cli/target/com.gzoltar.cli-{}-jar-with-dependencies.jar".format(
+                        gzoltar_version
+                    ),
                 ),
-                gzoltar_cli="/gzoltar/com.gzoltar.cli/target/com.gzoltar.cli-{}-jar-with-dependencies.jar".format(
-                    gzoltar_version
+                log_file_path=self.log_output_path,
+                env=env,
+            )
+
+            self.emit_normal("Running each unit test case in isolation")
+
+            ser_file = join(self.dir_output, "ser_file.ser")
+            self.run_command(
+                """java -cp {test_dir}:{class_dir}:{junit}:{hamcrest}:{gzoltar_agent}:{gzoltar_cli}{deps} -Dgzoltar-agent.destfile={ser_file} -Dgzoltar-agent.output="file" \
+                                com.gzoltar.cli.Main runTestMethods --testMethods {test_method} --offline --collectCoverage""".format(
+                    test_dir=join(
+                        self.dir_expr, "src", bug_info[self.key_dir_test_class]
+                    ),
+                    deps=deps_location,
+                    class_dir=join(self.dir_expr, "src", bug_info[self.key_dir_class]),
+                    junit="/gzoltar/libs/junit.jar",
+                    hamcrest="/gzoltar/libs/hamcrest-core.jar",
+                    gzoltar_agent="/gzoltar/com.gzoltar.agent.rt/target/com.gzoltar.agent.rt-{}-all.jar".format(
+                        gzoltar_version
+                    ),
+                    gzoltar_cli="/gzoltar/com.gzoltar.cli/target/com.gzoltar.cli-{}-jar-with-dependencies.jar".format(
+                        gzoltar_version
+                    ),
+                    test_method=tests_list,
+                    ser_file=ser_file,
                 ),
-                test_method=tests_list,
-                ser_file=ser_file,
-            ),
-            log_file_path=self.log_output_path,
-            env=env,
-        )
+                log_file_path=self.log_output_path,
+                env=env,
+            )
 
-        self.emit_normal("Restore classes")
-        self.run_command(
-            "rm -rf {class_dir}".format(
-                class_dir=join(self.dir_expr, "src", bug_info[self.key_dir_class])
+            self.emit_normal("Restore classes")
+            self.run_command(
+                "rm -rf {class_dir}".format(
+                    class_dir=join(self.dir_expr, "src", bug_info[self.key_dir_class])
+                )
             )
-        )
-        self.run_command(
-            "mv {backup_dir} {class_dir}".format(
-                backup_dir=join(self.dir_expr, "src", "class-backup"),
-                class_dir=join(self.dir_expr, "src", bug_info[self.key_dir_class]),
+            self.run_command(
+                "mv {backup_dir} {class_dir}".format(
+                    backup_dir=join(self.dir_expr, "src", "class-backup"),
+                    class_dir=join(self.dir_expr, "src", bug_info[self.key_dir_class]),
+                )
             )
-        )
 
-        self.emit_normal("Generate report")
+            self.emit_normal("Generate report")
 
-        formula = bug_info.get("fl_formula", "Ochiai").lower()
-        metric = bug_info.get("fl_metric", "entropy").lower()
-        granularity = bug_info.get("fl_granularity", "line").lower()
-        localize_command = """ java -cp {class_dir}:{test_dir}:{junit}:{hamcrest}:{gzoltar_cli}{deps} \
+            localize_command = """ java -cp {class_dir}:{test_dir}:{junit}:{hamcrest}:{gzoltar_cli}{deps} \
   com.gzoltar.cli.Main faultLocalizationReport \
     --buildLocation "{class_dir}" \
     --granularity "{granularity}" \
@@ -177,32 +217,47 @@ class GZoltar(AbstractLocalizeTool):
     --formula "{formula}" \
     --metric "{metric}" \
     --formatter "txt" {additional_params} """.format(
-            formula=formula,
-            metric=metric,
-            deps=deps_location,
-            granularity=granularity,
-            class_dir=join(self.dir_expr, "src", bug_info[self.key_dir_class]),
-            output_dir=join(self.dir_output),
-            additional_params=additional_tool_param,
-            ser_file=ser_file,
-            test_dir=join(self.dir_expr, "src", bug_info[self.key_dir_test_class]),
-            junit="/gzoltar/libs/junit.jar",
-            hamcrest="/gzoltar/libs/hamcrest-core.jar",
-            gzoltar_cli="/gzoltar/com.gzoltar.cli/target/com.gzoltar.cli-{}-jar-with-dependencies.jar".format(
-                gzoltar_version
-            ),
-        )
+                formula=formula,
+                metric=metric,
+                deps=deps_location,
+                granularity=granularity,
+                class_dir=join(self.dir_expr, "src", bug_info[self.key_dir_class]),
+                output_dir=join(self.dir_output),
+                additional_params=additional_tool_param,
+                ser_file=ser_file,
+                test_dir=join(self.dir_expr, "src", bug_info[self.key_dir_test_class]),
+                junit="/gzoltar/libs/junit.jar",
+                hamcrest="/gzoltar/libs/hamcrest-core.jar",
+                gzoltar_cli="/gzoltar/com.gzoltar.cli/target/com.gzoltar.cli-{}-jar-with-dependencies.jar".format(
+                    gzoltar_version
+                ),
+            )
 
-        status = self.run_command(
-            localize_command,
-            self.log_output_path,
-            dir_path=join(self.dir_expr, "src"),
-            env=env,
-        )
+            status = self.run_command(
+                localize_command,
+                self.log_output_path,
+                dir_path=join(self.dir_expr, "src"),
+                env=env,
+            )
+            self.update_coverage_cache(cache, digests)
+            with self.aux_lock(cache_name):
+                # other localizations of the subject may have stored tests since
+                shared_cache = coverage_cache.CoverageCache(
+                    self.read_json(cache_path) if self.is_file(cache_path) else None
+                )
+                shared_cache.merge(cache, stale_ids)
+                self.run_command(f"mkdir -p {os.path.dirname(cache_path)}")
+                self.write_json(shared_cache.to_json(), cache_path)
         self.process_status(status)
 
         self.output_file = join(self.dir_output, "sfl", "txt", "ochiai.ranking.csv")
 
+        spectrum = cache.spectrum(test_ids)
+        self.write_json(spectrum, join(self.dir_output, "spectrum.json"))
+        if len(stale_ids) < len(test_ids):
+            # the report of GZoltar only covers the tests that were run
+            self.write_spectrum_report(spectrum, formula)
+
         if self.is_file(self.output_file):
             localization = []
             lines = self.read_file(self.output_file)[1:]
@@ -265,6 +320,59 @@ class GZoltar(AbstractLocalizeTool):
         self.timestamp_log_end()
         self.emit_highlight("log file: {0}".format(self.log_output_path))
 
+    def class_digests(self, class_dir_list: List[str]) -> Dict[str, str]:
+        """digests of the class files, by class name"""
+        digest_file = join(self.dir_output, "class-digests.txt")
+        self.run_command(f"rm -f {digest_file}")
+        for class_dir in class_dir_list:
+            self.run_command(
+                "bash -c 'find . -name \"*.class\" -print0 "
+                f"| xargs -0 -r sha1sum >> {digest_file}'",
+                dir_path=class_dir,
+            )
+        if not self.is_file(digest_file):
+            return dict()
+        return coverage_cache.parse_class_digests(self.read_file(digest_file))
+
+    def update_coverage_cache(
+        self, cache: coverage_cache.CoverageCache, digests: Dict[str, str]
+    ) -> None:
+        """stores the coverage of the tests in the report of the last run"""
+        dir_report = join(self.dir_output, "sfl", "txt")
+        report_files = [
+            join(dir_report, name)
+            for name in ["spectra.csv", "tests.csv", "matrix.txt"]
+        ]
+        if not all(self.is_file(report_file) for report_file in report_files):
+            self.emit_warning("no coverage matrix found, not caching coverage")
+            return
+        spectra_lines, tests_lines, matrix_lines = [
+            self.read_file(report_file) for report_file in report_files
+        ]
+        for test_id, outcome, covered in coverage_cache.parse_gzoltar_report(
+            spectra_lines, tests_lines, matrix_lines
+        ):
+            cache.store(test_id, outcome, covered, digests)
+
+    def write_spectrum_report(self, spectrum: Dict[str, Any], formula: str) -> None:
+        """writes the ranking and the tests of a spectrum like the txt report"""
+        dir_report = join(self.dir_output, "sfl", "txt")
+        self.run_command(f"mkdir -p {dir_report}")
+        self.write_file(
+            ["name;suspiciousness_value\n"]
+            + [
+                f"{element};{score}\n"
+                for element, score in coverage_cache.rank(spectrum, formula)
+                if score > 0
+            ],
+            self.output_file,
+        )
+        self.write_file(
+            ["name,outcome,runtime,stacktrace\n"]
+            + [f"{test['id']},{test['outcome']},0,\n" for test in spectrum["tests"]],
+            join(dir_report, "tests.csv"),
+        )
+
     def analyse_output(
         self, dir_info: DirectoryInfo, bug_id: str, fail_list: List[str]
     ) -> LocalizeToolStats:
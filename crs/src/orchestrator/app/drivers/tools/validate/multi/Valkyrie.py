@@ -83,6 +83,16 @@ class Valkyrie(AbstractValidateTool):
         conf_content.append(f"output_dir:{self.dir_output}\n")
         conf_content.append("patch_mode:compile\n")
         conf_content.append("patch_per_dir_limit:300\n")
+        # verdicts outlive the patches removed by delete_validated_patches, they
+        # and the test statistics are shared by the validations of the bug in all
+        # subtasks
+        dir_bug_aux = join(self.dir_aux, str(bug_info[self.key_bug_id]))
+        conf_content.append(
+            f"verdict_store:{dir_bug_aux}/{self.name}-verdicts.sqlite\n"
+        )
+        conf_content.append(
+            f"test_statistics:{dir_bug_aux}/{self.name}-test-statistics\n"
+        )
         self.write_file(conf_content, config_path)
         return config_path
 
@@ -42,6 +42,7 @@ from app.core.configs.tasks_data.TaskConfig import TaskConfig
 from app.core.identifiers import create_bug_image_identifier
 from app.core.identifiers import create_task_identifier
 from app.core.identifiers import create_task_image_identifier
+from app.core.sampler import container_sampler
 from app.core.task import task
 from app.core.task.dir_info import generate_dir_info
 from app.core.task.image import prepare_experiment_image
@@ -94,6 +95,7 @@ class Cerberus(App[List[Result]]):
         definitions.UI_STATUS: {},
         definitions.UI_PLAUSIBLE_PATCHES: {},
         definitions.UI_DURATION: {},
+        definitions.UI_RESOURCES: {},
     }
 
     SUB_TITLE = "Program Repair Framework"
@@ -138,6 +140,7 @@ class Cerberus(App[List[Result]]):
         self.jobs: Dict[str, Tuple[Future[None], AbstractTool]] = {}
 
         self.jobs_cancelled = False
+        self.resources_updated_at = 0
 
         self.setup_resource_allocation()
 
@@ -206,7 +209,14 @@ class Cerberus(App[List[Result]]):
 
             for job_id in to_del:
                 del job_time_map[job_id]
+            running_tools = [(key, info[2]) for key, info in job_time_map.items()]
             job_time_map_mutex.release()
+            if (
+                values.stats_sample_interval > 0
+                and now - self.resources_updated_at >= values.stats_sample_interval
+            ):
+                self.resources_updated_at = now
+                self.update_resources(running_tools)
 
     def prepare_tasks_run(self, loop: AbstractEventLoop) -> None:
         try:
@@ -654,6 +664,7 @@ class Cerberus(App[List[Result]]):
             "Allocated",
             "N/A",
             "N/A",
+            "N/A",
             key=key,
         )
 
@@ -788,6 +799,7 @@ class Cerberus(App[List[Result]]):
                 "Running",
                 "None",
                 "N/A",
+                "N/A",
             )
 
             running_row_key = self.query_one(
@@ -885,6 +897,24 @@ class Cerberus(App[List[Result]]):
         task_future: Future[None] = loop.run_in_executor(None, job_allocated_job)
         self.jobs[message.identifier] = (task_future, message.tool)
 
+    def update_resources(self, running_tools: List[Tuple[str, AbstractTool]]) -> None:
+        for job_id, tool in running_tools:
+            if not tool.container_id:
+                continue
+            usage = container_sampler.describe(tool.container_id)
+            if not usage:
+                continue
+            for table_id in [running_subjects_id, all_subjects_id]:
+                try:
+                    self.query_one("#" + table_id, DataTable).update_cell(
+                        job_id,
+                        Cerberus.COLUMNS[definitions.UI_RESOURCES][table_id],
+                        usage,
+                        update_width=True,
+                    )
+                except Exception:
+                    pass
+
     def update_status(self, key: str, status: str) -> None:
         try:  # generally a running task will be updating its status
             self.query_one("#" + running_subjects_id, DataTable).update_cell(
@@ -1088,9 +1118,11 @@ class Cerberus(App[List[Result]]):
 app: Cerberus
 
 
-def post_write(text: str) -> None:
+def post_write(text: str, session_identifier: Optional[str] = None) -> None:
     message = Write(
-        text=text, session_identifier=values.session_identifier.get("(Root)")
+        text=text,
+        session_identifier=session_identifier
+        or values.session_identifier.get("(Root)"),
     )
     app.post_message(message)
 
@@ -1,8 +1,12 @@
-from typing import Dict, List, Optional
-from tree_sitter import Language, Parser, Node
+from typing import Dict, List, Optional, Tuple
+from tree_sitter import Language, Parser, Node, Tree
 
+from collections import OrderedDict
 from pathlib import Path
 
+import hashlib
+import threading
+
 import tree_sitter_python as tspython
 import tree_sitter_cpp as tscpp
 import tree_sitter_c as tsc
@@ -12,6 +16,57 @@ from hermes.core.program import Program
 from hermes.log import logger
 
 
+# Grammar modules for every supported language. Parsers are only built on
+# first use and are then shared by every TreeSitter instance in the process.
+LANGUAGE_MODULES = {
+    "python": tspython,
+    "cpp": tscpp,
+    "c++": tscpp,
+    "c": tsc,
+    "java": tsjava,
+}
+
+# Number of parsed syntax trees kept alive, keyed by content hash.
+TREE_CACHE_SIZE = 64
+
+_parsers: Dict[str, Parser] = {}
+_trees: "OrderedDict[Tuple[str, str], Tree]" = OrderedDict()
+_lock = threading.Lock()
+
+
+def get_parser(language: str) -> Parser:
+    """Return the process-wide parser for [language], creating it once."""
+    with _lock:
+        if language not in _parsers:
+            module = LANGUAGE_MODULES[language]
+            # Aliases (cpp/c++) share a single parser instance
+            for alias, other in LANGUAGE_MODULES.items():
+                if other is module and alias in _parsers:
+                    _parsers[language] = _parsers[alias]
+                    break
+            else:
+                _parsers[language] = Parser(Language(module.language()))
+        return _parsers[language]
+
+
+def parse_source(source: str, language: str) -> Tree:
+    """Parse [source], reusing the tree of an identical earlier source."""
+    source_bytes = bytes(source, 'utf-8')
+    key = (language, hashlib.sha1(source_bytes).hexdigest())
+    with _lock:
+        if key in _trees:
+            _trees.move_to_end(key)
+            return _trees[key]
+    parser = get_parser(language)
+    with _lock:
+        # Parser objects are not safe to share between threads
+        tree = parser.parse(source_bytes)
+        _trees[key] = tree
+        if len(_trees) > TREE_CACHE_SIZE:
+            _trees.popitem(last=False)
+    return tree
+
+
 class TreeSitter:
     def __init__(
             self,
@@ -31,24 +86,19 @@ class TreeSitter:
                 f'{self.language} is not in {self.supported_languages()}.'
         )
 
-        self.parser: Parser = self.supported_parsers()[self.language]
-        self.tree = self.parser.parse(
-            bytes(self.source, 'utf-8')
-        )
+        self.parser: Parser = get_parser(self.language)
+        self.tree = parse_source(self.source, self.language)
         self.program_id = program_id
 
     @staticmethod
     def supported_languages() -> List[str]:
-        return list(TreeSitter.supported_parsers().keys())
+        return list(LANGUAGE_MODULES.keys())
 
     @staticmethod
     def supported_parsers() -> Dict[str, Parser]:
         return {
-            "python": Parser(Language(tspython.language())),
-            "cpp": Parser(Language(tscpp.language())),
-            "c++": Parser(Language(tscpp.language())),
-            "c": Parser(Language(tsc.language())),
-            "java": Parser(Language(tsjava.language())),
+            language: get_parser(language)
+            for language in LANGUAGE_MODULES
         }
 
     def search_wrapper(self, line_number: int) -> Optional[Node]:
@@ -70,15 +120,28 @@ class TreeSitter:
         return function_node[0]
 
     def get_context(self, line_number: int):
+        # Pre-order walk that only descends into nodes spanning the line;
+        # nodes that do not span it cannot have descendants that do.
         candidates = []
-
-        def traverse(n):
-            if n.start_point.row <= line_number <= n.end_point.row:
-                candidates.append(n)
-            for child in n.children:
-                traverse(child)
-
-        traverse(self.tree.root_node)
+        cursor = self.tree.walk()
+        finished = False
+        while not finished:
+            node = cursor.node
+            if node.start_point.row <= line_number <= node.end_point.row:
+                candidates.append(node)
+                if cursor.goto_first_child():
+                    continue
+            # Later siblings start even further down, so only move on to
+            # them while the current node starts before the line
+            if node.start_point.row <= line_number and \
+                    cursor.goto_next_sibling():
+                continue
+            while True:
+                if not cursor.goto_parent():
+                    finished = True
+                    break
+                if cursor.goto_next_sibling():
+                    break
 
         filtered_candidates = [
             candidate for candidate in candidates
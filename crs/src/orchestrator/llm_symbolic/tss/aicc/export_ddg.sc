@@ -0,0 +1,43 @@
+/* export_ddg.sc
+
+   Exports the data dependence graph of every method of a source set in a
+   single Joern session.
+
+   Input:  inputDir - directory with one sub-directory per source file, named
+                      after the content hash of that file
+           outDir   - directory that receives one `<hash>` directory of
+                      `<n>-ddg.dot` files per source file
+           projectName - name of the workspace project, unique per session and
+                      deleted at the end
+   Output: number of exported methods
+
+   Running the Script
+   ------------------
+   joern --script export_ddg.sc --param inputDir=<dir> --param outDir=<dir> \
+         --param projectName=<name>
+ */
+
+import java.nio.file.{Files, Paths}
+import scala.jdk.CollectionConverters._
+
+@main def exec(inputDir: String, outDir: String, projectName: String): Int = {
+  val hashes = Files.list(Paths.get(inputDir)).iterator().asScala
+    .map(_.getFileName.toString).toSet
+
+  importCode(inputDir, projectName)
+
+  var exported = 0
+  cpg.method.isExternal(false).l.zipWithIndex.foreach { case (method, idx) =>
+    Paths.get(method.filename).iterator().asScala.map(_.toString)
+      .find(hashes.contains).foreach { hash =>
+        val dir = Paths.get(outDir, hash)
+        Files.createDirectories(dir)
+        method.dotDdg.l.foreach { dot =>
+          Files.writeString(dir.resolve(s"$idx-ddg.dot"), dot)
+          exported += 1
+        }
+      }
+  }
+  delete(projectName)
+  exported
+}
@@ -2,22 +2,21 @@ from __future__ import annotations
 
 import asyncio
 import hashlib
+import heapq
 import json
 import os
-from random import randint
 import re
 import subprocess
 import sys
 from collections import defaultdict, deque
 from collections.abc import Generator
 from dataclasses import dataclass
-from functools import cache
-from itertools import chain, zip_longest
+from functools import cache, cached_property
+from itertools import chain, combinations, zip_longest
 from os import PathLike
 from os.path import isfile
 from pathlib import Path
 from subprocess import CalledProcessError, run
-from tempfile import NamedTemporaryFile, TemporaryDirectory
 from typing import Any, Optional
 
 import click
@@ -28,6 +27,7 @@ from tree_sitter import Node as TSNode
 from tree_sitter import Parser, Tree
 
 from tss.aicc.definitions import HOOKS, PROMPT_OUTPUT_REQ, make_prompt_header
+from tss.aicc.seed_gen import generate_seeds
 from tss.aicc.slice import Slicer
 from tss.aicc.ts_query import collect_string_literals
 
@@ -56,6 +56,13 @@ assert isfile(CALL_GRAPH_GENERATOR_JAR), f"{CALL_GRAPH_GENERATOR_JAR} is not a f
 
 ENTRY = dict()
 
+UNKNOWN = "<UNKNOWN>"
+
+# Bounds of the call path search from the harness entry to a hook target
+MAX_CALL_DEPTH = 12
+MAX_CALL_PATHS = 32
+MAX_PATH_EXPANSIONS = 100_000
+
 
 @dataclass
 class Predicate:
@@ -406,17 +413,50 @@ class CallGraph:
         return CallGraph(nodes, edges, self.hookTargets)
 
     def group_nodes_by_equality(self) -> list[list[tuple[str, CgNode]]]:
+        # A node joins the first group whose representative (first node) it
+        # equals modulo unknowns. Representatives are indexed by every subset
+        # of their (class, method, args) components, so the matching groups of
+        # a node are found with a few lookups instead of a scan of all groups.
         groups = []
+        index: dict[tuple[int, ...], dict[tuple[str, ...], int]] = defaultdict(dict)
+        all_parts = (0, 1, 2)
+
         for k, v in self.nodes.items():
-            for group in groups:
-                _, node = group[0]
-                if self.node_equal_with_unknown(v, node):
-                    group.append((k, v))
-                    break
-            else:
-                groups.append([(k, v)])
+            key = self.equality_key(v)
+            known = tuple(i for i in all_parts if key[i] != UNKNOWN)
+
+            match = None
+            # the representative must agree with every known component of v,
+            # either with the same value or with an unknown one
+            for n_unknown in range(len(known) + 1):
+                for as_unknown in combinations(known, n_unknown):
+                    probe = tuple(
+                        UNKNOWN if i in as_unknown else key[i] for i in known
+                    )
+                    group_idx = index[known].get(probe)
+                    if group_idx is not None and (match is None or group_idx < match):
+                        match = group_idx
+
+            if match is not None:
+                groups[match].append((k, v))
+                continue
+
+            groups.append([(k, v)])
+            for size in range(len(all_parts) + 1):
+                for parts in combinations(all_parts, size):
+                    index[parts].setdefault(
+                        tuple(key[i] for i in parts), len(groups) - 1
+                    )
         return groups
 
+    @staticmethod
+    def equality_key(node: CgNode) -> tuple[str, str, Any]:
+        # an argument list is only a wildcard if it is entirely unknown
+        arg_types = (
+            UNKNOWN if node.argTypes == [UNKNOWN] else tuple(node.argTypes)
+        )
+        return (node.qualifiedClassName, node.methodName, arg_types)
+
     @staticmethod
     def node_equal_with_unknown(n: CgNode, m: CgNode) -> bool:
         UNKNOWN = "<UNKNOWN>"
@@ -441,6 +481,39 @@ class CallGraph:
             and list_eq_with_unknown(n.argTypes, m.argTypes)
         )
 
+    @cached_property
+    def labels_by_node(self) -> dict[CgNode, list[str]]:
+        labels = defaultdict(list)
+        for k, v in self.nodes.items():
+            labels[v].append(k)
+        return labels
+
+    @cached_property
+    def out_edges(self) -> dict[str, list[CgEdge]]:
+        edges = defaultdict(list)
+        for e in self.edges:
+            edges[e.caller].append(e)
+        return edges
+
+    @cached_property
+    def in_edges(self) -> dict[str, list[CgEdge]]:
+        edges = defaultdict(list)
+        for e in self.edges:
+            edges[e.callee].append(e)
+        return edges
+
+    def distances_to(self, labels: list[str]) -> dict[str, int]:
+        """Number of calls from every node that can reach one of [labels]."""
+        distances = {label: 0 for label in labels}
+        queue = deque(labels)
+        while queue:
+            label = queue.popleft()
+            for e in self.in_edges.get(label, []):
+                if e.caller not in distances:
+                    distances[e.caller] = distances[label] + 1
+                    queue.append(e.caller)
+        return distances
+
     @staticmethod
     def count_unknowns_in_node(node: CgNode) -> Any:
         unknown = "<UNKNOWN>"
@@ -513,6 +586,25 @@ def execute_command(command: list[str]) -> None:
     required=True,
     help="Fully Qualified name of harnesss",
 )
+@click.option(
+    "-r",
+    "--rounds",
+    type=int,
+    default=25,
+    help="number of times each prompt is sent to the LLM",
+)
+@click.option(
+    "--llm-workers",
+    type=int,
+    default=8,
+    help="maximum number of concurrent LLM queries",
+)
+@click.option(
+    "--llm-rpm",
+    type=float,
+    default=60.0,
+    help="maximum number of LLM queries started per minute",
+)
 def main(
     source_list_file: str | PathLike,
     output_dir: str | PathLike,
@@ -520,6 +612,9 @@ def main(
     sanitizers: str,
     harness_source: str | PathLike,
     harness_class: str,
+    rounds: int,
+    llm_workers: int,
+    llm_rpm: float,
 ) -> None:
     ALLOWED_SANITIZERS = [
         "FileSystemTraversal",
@@ -579,9 +674,7 @@ def main(
     prompts = []
 
     sources = Path(source_list_file).read_text().splitlines()
-    dots_dir = Path('/tmp',f"ddg-dots-{str(randint(1,100000))}")
-    dots_dir.mkdir(parents=True,exist_ok=True)
-    slicer = Slicer(sources, dots_dir, num_processes)
+    slicer = Slicer(sources, num_processes=num_processes)
     # form last path edge
     if len(icfg_paths) == 0:
         print("No paths found in the call graph. Exiting.")
@@ -672,18 +765,15 @@ def main(
         + f"\nThis is a file that is related with the input data. {harness_code}\n"
     )
     print(prompt_content)
-    for idx in range(25):
-        bin_data = query_llm_and_run_response(prompt_content)
-        if bin_data is None:
-            continue
-        bin_file_name = output_dir.joinpath(f"{2 * idx}_input.bin")
-        bin_file_name.write_bytes(bin_data)
-
-        bin_data = query_llm_and_run_response(harness_prompt_content)
-        if bin_data is None:
-            continue
-        bin_file_name = output_dir.joinpath(f"{2 * idx + 1}_input.bin")
-        bin_file_name.write_bytes(bin_data)
+    written = generate_seeds(
+        [prompt_content, harness_prompt_content],
+        rounds,
+        query_llm_for_code,
+        output_dir,
+        max_workers=llm_workers,
+        requests_per_minute=llm_rpm,
+    )
+    print(f"Generated {written} distinct inputs in {output_dir}")
 
 
 def generate_dict_words(filenames: list[str | PathLike]) -> list[str]:
@@ -847,49 +937,62 @@ def loads_call_graph(s: str) -> CallGraph:
 
 
 def find_call_sequences_to_target(
-    cg: CallGraph, entry: CgNode, target: HookTarget
+    cg: CallGraph,
+    entry: CgNode,
+    target: HookTarget,
+    max_depth: int = MAX_CALL_DEPTH,
+    max_paths: int = MAX_CALL_PATHS,
 ) -> list[list[CgEdge]]:
-    if entry not in cg.nodes.values():
+    entry_labels = cg.labels_by_node.get(entry, [])
+    if not entry_labels:
         print(f"{entry} not found in call graph")
         return []
 
-    entry_labels = [k for k, v in cg.nodes.items() if v == entry]
     assert len(entry_labels) == 1, "found multiple entries"
     entry_label = entry_labels[0]
 
-    edges = defaultdict(list)
-    for e in cg.edges:
-        edges[e.caller].append(e)
+    target_labels = set(cg.labels_by_node.get(target.node, []))
 
-    target_labels = [k for k, v in cg.nodes.items() if v == target.node]
+    # Only nodes that can still reach a target are worth extending a path to
+    distances = cg.distances_to(list(target_labels))
+    if entry_label not in distances or distances[entry_label] > max_depth:
+        return []
 
     paths = []
 
-    # Each path would be represented as a list[Edge]. nodes_on_path is just used to
-    # avoid finding duplicate paths.
-
-    nodes_on_path = deque()
-    edges_on_path = deque()
-
-    def dfs(node: str) -> None:
-        nodes_on_path.append(node)
+    # Best-first search over simple paths: a partial path is ranked by its
+    # length plus the distance of its last node to the closest target, so
+    # complete paths come out shortest first. Each path is represented as a
+    # list[Edge]; nodes_on_path is used to keep paths free of cycles.
+    counter = 0
+    heap = [(distances[entry_label], counter, entry_label, (), frozenset([entry_label]))]
+    expansions = 0
+    while heap and len(paths) < max_paths and expansions < MAX_PATH_EXPANSIONS:
+        _, _, node, edges_on_path, nodes_on_path = heapq.heappop(heap)
+        expansions += 1
 
         if node in target_labels:
             paths.append(list(edges_on_path))
-            return
-
-        for edge in edges[node]:
-            if edge.callee not in nodes_on_path:
-                edges_on_path.append(edge)
-
-                dfs(edge.callee)
-
-                edges_on_path.pop()
-
-        nodes_on_path.pop()
+            continue
 
-    # new edges on path = a list of CgNodes
-    dfs(entry_label)
+        for edge in cg.out_edges.get(node, []):
+            callee = edge.callee
+            if callee in nodes_on_path or callee not in distances:
+                continue
+            depth = len(edges_on_path) + 1
+            if depth + distances[callee] > max_depth:
+                continue
+            counter += 1
+            heapq.heappush(
+                heap,
+                (
+                    depth + distances[callee],
+                    counter,
+                    callee,
+                    edges_on_path + (edge,),
+                    nodes_on_path | {callee},
+                ),
+            )
 
     return paths
 
@@ -904,7 +1007,7 @@ def formulate_prompt(input_name: str, input_type: str, icfg_desc: str) -> str:
     )
 
 
-def query_llm_and_run_response(prompt: str) -> bytes | None:
+def query_llm_for_code(prompt: str) -> str | None:
     messages = [{"content": prompt, "role": "user"}]
     key = os.getenv("LITELLM_KEY", None)
     response = completion(
@@ -920,33 +1023,10 @@ def query_llm_and_run_response(prompt: str) -> bytes | None:
 
     try:
         blocks = extract_markdown_code_blocks(content)
-        code = blocks[0]
+        return blocks[0]
     except Exception:
         return None
 
-    with NamedTemporaryFile(buffering=0, suffix=".py") as f:
-        f.write(code.encode())
-
-        with TemporaryDirectory() as tmp_dir:
-            cp = subprocess.run(
-                ["timeout", "-k", "5s", "10s", "python3", f.name],
-                cwd=tmp_dir,
-                stdin=subprocess.DEVNULL,
-                text=True,
-                capture_output=True,
-            )
-
-            if cp.returncode != 0:
-                return None
-
-            bin_path = Path(tmp_dir, "input.bin")
-            if not bin_path.is_file():
-                return None
-
-            bin = bin_path.read_bytes()
-
-    return bin
-
 
 def extract_json_code_blocks(content: str) -> str:
     # Extracts JSON code blocks from a markdown string.
@@ -0,0 +1,224 @@
+from __future__ import annotations
+
+import hashlib
+import os
+import signal
+import subprocess
+import sys
+import threading
+import time
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from pathlib import Path
+from queue import Empty, SimpleQueue
+from tempfile import TemporaryDirectory
+
+# A warm interpreter blocks on stdin until it receives the generator code and
+# then runs it as __main__ inside its own scratch directory.
+SANDBOX_BOOTSTRAP = """
+import os, sys
+code = sys.stdin.read()
+os.chdir(sys.argv[1])
+sys.argv = ["generator.py"]
+exec(compile(code, "generator.py", "exec"), {"__name__": "__main__"})
+"""
+
+
+class RateLimiter:
+    """Bounds the number of in-flight LLM requests and their start rate."""
+
+    def __init__(self, max_concurrent: int, requests_per_minute: float) -> None:
+        self._slots = threading.BoundedSemaphore(max(1, max_concurrent))
+        self._interval = 60.0 / requests_per_minute if requests_per_minute > 0 else 0.0
+        self._lock = threading.Lock()
+        self._next_start = 0.0
+
+    def __enter__(self) -> RateLimiter:
+        self._slots.acquire()
+        with self._lock:
+            now = time.monotonic()
+            start = max(now, self._next_start)
+            self._next_start = start + self._interval
+        if start > now:
+            time.sleep(start - now)
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self._slots.release()
+
+
+class _WarmInterpreter:
+    def __init__(self) -> None:
+        self.work_dir = TemporaryDirectory(prefix="sym-llm-gen-")
+        self.process = subprocess.Popen(
+            ["python3", "-c", SANDBOX_BOOTSTRAP, self.work_dir.name],
+            cwd=self.work_dir.name,
+            stdin=subprocess.PIPE,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+            text=True,
+            start_new_session=True,
+        )
+
+    def run(self, code: str, timeout: float) -> bytes | None:
+        try:
+            self.process.communicate(code, timeout=timeout)
+        except subprocess.TimeoutExpired:
+            self.kill()
+            return None
+
+        if self.process.returncode != 0:
+            return None
+
+        bin_path = Path(self.work_dir.name, "input.bin")
+        if not bin_path.is_file():
+            return None
+        return bin_path.read_bytes()
+
+    def kill(self) -> None:
+        try:
+            os.killpg(self.process.pid, signal.SIGKILL)
+        except ProcessLookupError:
+            pass
+        self.process.wait()
+
+    def close(self) -> None:
+        if self.process.poll() is None:
+            self.kill()
+        self.work_dir.cleanup()
+
+
+class SandboxPool:
+    """A bounded pool of pre-started interpreters for generator scripts.
+
+    Every interpreter runs exactly one script in a fresh scratch directory and
+    is then retired; its replacement is started in the background, so scripts
+    never share state while interpreter start-up stays off the critical path.
+    """
+
+    def __init__(self, size: int, timeout: float = 10.0) -> None:
+        self.timeout = timeout
+        self._slots = threading.BoundedSemaphore(max(1, size))
+        self._warm: SimpleQueue[_WarmInterpreter] = SimpleQueue()
+        self._lock = threading.Lock()
+        self._closed = False
+        self._replacers: set[threading.Thread] = set()
+        for _ in range(max(1, size)):
+            self._warm.put(_WarmInterpreter())
+
+    def run(self, code: str) -> bytes | None:
+        with self._slots:
+            try:
+                interpreter = self._warm.get_nowait()
+            except Empty:
+                interpreter = _WarmInterpreter()
+            try:
+                return interpreter.run(code, self.timeout)
+            finally:
+                self._replace(interpreter)
+
+    def _replace(self, interpreter: _WarmInterpreter) -> None:
+        with self._lock:
+            if self._closed:
+                interpreter.close()
+                return
+            replacer = threading.Thread(
+                target=self._start_replacement, args=(interpreter,), daemon=True
+            )
+            self._replacers.add(replacer)
+        replacer.start()
+
+    def _start_replacement(self, interpreter: _WarmInterpreter) -> None:
+        try:
+            interpreter.close()
+            replacement = _WarmInterpreter()
+            with self._lock:
+                if not self._closed:
+                    self._warm.put(replacement)
+                    return
+            replacement.close()
+        finally:
+            with self._lock:
+                self._replacers.discard(threading.current_thread())
+
+    def close(self) -> None:
+        with self._lock:
+            self._closed = True
+            replacers = list(self._replacers)
+        for replacer in replacers:
+            replacer.join()
+        while True:
+            try:
+                self._warm.get_nowait().close()
+            except Empty:
+                break
+
+    def __enter__(self) -> SandboxPool:
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+class SeedWriter:
+    """Writes generated inputs to the seed directory, dropping duplicates."""
+
+    def __init__(self, output_dir: Path) -> None:
+        self.output_dir = output_dir
+        self._seen: set[str] = set()
+        self._lock = threading.Lock()
+
+    def write(self, name: str, data: bytes) -> bool:
+        digest = hashlib.sha256(data).hexdigest()
+        with self._lock:
+            if digest in self._seen:
+                return False
+            self._seen.add(digest)
+        self.output_dir.joinpath(name).write_bytes(data)
+        return True
+
+
+def generate_seeds(
+    prompts: list[str],
+    rounds: int,
+    query: Callable[[str], str | None],
+    output_dir: Path,
+    max_workers: int = 8,
+    requests_per_minute: float = 60.0,
+    sandboxes: int | None = None,
+) -> int:
+    """Query every prompt [rounds] times concurrently and store the inputs.
+
+    The answer to the n-th query of round i is written as
+    `{len(prompts) * i + n}_input.bin` as soon as it is produced.
+    Returns the number of distinct inputs written.
+    """
+    limiter = RateLimiter(max_workers, requests_per_minute)
+    writer = SeedWriter(output_dir)
+    sandboxes = sandboxes or max(1, min(max_workers, os.cpu_count() or 1))
+
+    with SandboxPool(sandboxes) as pool:
+
+        def generate(index: int, prompt: str) -> bool:
+            with limiter:
+                code = query(prompt)
+            if code is None:
+                return False
+            data = pool.run(code)
+            if data is None:
+                return False
+            return writer.write(f"{index}_input.bin", data)
+
+        written = 0
+        with ThreadPoolExecutor(max_workers=max(1, max_workers)) as executor:
+            futures = [
+                executor.submit(generate, len(prompts) * idx + n, prompt)
+                for idx in range(rounds)
+                for n, prompt in enumerate(prompts)
+            ]
+            for future in as_completed(futures):
+                try:
+                    written += future.result()
+                except Exception as e:
+                    print(f"input generation failed: {e}", file=sys.stderr)
+    return written
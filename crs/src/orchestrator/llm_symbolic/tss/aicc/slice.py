@@ -2,13 +2,16 @@ import hashlib
 import json
 import os
 import re
+import shutil
 import sys
+import threading
 from concurrent.futures import ThreadPoolExecutor
-from os import PathLike, makedirs
+from os import PathLike
 from pathlib import Path
 from pprint import pprint
 from queue import SimpleQueue
 from subprocess import CalledProcessError, run
+from tempfile import TemporaryDirectory
 
 import pydot
 
@@ -17,6 +20,16 @@ if not JOERN_DIR.is_dir():
     print(f"{JOERN_DIR!s} is not a directory", file=sys.stderr)
     exit(0)
 
+EXPORT_SCRIPT = Path(__file__).with_name("export_ddg.sc")
+DEFAULT_DATA_DIR = Path(
+    os.environ.get(
+        "SYM_LLM_DDG_CACHE",
+        Path(__file__).parent.parent.parent.joinpath(".data", "ddg"),
+    )
+)
+# bump when the export format changes to invalidate cached graphs
+DDG_CACHE_VERSION = "joern-ddg-1"
+
 
 def parse_ddg_tag(tag: str) -> tuple[str, int]:
     pattern = r"<\((.*?),(.*)<SUB>(\d+)</SUB>>"
@@ -165,13 +178,14 @@ def GetPreNodes(line, pdg):
     return pre_lines
 
 
-def execute_command(command: list[str]) -> None:
+def execute_command(command: list[str], cwd: str | None = None) -> None:
     try:
         run(
             command,
             text=True,
             capture_output=True,
             check=True,
+            cwd=cwd,
         )
     except CalledProcessError as e:
         print(e.stderr, file=sys.stderr)
@@ -185,52 +199,111 @@ class Slicer:
         data_dir: str | PathLike | None = None,
         num_processes: int = 1,
     ):
-        self.data_dir = data_dir or ".data/"
-
-        makedirs(self.data_dir, exist_ok=True)
-
-        cp_src = cp_src or []
+        # DDGs are keyed by the content of the source file, so the cache
+        # directory is shared by every run on the same (or a similar) project
+        self.data_dir = Path(data_dir or DEFAULT_DATA_DIR)
+        self.data_dir.mkdir(parents=True, exist_ok=True)
 
-        def generate_data(filename):
-            hv = hashlib.sha1(filename.encode("utf-8")).hexdigest()
-            bin_file = os.path.join(self.data_dir, f"{hv}.bin")
-            dots_dir = self.target_dots_dir(filename)
-
-            self.cpg_gen(filename, bin_file)
-            self.dot_gen(bin_file, dots_dir)
+        self._file_hashes: dict[str, str] = {}
+        self._pdg_by_file: dict[str, dict[str, PdgGraph]] = {}
+        self._lock = threading.Lock()
 
+        cp_src = list(dict.fromkeys(cp_src or []))
         files = [f for f in cp_src if not os.path.exists(self.target_dots_dir(f))]
-
-        # each thread will start a process
-        with ThreadPoolExecutor(max_workers=num_processes) as executor:
-            executor.map(generate_data, files)
+        if not files:
+            return
+
+        # one joern session per chunk instead of one per file
+        num_chunks = max(1, min(num_processes, len(files)))
+        chunks = [files[i::num_chunks] for i in range(num_chunks)]
+        with ThreadPoolExecutor(max_workers=num_chunks) as executor:
+            for future in [executor.submit(self.ddg_gen, c) for c in chunks]:
+                try:
+                    future.result()
+                except CalledProcessError:
+                    print(
+                        "failed to export ddg for a chunk of sources", file=sys.stderr
+                    )
+
+    def file_hash(self, filename: str) -> str:
+        if filename not in self._file_hashes:
+            hv = hashlib.sha1(DDG_CACHE_VERSION.encode("utf-8"))
+            hv.update(Path(filename).read_bytes())
+            self._file_hashes[filename] = hv.hexdigest()
+        return self._file_hashes[filename]
 
     def target_dots_dir(self, filename):
-        hv = hashlib.sha1(filename.encode("utf-8")).hexdigest()
-        return os.path.join(self.data_dir, f"{hv}_dots")
-
-    def cpg_gen(self, filename, save_to):
-        joern_parse = str(JOERN_DIR.joinpath("joern-parse"))
-
-        # save_to = os.path.join(self.data_dir, output_name)
-
-        cmd = [joern_parse, filename, "-o", save_to]
-        execute_command(cmd)
-
-    def dot_gen(self, bin_file, dots_dir):
-        joern_export = str(JOERN_DIR.joinpath("joern-export"))
-
-        # save_to = os.path.join(self.data_dir, output_name)
-
-        cmd = [
-            joern_export,
-            bin_file,
-            "--repr",
-            "ddg",
-            "--out",
-            dots_dir,
-        ]
-        execute_command(cmd)
+        return os.path.join(self.data_dir, f"{self.file_hash(filename)}_dots")
+
+    def ddg_gen(self, filenames: list[str]) -> None:
+        """Export the DDGs of all [filenames] in a single joern session."""
+        with TemporaryDirectory(dir=self.data_dir) as tmp_dir:
+            input_dir = Path(tmp_dir, "src")
+            output_dir = Path(tmp_dir, "dots")
+            hashes = {}
+            for filename in filenames:
+                hv = self.file_hash(filename)
+                if hv in hashes:
+                    continue
+                hashes[hv] = filename
+                # keep the file name, java frontends care about it
+                src_dir = input_dir.joinpath(hv)
+                src_dir.mkdir(parents=True, exist_ok=True)
+                shutil.copyfile(filename, src_dir.joinpath(Path(filename).name))
+            output_dir.mkdir()
+
+            # joern keeps its workspace in the working directory, every chunk
+            # gets its own so that concurrent sessions do not share projects
+            joern = str(JOERN_DIR.joinpath("joern"))
+            cmd = [
+                joern,
+                "--script",
+                str(EXPORT_SCRIPT),
+                "--param",
+                f"inputDir={input_dir}",
+                "--param",
+                f"outDir={output_dir}",
+                "--param",
+                f"projectName={Path(tmp_dir).name}",
+            ]
+            execute_command(cmd, cwd=tmp_dir)
+
+            # publish complete directories only, files without methods get an
+            # empty one so that they are not parsed again
+            for hv, filename in hashes.items():
+                dots_dir = output_dir.joinpath(hv)
+                dots_dir.mkdir(exist_ok=True)
+                try:
+                    os.replace(dots_dir, self.target_dots_dir(filename))
+                except OSError:
+                    # another slicer already published the same content
+                    pass
+
+    def load_pdgs(self, filename: str) -> dict[str, PdgGraph]:
+        """Return the method name -> PDG index of a file, parsing it once."""
+        with self._lock:
+            hv = self.file_hash(filename)
+            if hv not in self._pdg_by_file:
+                dots_dir = self.target_dots_dir(filename)
+                if not os.path.isdir(dots_dir):
+                    return {}
+                graph_data_by_method = {}
+                for fn in sorted(os.listdir(dots_dir)):
+                    tmp_graph_data = pydot.graph_from_dot_file(
+                        os.path.join(dots_dir, fn)
+                    )
+                    assert tmp_graph_data is not None
+                    g_name = tmp_graph_data[0].get_name().strip('"')
+                    graph_data_by_method[g_name] = tmp_graph_data
+
+                pdgs = {}
+                for g_name, graph_data in graph_data_by_method.items():
+                    try:
+                        pdgs[g_name] = PdgGraph(graph_data)
+                    except KeyError:
+                        continue
+                self._pdg_by_file[hv] = pdgs
+            return self._pdg_by_file[hv]
 
     def do_slice_by_line(self, pdg_graph, lineno):
         return self.slicing(lineno, pdg_graph)
@@ -349,23 +422,12 @@ class Slicer:
         # tree-sitter is 0-based, while joern line-number is 1-based
         line_number += 1
 
-        # select a graph dot file using method name
-        dots_dir = self.target_dots_dir(filename)
-        all_dot_files = os.listdir(dots_dir)
-        graph_data_by_method = {}
-        for fn in all_dot_files:
-            tmp_graph_data = pydot.graph_from_dot_file(os.path.join(dots_dir, fn))
-            assert tmp_graph_data is not None
-            g_name = tmp_graph_data[0].get_name().strip('"')
-            graph_data_by_method[g_name] = tmp_graph_data
-
         try:
             # slicer
-            graph_data = graph_data_by_method.get(method_name)
+            pdg = self.load_pdgs(filename).get(method_name)
 
-            if graph_data is None:
+            if pdg is None:
                 return []
-            pdg = PdgGraph(graph_data)
             # if line no is -1, slice the whole method, otherwise slice the line
             if line_number == -1:
                 ddg_nodes = self.ddg_forward_slice(line_number, pdg)
@@ -476,8 +476,7 @@ def main(
     prompts = []
 
     sources = Path(source_list_file).read_text().splitlines()
-    dots_dir = Path(output_dir, "ddg-dots")
-    slicer = Slicer(sources, dots_dir, num_processes)
+    slicer = Slicer(sources, num_processes=num_processes)
 
     for i_path in icfg_paths:
         desc = i_path.compute_description(slicer)
@@ -1,11 +1,12 @@
 import argparse
 import glob
 import json
+import math
 import os
 import re
 import subprocess as sp
+from collections import defaultdict
 
-import numpy as np
 import polars as pl
 
 parser = argparse.ArgumentParser(
@@ -58,65 +59,41 @@ if args.experiment_dir is not None:
     experiment_directories += args.experiment_dir.split(",")
 
 
-def parse_file(fname):
-    df = (
-        pl.read_csv(fname, has_header=False, new_columns=["address"])
-        .group_by("address")
-        .count()
-    )
-    df = df.select("count").transpose(column_names=df["address"])
-
-    df = df.cast(pl.UInt32)
-    df = df.select(sorted(df.columns))
-    return df
-
-
-def traces_to_df(dirname_a, dirname_b, crashing_name) -> pl.DataFrame:
-    crashing_trace_fnames = glob.glob(f"{dirname_a}/*")
-    non_crashing_trace_fnames = glob.glob(f"{dirname_b}/*")
-
-    crashing_traces = []
-    for fname in crashing_trace_fnames:
+def count_traces(dirname, executed):
+    """
+    Streams the traces of a directory into the number of traces that reached every
+    address, returns the number of traces; a trace is read line by line and only
+    its set of addresses is kept
+    """
+    total = 0
+    for fname in glob.glob(f"{dirname}/*"):
         print(fname)
+        addresses = set()
         try:
-            crashing_traces += [parse_file(fname)]
-        except Exception:
+            with open(fname, "r") as trace_file:
+                for line in trace_file:
+                    address = line.strip()
+                    if address:
+                        addresses.add(address)
+        except (OSError, UnicodeDecodeError):
+            addresses = set()
+        if not addresses:
             print(f"failed to read {fname}")
-
-    crashing_df = pl.concat(crashing_traces, how="diagonal").with_columns(
-        pl.lit(True).alias(crashing_name)
-    )
-
-    non_crashing_traces = []
-    for fname in non_crashing_trace_fnames:
-        print(fname)
-        try:
-            non_crashing_traces += [parse_file(fname)]
-        except Exception:
-            print(f"failed to read {fname}")
-    non_crashing_df = pl.concat(non_crashing_traces, how="diagonal").with_columns(
-        pl.lit(False).alias(crashing_name)
-    )
-    df = pl.concat([non_crashing_df, crashing_df], how="diagonal")
-    cols = df.columns
-    cols.remove(crashing_name)
-    df = df.select([crashing_name] + sorted(cols))
-    df = df.fill_null(0)
-    return df
+            continue
+        total += 1
+        for address in addresses:
+            executed[address] += 1
+    return total
 
 
-crashing_name = os.path.basename(args.crashdir.rstrip("/"))
 out_dir = os.path.commonprefix(
     [os.path.abspath(args.crashdir), os.path.abspath(args.bendir)]
 )
-df = traces_to_df(args.crashdir, args.bendir, crashing_name)
-
-df = df > 0
-
-counts = df.group_by(crashing_name).count()
 
-total_failing = counts.filter(pl.col(crashing_name))["count"][0]
-total_passing = counts.filter(~pl.col(crashing_name))["count"][0]
+executed_failing = defaultdict(int)
+executed_passing = defaultdict(int)
+total_failing = count_traces(args.crashdir, executed_failing)
+total_passing = count_traces(args.bendir, executed_passing)
 
 print("")
 print("total crashing traces:")
@@ -124,22 +101,20 @@ print(total_failing)
 print("total non-crashing traces:")
 print(total_passing)
 
-efs = df.filter(pl.col(crashing_name)).drop(crashing_name).sum()
-eps = df.filter(~pl.col(crashing_name)).drop(crashing_name).sum()
-nfs = ((df.filter(pl.col(crashing_name)).drop(crashing_name)) == False).sum()  # noqa
-nps = ((df.filter(~pl.col(crashing_name)).drop(crashing_name)) == False).sum()  # noqa
 
-ochiai: pl.DataFrame
+def ochiai(address):
+    efs = executed_failing.get(address, 0)
+    eps = executed_passing.get(address, 0)
+    if not efs:
+        return 0.0
+    return efs / math.sqrt(total_failing * (efs + eps))
 
-ochiai = efs / ((total_failing) * (efs + eps)).map_rows(np.sqrt)
 
-scores = ochiai.transpose(
-    include_header=True, header_name="address", column_names=["score"]
+addresses = sorted(set(executed_failing) | set(executed_passing))
+scores = pl.DataFrame(
+    {"address": addresses, "score": [ochiai(address) for address in addresses]},
+    schema={"address": pl.Utf8, "score": pl.Float64},
 )
-# scores = scores.with_columns(
-#      pl.col("file_line").str.split(":").list.get(1).cast(pl.UInt32).alias("line"),
-#      pl.col("file_line").str.split(":").list.get(0).alias("file")
-# )
 
 scores = scores.sort("score", descending=True)
 print("Calculated and sorted scores")
@@ -1,8 +1,62 @@
 import os
 import pathlib
 import shutil
+import time
 
 from app import utilities, definitions, emitter, tester, values, debugger
+from app import unidiff
+
+# content of the files changed by the patch applied in memory, for reset_patch
+original_list = dict()
+
+
+def find_patched_file(file_patch, src_path, file_count):
+    src_dir = values.CONF_SOURCE_DIR
+    file_path = unidiff.source_path(file_patch, src_dir)
+    if file_path:
+        return file_path
+    if file_count == 1:
+        if values.CONF_SOURCE_FILE:
+            return os.path.join(src_dir or "", values.CONF_SOURCE_FILE)
+        if src_path and os.path.isfile(src_path):
+            return src_path
+    return None
+
+
+def use_memory_patch(src_path, patch_file):
+    """Applies a unified diff without running patch, False if any of its hunks
+    does not apply exactly (up to whitespace and line offsets)"""
+    file_patch_list = unidiff.read(patch_file)
+    if not file_patch_list:
+        return False
+    patched_list = []
+    for file_patch in file_patch_list:
+        if file_patch.is_new_file() or file_patch.is_deleted_file():
+            return False
+        file_path = find_patched_file(file_patch, src_path, len(file_patch_list))
+        if not file_path or not os.path.isfile(file_path):
+            return False
+        with open(file_path, "rb") as source_file:
+            content = source_file.read()
+        patched = unidiff.apply(content, file_patch)
+        if patched is None:
+            return False
+        patched_list.append((file_path, content, patched))
+    for file_path, content, patched in patched_list:
+        original_list.setdefault(file_path, content)
+        with open(file_path, "wb") as source_file:
+            source_file.write(patched)
+    return True
+
+
+def reset_memory_patch():
+    if not original_list:
+        return False
+    for file_path, content in original_list.items():
+        with open(file_path, "wb") as source_file:
+            source_file.write(content)
+    original_list.clear()
+    return True
 
 
 def use_diff_patch(src_path, patch_file, is_reverse=False, is_unified=True):
@@ -71,7 +125,9 @@ def apply_patch(src_path, patch_file, is_unified=True):
         patch_successful = patch_status == 0
         os.chdir(cur_dir)
     else:
-        patch_successful = use_diff_patch(src_path, patch_file, False, is_unified)
+        patch_successful = use_memory_patch(src_path, patch_file)
+        if not patch_successful:
+            patch_successful = use_diff_patch(src_path, patch_file, False, is_unified)
         if not patch_successful:
             is_unified = False
             patch_successful = use_diff_patch(src_path, patch_file, False, is_unified)
@@ -97,6 +153,8 @@ def reset_patch(src_path, patch_file, is_unified=True):
         reset_status = utilities.execute_command(reset_command)
         reset_successful = reset_status == 0
         os.chdir(cur_dir)
+    elif reset_memory_patch():
+        reset_successful = True
     else:
         reset_successful = use_diff_patch(src_path, patch_file, True, is_unified)
         if not reset_successful:
@@ -136,12 +194,18 @@ def validate_patch(
     is_correct = False
     is_high_quality = False
     is_unified = True
+    failed_tests = []
+    build_time = None
 
     has_patched, is_unified = apply_patch(src_file, patch_file, is_unified=is_unified)
     if has_patched:
+        build_start = time.time()
         is_compiling = compile_patch(binary_path)
+        build_time = round(time.time() - build_start, 3)
         if is_compiling:
-            fixed_failed = tester.run_test_oracle(test_oracle, test_id_list, patch_file)
+            fixed_failed = tester.run_test_oracle(
+                test_oracle, test_id_list, patch_file, failed_tests
+            )
             if fixed_failed:
                 is_plausible = tester.run_test_script(
                     values.CONF_PUB_TEST_SCRIPT, patch_file
@@ -154,6 +218,12 @@ def validate_patch(
                         is_high_quality = tester.run_test_script(
                             values.CONF_ADV_TEST_SCRIPT, patch_file
                         )
+                        if not is_high_quality:
+                            failed_tests.append(values.CONF_ADV_TEST_SCRIPT)
+                    else:
+                        failed_tests.append(values.CONF_PVT_TEST_SCRIPT)
+                else:
+                    failed_tests.append(values.CONF_PUB_TEST_SCRIPT)
     reset_patch(src_file, patch_file, is_unified=is_unified)
     emitter.highlight(f"\t\t\t\tapplied:{has_patched}")
     emitter.highlight(f"\t\t\t\tcompiled:{is_compiling}")
@@ -169,4 +239,6 @@ def validate_patch(
         is_plausible,
         is_correct,
         is_high_quality,
+        failed_tests,
+        build_time,
     )
@@ -53,6 +53,12 @@ def read_arg(argument_list):
                 values.CONF_ONLY_VALIDATE = True
             elif definitions.ARG_PARTITION in arg:
                 values.CONF_PARTITION = True
+            elif definitions.ARG_NO_VERDICT_STORE in arg:
+                values.CONF_NO_VERDICT_STORE = True
+            elif definitions.ARG_GDB_SERVER in arg:
+                values.CONF_GDB_SERVER = True
+            elif definitions.ARG_COMPLETE_TEST_RUN in arg:
+                values.CONF_COMPLETE_TEST_RUN = True
             elif definitions.ARG_TEST_ORACLE in arg:
                 values.CONF_TEST_ORACLE = str(arg).replace(
                     definitions.ARG_TEST_ORACLE, ""
@@ -184,6 +190,14 @@ def read_conf_file():
                 values.CONF_PATCH_PER_DIR_LIMIT = int(
                     configuration.replace(definitions.CONF_PATCH_PER_DIR_LIMIT, "")
                 )
+            elif definitions.CONF_VERDICT_STORE in configuration:
+                values.CONF_VERDICT_STORE = configuration.replace(
+                    definitions.CONF_VERDICT_STORE, ""
+                )
+            elif definitions.CONF_TEST_STATISTICS in configuration:
+                values.CONF_TEST_STATISTICS = configuration.replace(
+                    definitions.CONF_TEST_STATISTICS, ""
+                )
             elif definitions.CONF_TAG in configuration:
                 values.CONF_TAG = configuration.replace(definitions.CONF_TAG, "")
             elif definitions.CONF_EXEC_MODE in configuration:
@@ -333,6 +347,18 @@ def update_configuration():
         values.DEFAULT_TAG = values.CONF_TAG
     if values.CONF_TRACE_MODE:
         values.DEFAULT_TRACE_MODE = values.CONF_TRACE_MODE
+    if values.CONF_NO_VERDICT_STORE:
+        values.DEFAULT_USE_VERDICT_STORE = False
+    if values.CONF_GDB_SERVER:
+        values.DEFAULT_USE_GDB_SERVER = True
+    if values.CONF_COMPLETE_TEST_RUN:
+        values.DEFAULT_COMPLETE_TEST_RUN = True
+    values.DEFAULT_TEST_STATISTICS = (
+        values.CONF_TEST_STATISTICS or definitions.FILE_TEST_STATISTICS
+    )
+    values.DEFAULT_VERDICT_STORE = (
+        values.CONF_VERDICT_STORE or definitions.FILE_VERDICT_STORE
+    )
     if values.CONF_ONLY_VALIDATE:
         values.DEFAULT_ONLY_VALIDATE = values.CONF_ONLY_VALIDATE
     if values.CONF_TEST_ORACLE:
@@ -409,6 +435,11 @@ def print_configuration():
     emitter.configuration("test oracle", values.CONF_TEST_ORACLE)
     emitter.configuration("test suite", values.CONF_TEST_SUITE)
     emitter.configuration("execution mode", values.DEFAULT_EXEC_MODE)
+    emitter.configuration(
+        "verdict store",
+        values.DEFAULT_VERDICT_STORE if values.DEFAULT_USE_VERDICT_STORE else None,
+    )
+    emitter.configuration("test statistics", values.DEFAULT_TEST_STATISTICS)
     emitter.configuration("patch command", values.CONF_PATCH_COMMAND)
     emitter.configuration("patch script", values.CONF_PATCH_SCRIPT)
     emitter.configuration("reset command", values.CONF_RESET_COMMAND)
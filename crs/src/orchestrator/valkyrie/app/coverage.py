@@ -1,15 +1,6 @@
 import os
 from app import definitions, values, emitter, parallel, utilities, gdb, e9patch
-
-
-def process_coverage(coverage_file_path):
-    coverage_info = dict()
-    with open(coverage_file_path, "r") as trace_file:
-        content = trace_file.readlines()
-        for line in content:
-            address, count = line.strip().replace("\n", "").split(":")
-            coverage_info[address] = count
-    return coverage_info
+from app import trace_store
 
 
 def coverage_e9(test_oracle, test_id_list, patch_id, binary_path):
@@ -28,11 +19,10 @@ def coverage_e9(test_oracle, test_id_list, patch_id, binary_path):
             test_oracle, test_id, frontend_path, patch_id
         )
         utilities.execute_command(test_command)
-        save_file = definitions.DIRECTORY_OUTPUT + "/p{0}-t{1}.coverage".format(
+        save_file = definitions.DIRECTORY_OUTPUT + "/p{0}-t{1}.coverage.npy".format(
             patch_id, test_id
         )
-        utilities.execute_command("cp {0} {1}".format(coverage_file, save_file))
-        coverage_info[test_id] = process_coverage(coverage_file)
+        coverage_info[test_id] = trace_store.save_coverage(coverage_file, save_file)
     return patch_id, coverage_info
 
 
@@ -51,9 +41,8 @@ def coverage_e9_suite(test_suite, test_id_list, patch_id, timeout):
         utilities.execute_command(
             coverage_command, timeout=timeout, output_log=output_file
         )
-        save_file = definitions.DIRECTORY_OUTPUT + "/p{0}-t{1}.coverage".format(
+        save_file = definitions.DIRECTORY_OUTPUT + "/p{0}-t{1}.coverage.npy".format(
             patch_id, test_id
         )
-        utilities.execute_command("cp {0} {1}".format(coverage_file, save_file))
-        coverage_info[test_id] = process_coverage(coverage_file)
+        coverage_info[test_id] = trace_store.save_coverage(coverage_file, save_file)
     return patch_id, coverage_info
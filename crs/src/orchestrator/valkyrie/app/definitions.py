@@ -8,6 +8,7 @@ DIR_EXPERIMENT = DIR_MAIN + "/experiments"
 DIR_LOGS = DIR_MAIN + "/logs"
 DIRECTORY_OUTPUT = DIR_MAIN + "/output"
 DIRECTORY_LIB = DIR_MAIN + "/lib"
+DIRECTORY_GDB_JOBS = DIRECTORY_OUTPUT + "/gdb-jobs"
 FILE_MAIN_LOG = ""
 FILE_ERROR_LOG = DIR_LOGS + "/log-error"
 FILE_LAST_LOG = DIR_LOGS + "/log-latest"
@@ -17,10 +18,13 @@ FILE_ANALYSIS_LOG = DIR_LOGS + "/log-analysis"
 FILE_GDB_PATCH_SCRIPT = "/tmp/gdb_patch_script"
 FILE_GDB_SNAPSHOT_SCRIPT = "/tmp/gdb_script_snapshot"
 FILE_GDB_FRONTEND = "/tmp/gdb_frontend"
+FILE_GDB_CLIENT = DIR_MAIN + "/bin/gdb_client"
 FILE_INVALID_LIST = DIR_CWD + "/invalid_list"
 FILE_COMPILE_LIST = DIR_CWD + "/compile_list"
 FILE_PATCH_SCORE = DIR_CWD + "/patch-score"
 FILE_RESULT_JSON = DIR_CWD + "/result.json"
+FILE_VERDICT_STORE = DIR_RESULT + "/verdicts.sqlite"
+FILE_TEST_STATISTICS = DIR_RESULT + "/test-statistics"
 
 
 # ----------------- KEY DEFINITIONS -------------------
@@ -70,6 +74,9 @@ ARG_TEST_TIMEOUT = "--test-timeout="
 ARG_PARTITION = "--partition"
 ARG_TIMEOUT = "--timeout="
 ARG_TAG = "--tag="
+ARG_NO_VERDICT_STORE = "--no-verdict-store"
+ARG_GDB_SERVER = "--gdb-server"
+ARG_COMPLETE_TEST_RUN = "--complete-test-run"
 
 
 CONF_DEBUG_MODE = "debug:"
@@ -99,6 +106,8 @@ CONF_TIMEOUT = "timeout:"
 CONF_TAG = "tag:"
 CONF_PATCH_LIMIT = "patch_limit:"
 CONF_PATCH_PER_DIR_LIMIT = "patch_per_dir_limit:"
+CONF_VERDICT_STORE = "verdict_store:"
+CONF_TEST_STATISTICS = "test_statistics:"
 
 FILE_META_DATA = None
 FILE_CONFIGURATION = ""
@@ -110,6 +119,17 @@ VALUE_OPERATE_MODE_REWRITE = "rewrite"
 VALUE_OPERATE_MODE_COMPILE = "compile"
 VALUE_OPERATE_MODE_GDB = "gdb"
 
+# label of each class list of validator.validate_patches in result.json
+VERDICT_CLASSES = [
+    "invalid patch",
+    "cannot build",
+    "incorrect patch",
+    "fixed failing",
+    "pass public",
+    "pass private",
+    "pass adversarial",
+]
+
 OPTIONS_PATCH_MODE = [
     VALUE_OPERATE_MODE_REWRITE,
     VALUE_OPERATE_MODE_COMPILE,
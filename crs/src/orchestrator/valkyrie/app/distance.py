@@ -1,5 +1,5 @@
 import os
-from app import reader
+from app import reader, trace_store
 
 
 import sys
@@ -82,34 +82,26 @@ def edit_distance(patch_list):
 
 
 def trace_distance(patched_list, original_list):
+    """Per test normalized LCS distance of the traces saved by trace_store"""
     distance_info = dict()
     for t_id in patched_list:
-        orig_trace = original_list[t_id]
-        patched_trace = patched_list[t_id]
+        orig_trace = trace_store.load(original_list[t_id]).tolist()
+        patched_trace = trace_store.load(patched_list[t_id]).tolist()
+        trace_length = max(len(patched_trace), len(orig_trace))
+        if not trace_length:
+            distance_info[t_id] = 0
+            continue
         lcs_distance = lcs(orig_trace, patched_trace)
-        distance = 1 - (lcs_distance / max(len(patched_trace), len(orig_trace)))
-        distance_info[t_id] = distance
+        distance_info[t_id] = 1 - (lcs_distance / trace_length)
     return distance_info
 
 
 def coverage_distance(patched_list, original_list):
     distance_info = dict()
     for t_id in patched_list:
-        distance = 0
-        orig_coverage = original_list[t_id]
-        patched_coverage = patched_list[t_id]
-        edges = list(set(list(orig_coverage.keys()) + list(patched_coverage.keys())))
-        for edge in edges:
-            if edge in patched_coverage.keys():
-                if edge not in orig_coverage.keys():
-                    distance += int(patched_coverage[edge])
-                else:
-                    distance += abs(
-                        int(patched_coverage[edge]) - int(orig_coverage[edge])
-                    )
-            else:
-                distance += int(orig_coverage[edge])
-        distance_info[t_id] = distance
+        distance_info[t_id] = trace_store.coverage_difference(
+            patched_list[t_id], original_list[t_id]
+        )
     return distance_info
 
 
@@ -263,3 +263,24 @@ def emit_help():
     write("\t" + definitions.ARG_DEBUG_MODE + "\t| " + "enable debug mode", WHITE)
     write("\t" + definitions.ARG_PATCH_MODE + "\t| " + "patch mode", WHITE)
     write("\t" + definitions.ARG_EXEC_MODE + "\t| " + "execution mode", WHITE)
+    write(
+        "\t"
+        + definitions.ARG_NO_VERDICT_STORE
+        + "\t| "
+        + "validate every patch again instead of reusing stored verdicts",
+        WHITE,
+    )
+    write(
+        "\t"
+        + definitions.ARG_GDB_SERVER
+        + "\t| "
+        + "reuse gdb sessions instead of starting a new gdb for every test run",
+        WHITE,
+    )
+    write(
+        "\t"
+        + definitions.ARG_COMPLETE_TEST_RUN
+        + "\t| "
+        + "run every test of a patch instead of stopping at the first failure",
+        WHITE,
+    )
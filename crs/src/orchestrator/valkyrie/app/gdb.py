@@ -1,4 +1,5 @@
 import os
+import re
 import multiprocessing as mp
 from app import (
     utilities,
@@ -8,6 +9,7 @@ from app import (
     tester,
     emitter,
     partitioner,
+    snapshot,
 )
 from multiprocessing.dummy import Pool as ThreadPool
 
@@ -53,7 +55,6 @@ def prepare_snapshot_script(fragment_list, gdb_script_path, dir_snapshot):
         file_after_snapshot = dir_snapshot + "/after.snapshot"
         for fragment in fragment_list:
             break_point, jump_point, patch_content = fragment
-            script_file.writelines(snapshot_command)
             if patch_content:
                 gdb_command, _ = interpreter.convert_to_gdb_command(
                     patch_content, break_point, jump_point, file_before_snapshot
@@ -92,13 +93,29 @@ def prepare_patch_script(fragment_list, gdb_script_path, dir_snapshot):
     return
 
 
-def prepare_frontend(frontend_path, gdb_script_path, binary_path):
-    if not os.path.isfile(frontend_path):
-        with open(frontend_path, "w+") as frontend_file:
-            frontend_file.truncate()
-            frontend_file.writelines("#!/bin/bash\n")
-            frontend_file.writelines("patch_id=$PATCH_ID\n")
-            frontend_file.writelines("script_file=/tmp/gdb_patch_script_$patch_id\n")
+def job_dir(patch_id):
+    """Directory of the frontends of a patch, frontends are never shared between
+    the patches validated by parallel workers"""
+    job_name = "{}{}".format(values.DEFAULT_TAG, patch_id)
+    dir_job = definitions.DIRECTORY_GDB_JOBS + "/" + re.sub(r"[/:\s]", "_", job_name)
+    os.makedirs(dir_job, exist_ok=True)
+    return dir_job
+
+
+def prepare_frontend(frontend_path, gdb_script_path, binary_path, use_server=False):
+    with open(frontend_path, "w") as frontend_file:
+        frontend_file.writelines("#!/bin/bash\n")
+        if use_server and values.GDB_SERVER_SOCKET:
+            # run on one of the gdb sessions of gdb_server
+            frontend_file.writelines(
+                'exec {} {} {} "$@"\n'.format(
+                    definitions.FILE_GDB_CLIENT,
+                    values.GDB_SERVER_SOCKET,
+                    gdb_script_path,
+                )
+            )
+        else:
+            frontend_file.writelines("script_file={}\n".format(gdb_script_path))
             frontend_file.writelines("if [[ -f $script_file ]];then\n")
             frontend_file.writelines("sed -i '$ d'  $script_file \n")
             frontend_file.writelines('echo "run $@" >> $script_file\n')
@@ -110,8 +127,7 @@ def prepare_frontend(frontend_path, gdb_script_path, binary_path):
             frontend_file.writelines("else\n")
             frontend_file.writelines("{} $@\n".format(binary_path))
             frontend_file.writelines("fi\n")
-            frontend_file.close()
-        utilities.execute_command("chmod +x {}".format(frontend_path))
+    os.chmod(frontend_path, 0o755)
     return
 
 
@@ -142,20 +158,18 @@ def validate_patch(
 ):
     fragment_list, _, _, req_compile, dir_cluster = patch_info
     timeout = values.DEFAULT_TEST_TIMEOUT
-    nested_cluster = dir_cluster
+    # clusters are named relative to the partition directory: the fix location,
+    # followed by the signature of the patch for each test
+    cluster_index = snapshot.cluster_index(os.path.dirname(dir_cluster))
+    location = os.path.basename(dir_cluster)
+    nested_cluster = location
     is_valid = True
     test_count = 0
-    is_location_repeated = False
+    is_location_repeated = cluster_index.get(location) == snapshot.LOOP
     fail_test_list = []
-    if os.path.isdir(dir_cluster):
-        if os.path.isfile(dir_cluster + "/LOOP"):
-            is_location_repeated = True
     if values.DEFAULT_PARTITION and not is_location_repeated:
-        if not os.path.isdir(dir_cluster):
-            os.system("mkdir {} > /dev/null 2>&1".format(dir_cluster))
         dir_snapshot = base_dir_snapshot + "/" + str(patch_id)
-        if not os.path.isdir(dir_snapshot):
-            os.system("mkdir -p {}".format(dir_snapshot))
+        os.makedirs(dir_snapshot, exist_ok=True)
         for test_id in test_id_list:
             if not is_location_repeated:
                 patch_signature = partitioner.get_patch_signature(
@@ -174,13 +188,12 @@ def validate_patch(
                     )
                     utilities.error_exit("[error] cannot find partition")
                 nested_cluster += "/" + patch_signature
-                if not os.path.isdir(nested_cluster):
-                    utilities.execute_command("mkdir {}".format(nested_cluster))
-                if os.path.isfile(nested_cluster + "/FAIL"):
+                cluster_status = cluster_index.get(nested_cluster)
+                if cluster_status == snapshot.FAIL:
                     print("CLUSTER FAIL", patch_signature)
                     is_valid = False
                     break
-                elif os.path.isfile(nested_cluster + "/PASS"):
+                elif cluster_status == snapshot.PASS:
                     continue
                 else:
                     test_count = test_count + 1
@@ -192,8 +205,10 @@ def validate_patch(
                         )
                     prepare_patch_script(fragment_list, gdb_script_path, dir_snapshot)
                     if binary_path:
-                        frontend_path = os.path.dirname(binary_path) + "/gdb_frontend"
-                        prepare_frontend(frontend_path, gdb_script_path, binary_path)
+                        frontend_path = job_dir(patch_id) + "/gdb_frontend"
+                        prepare_frontend(
+                            frontend_path, gdb_script_path, binary_path, True
+                        )
                         is_valid = tester.test_gdb_binary(
                             frontend_path, test_oracle, test_id, patch_id, timeout
                         )
@@ -207,25 +222,19 @@ def validate_patch(
                         test_id
                     )
                     latest_snapshot_file = dir_snapshot + "/location.snapshot"
-                    diff_command = "compare_dump {0} {1} > {2}".format(
-                        check_snapshot_file,
-                        latest_snapshot_file,
-                        dir_snapshot + "/{}.snap.diff".format(test_id),
+                    is_same = snapshot.is_same_state(
+                        check_snapshot_file, latest_snapshot_file
                     )
-                    is_same = utilities.execute_command(diff_command)
                     if is_same:
                         if not is_valid:
-                            utilities.execute_command(
-                                "touch {}".format(nested_cluster + "/FAIL")
-                            )
+                            cluster_index.mark(nested_cluster, snapshot.FAIL)
                             break
-                        utilities.execute_command(
-                            "touch {}".format(nested_cluster + "/PASS")
-                        )
+                        cluster_index.mark(nested_cluster, snapshot.PASS)
                     else:
-                        utilities.execute_command(
-                            "touch {}".format(nested_cluster + "/LOOP")
-                        )
+                        # the state at the fix location differs between the
+                        # runs, the location is reached more than once
+                        cluster_index.mark(location, snapshot.LOOP)
+                        is_location_repeated = True
             else:
                 test_count = test_count + 1
                 gdb_script_path = (
@@ -233,8 +242,8 @@ def validate_patch(
                 )
                 prepare_patch_script(fragment_list, gdb_script_path, None)
                 if binary_path:
-                    frontend_path = os.path.dirname(binary_path) + "/gdb_frontend"
-                    prepare_frontend(frontend_path, gdb_script_path, binary_path)
+                    frontend_path = job_dir(patch_id) + "/gdb_frontend"
+                    prepare_frontend(frontend_path, gdb_script_path, binary_path, True)
                     is_valid = tester.test_gdb_binary(
                         frontend_path, test_oracle, test_id, patch_id, timeout
                     )
@@ -254,8 +263,8 @@ def validate_patch(
             gdb_script_path = definitions.FILE_GDB_PATCH_SCRIPT + "_" + str(patch_id)
             prepare_patch_script(fragment_list, gdb_script_path, None)
             if binary_path:
-                frontend_path = os.path.dirname(binary_path) + "/gdb_frontend"
-                prepare_frontend(frontend_path, gdb_script_path, binary_path)
+                frontend_path = job_dir(patch_id) + "/gdb_frontend"
+                prepare_frontend(frontend_path, gdb_script_path, binary_path, True)
                 is_valid = tester.test_gdb_binary(
                     frontend_path, test_oracle, test_id, patch_id, timeout
                 )
@@ -0,0 +1,338 @@
+import ast
+import json
+import os
+import queue
+import re
+import select
+import shlex
+import signal
+import socket
+import subprocess
+import threading
+import time
+from app import definitions, emitter, values
+
+# Long-lived gdb/MI sessions for the validation of many patches on one binary.
+# Every session loads the binary once; a job (patch script, arguments of the test
+# run) removes the breakpoints of the previous job, sources the patch script and
+# runs the inferior. Test oracles reach the server through the frontend script of
+# the job (see gdb.prepare_frontend), which runs bin/gdb_client: the client sends
+# the job over a unix socket and exits with the exit code of the inferior. The
+# inferior reads the stdin and writes (appending) to the stdout and stderr of the
+# client, runs in its working directory and with its environment. The console and
+# log output of gdb during a job (e.g. "No symbol ..." of a patch script) goes to
+# the stderr of the client, like the stderr of a batch gdb.
+
+MI_RESULT = re.compile(r"^(\d+)\^(done|running|connected|error|exit)")
+MI_STOPPED = re.compile(r'^\*stopped,reason="([^"]+)"')
+MI_EXIT_CODE = re.compile(r'exit-code="(\d+)"')
+MI_SIGNAL = re.compile(r'signal-name="([A-Z0-9]+)"')
+MI_PID = re.compile(r'^=thread-group-started,id="[^"]+",pid="(\d+)"')
+MI_STREAM = re.compile(r'^[~&]("(?:[^"\\]|\\.)*")$')
+MI_ERROR = re.compile(r'^\d*\^error,msg=("(?:[^"\\]|\\.)*")')
+
+# seconds a stopped inferior may take to be resumed by the commands of the
+# breakpoint it stopped at; a job whose inferior is left stopped fails
+STOP_GRACE = 1.0
+COMMAND_TIMEOUT = 60
+
+
+def _mi_quote(text):
+    return '"' + text.replace("\\", "\\\\").replace('"', '\\"') + '"'
+
+
+def _mi_unquote(text):
+    """Text of an MI c-string, octal escapes are bytes of UTF-8 text"""
+    try:
+        value = ast.literal_eval(text)
+    except (SyntaxError, ValueError):
+        return text
+    return value.encode("latin-1", "replace").decode("utf-8", "replace")
+
+
+class GdbSession:
+    def __init__(self, binary_path, index):
+        self.binary_path = binary_path
+        self.index = index
+        self.token = 0
+        self.lines = queue.Queue()
+        self.inferior_pid = None
+        # stderr of the client of the running job
+        self.output = None
+        self.last_output = ""
+        self.process = subprocess.Popen(
+            ["gdb", "--interpreter=mi2", "-q", "-nx", binary_path],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+            universal_newlines=True,
+            bufsize=1,
+        )
+        self.reader = threading.Thread(target=self.read, daemon=True)
+        self.reader.start()
+        for setting in [
+            "-gdb-set mi-async on",
+            "-gdb-set confirm off",
+            "-gdb-set pagination off",
+            "-gdb-set breakpoint pending on",
+        ]:
+            self.command(setting)
+
+    def read(self):
+        for line in self.process.stdout:
+            self.lines.put(line.rstrip("\n"))
+        self.lines.put(None)
+
+    def is_alive(self):
+        return self.process.poll() is None
+
+    def command(self, mi_command, timeout=COMMAND_TIMEOUT):
+        """Sends an MI command, returns its result class (done, running, error)"""
+        self.token += 1
+        token = str(self.token)
+        self.process.stdin.write(token + mi_command + "\n")
+        self.process.stdin.flush()
+        deadline = time.time() + timeout
+        while time.time() < deadline:
+            line = self.next_line(deadline - time.time())
+            if line is None:
+                break
+            result = MI_RESULT.match(line)
+            if result and result.group(1) == token:
+                return result.group(2)
+        raise RuntimeError(f"gdb session {self.index} did not answer {mi_command}")
+
+    def console(self, gdb_command):
+        return self.command("-interpreter-exec console " + _mi_quote(gdb_command))
+
+    def next_line(self, timeout):
+        try:
+            line = self.lines.get(timeout=max(timeout, 0))
+        except queue.Empty:
+            return ""
+        if line is None:
+            raise RuntimeError(f"gdb session {self.index} exited")
+        self.track(line)
+        return line
+
+    def track(self, line):
+        if self.output:
+            self.forward(line)
+        pid = MI_PID.match(line)
+        if pid:
+            self.inferior_pid = int(pid.group(1))
+        elif line.startswith("=thread-group-exited"):
+            # the pid may be reused from now on
+            self.inferior_pid = None
+
+    def forward(self, line):
+        stream = MI_STREAM.match(line)
+        error = MI_ERROR.match(line)
+        if not stream and not error:
+            return
+        text = _mi_unquote((stream or error).group(1))
+        if error:
+            # the message of an error of a console command was logged already
+            if text.rstrip("\n") == self.last_output.rstrip("\n"):
+                return
+            text = text.rstrip("\n") + "\n"
+        self.last_output = text
+        try:
+            self.output.write(text)
+            self.output.flush()
+        except (OSError, ValueError):
+            self.output = None
+
+    def kill_inferior(self):
+        if self.inferior_pid:
+            try:
+                os.kill(self.inferior_pid, signal.SIGKILL)
+            except OSError:
+                pass
+
+    def reset(self):
+        """Removes the inferior and the breakpoints of the last job"""
+        self.kill_inferior()
+        self.console("kill")
+        self.command("-break-delete")
+
+    def run(self, job, client):
+        """Runs a job, returns the exit code of the inferior or None if the
+        client went away before it finished"""
+        with open(job["script"], "r") as script_file:
+            script_lines = script_file.readlines()
+        # the run command is issued by the session
+        while script_lines and (
+            not script_lines[-1].strip() or script_lines[-1].startswith("run")
+        ):
+            script_lines.pop()
+        session_script = job["script"] + ".session"
+        with open(session_script, "w") as script_file:
+            script_file.writelines(script_lines)
+
+        client_fd = "/proc/{}/fd/".format(job["pid"])
+        arguments = " ".join(shlex.quote(argument) for argument in job["args"])
+        arguments += " < {0}0 >> {0}1 2>> {0}2".format(client_fd)
+        self.reset()
+        try:
+            self.output = open(client_fd + "2", "a")
+        except OSError:
+            self.output = None
+        try:
+            return self.run_job(job, client, session_script, arguments)
+        finally:
+            if self.output:
+                try:
+                    self.output.close()
+                except OSError:
+                    pass
+            self.output = None
+
+    def run_job(self, job, client, session_script, arguments):
+        if self.console("source " + session_script) != "done":
+            # like a batch gdb, a failing command of the script fails the run
+            return 1
+        self.console("set cwd " + job["cwd"])
+        self.console(
+            "set exec-wrapper {} --environment {}".format(
+                definitions.FILE_GDB_CLIENT, shlex.quote(job["environment"])
+            )
+        )
+        self.console("set args " + arguments)
+        if self.command("-exec-run") != "running":
+            return 1
+
+        stopped_at = None
+        while True:
+            readable, _, _ = select.select([client], [], [], 0)
+            if readable and not client.recv(1, socket.MSG_PEEK):
+                # the client was killed, e.g. by the timeout of the oracle
+                self.kill_inferior()
+                return None
+            line = self.next_line(0.1)
+            if line.startswith("*running"):
+                stopped_at = None
+                continue
+            if stopped_at and time.time() - stopped_at > STOP_GRACE:
+                # the commands of the breakpoint failed or do not resume the
+                # inferior, the test did not run to its end
+                return 1
+            stopped = MI_STOPPED.match(line)
+            if not stopped:
+                continue
+            reason = stopped.group(1)
+            if reason == "exited-normally":
+                return 0
+            if reason == "exited":
+                return int(MI_EXIT_CODE.search(line).group(1), 8)
+            if reason in ["exited-signalled", "signal-received"]:
+                signal_name = MI_SIGNAL.search(line)
+                try:
+                    return 128 + signal.Signals[signal_name.group(1)]
+                except (AttributeError, KeyError):
+                    return 128 + signal.SIGKILL
+            stopped_at = time.time()
+
+    def close(self):
+        self.kill_inferior()
+        if self.is_alive():
+            self.process.kill()
+        self.process.wait()
+
+
+class GdbServer:
+    def __init__(self, binary_path, socket_path, size):
+        self.binary_path = binary_path
+        self.socket_path = socket_path
+        self.size = size
+        self.sessions = queue.Queue()
+        self.started = 0
+        self.lock = threading.Lock()
+        self.session_list = []
+        if os.path.exists(socket_path):
+            os.remove(socket_path)
+        self.listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.listener.bind(socket_path)
+        self.listener.listen(size * 4)
+        self.is_running = True
+        threading.Thread(target=self.accept, daemon=True).start()
+
+    def accept(self):
+        while self.is_running:
+            try:
+                client, _ = self.listener.accept()
+            except OSError:
+                break
+            threading.Thread(target=self.serve, args=(client,), daemon=True).start()
+
+    def acquire(self):
+        with self.lock:
+            if self.sessions.empty() and self.started < self.size:
+                self.started += 1
+                session = GdbSession(self.binary_path, self.started)
+                self.session_list.append(session)
+                return session
+        return self.sessions.get()
+
+    def release(self, session):
+        if not session.is_alive():
+            # start a new session on the next job
+            with self.lock:
+                self.started -= 1
+                self.session_list.remove(session)
+            return
+        self.sessions.put(session)
+
+    def serve(self, client):
+        with client:
+            request = b""
+            while not request.endswith(b"\n"):
+                chunk = client.recv(65536)
+                if not chunk:
+                    return
+                request += chunk
+            job = json.loads(request)
+            session = self.acquire()
+            try:
+                exit_code = session.run(job, client)
+            except (OSError, RuntimeError, ValueError) as e:
+                emitter.warning(f"\t\t[warning] gdb session failed: {e}")
+                session.close()
+                exit_code = 1
+            finally:
+                self.release(session)
+            if exit_code is not None:
+                try:
+                    client.sendall(b"%d\n" % exit_code)
+                except OSError:
+                    pass
+
+    def stop(self):
+        self.is_running = False
+        self.listener.close()
+        with self.lock:
+            for session in self.session_list:
+                session.close()
+            self.session_list = []
+        if os.path.exists(self.socket_path):
+            os.remove(self.socket_path)
+
+
+def start(binary_path):
+    """Starts the sessions for the binary, the address of the server is kept in
+    values.GDB_SERVER_SOCKET for the frontends of the jobs"""
+    if not binary_path or not values.DEFAULT_USE_GDB_SERVER:
+        return None
+    os.makedirs(definitions.DIRECTORY_GDB_JOBS, exist_ok=True)
+    socket_path = "{}/server-{}.sock".format(
+        definitions.DIRECTORY_GDB_JOBS, os.getpid()
+    )
+    server = GdbServer(binary_path, socket_path, values.DEFAULT_GDB_SESSIONS)
+    values.GDB_SERVER_SOCKET = socket_path
+    return server
+
+
+def stop(server):
+    if server:
+        server.stop()
+    values.GDB_SERVER_SOCKET = None
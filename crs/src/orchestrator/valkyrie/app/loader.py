@@ -31,9 +31,14 @@ def load_patch_file(patch_file):
     if os.path.getsize(patch_file) == 0:
         return None
     is_unhandled = False
-    src_file, added_lines, removed_lines, req_compile, jump_point = reader.read_patch(
-        patch_file
-    )
+    try:
+        src_file, added_lines, removed_lines, req_compile, jump_point = (
+            reader.read_patch(patch_file)
+        )
+    except Exception as e:
+        emitter.warning(f"could not read patch file {patch_file}")
+        values.LIST_MALFORMED.append(patch_index)
+        return patch_index, fragment_list, None, patch_file, False, False
     break_point_list = list(
         set((list(added_lines.keys()) + list(removed_lines.keys())))
     )
@@ -95,6 +100,9 @@ def load_patch_list(dir_patch):
                 src_file, added_lines, removed_lines, req_compile, jump_point = reader.read_patch(patch_file)
             except Exception as e:
                 emitter.warning(f"could not read patch file {patch_file}")
+                # kept to be reported as an invalid patch
+                values.LIST_MALFORMED.append(patch_index)
+                patch_list[patch_index] = (fragment_list, None, patch_file, False)
                 continue
 
             break_point_list = list(
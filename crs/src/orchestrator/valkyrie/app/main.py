@@ -79,6 +79,7 @@ def run():
     emitter.sub_title("Initializing setup")
     classified_list = ([], [], [], [], [], [], [])
     patch_list = []
+    writer.open_result_stream(f"{values.CONF_OUTPUT_DIR}/result.jsonl")
     if values.CONF_CLONE:
         src_dir = values.CONF_SOURCE_DIR
         clone_dir = f"{definitions.DIR_EXPERIMENT}/{hex(int(time.time()))}"
@@ -197,25 +198,18 @@ def run():
         copy_patch(high_quality_list, f"{values.CONF_OUTPUT_DIR}/high_quality")
         print_class("high quality", high_quality_list)
 
+    verdict_list = dict()
+    for verdict, class_list in reversed(list(enumerate(classified_list))):
+        for patch_id in class_list:
+            verdict_list[patch_id] = verdict
     patch_result = []
     for patch_id in patch_list:
         _class = ""
-        if patch_id in failed_list:
-            _class = "invalid patch"
-        elif patch_id in invalid_list:
-            _class = "cannot build"
-        elif patch_id in incorrect_list:
-            _class = "incorrect patch"
-        elif patch_id in fix_fail_list:
-            _class = "fixed failing"
-        elif patch_id in plausible_list:
-            _class = "pass public"
-        elif patch_id in correct_list:
-            _class = "pass private"
-        elif patch_id in high_quality_list:
-            _class = "pass adversarial"
+        if patch_id in verdict_list:
+            _class = definitions.VERDICT_CLASSES[verdict_list[patch_id]]
         patch_result.append((patch_id, _class))
     writer.write_as_json(patch_result, f"{values.CONF_OUTPUT_DIR}/result.json")
+    writer.close_result_stream()
 
     if values.CONF_PURGE:
         if definitions.DIR_EXPERIMENT in values.CONF_SOURCE_DIR:
@@ -284,6 +278,7 @@ def main():
         values.RESULT["execution-count"] = values.COUNT_TESTS
         values.RESULT["invalid-count"] = values.COUNT_INVALID
         values.RESULT["unhandled-count"] = values.COUNT_UNHANDLED
+        values.RESULT["cached-count"] = values.COUNT_CACHED
         emitter.end(time_info, is_error)
         logger.end(time_info, is_error)
         writer.write_as_json(values.RESULT, definitions.FILE_RESULT_JSON)
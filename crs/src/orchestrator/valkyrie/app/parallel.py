@@ -11,6 +11,8 @@ from app import (
     tracer,
     coverage,
     distance,
+    definitions,
+    writer,
 )
 from multiprocessing.dummy import Pool as ThreadPool
 import threading
@@ -27,6 +29,8 @@ def mute():
 
 pool = mp.Pool(mp.cpu_count(), initializer=mute)
 result_list = []
+# failing tests and build time of the patches of the last compile validation
+validation_details = dict()
 
 
 def collect_result(result):
@@ -34,6 +38,46 @@ def collect_result(result):
     result_list.append(result)
 
 
+def compile_verdict(result):
+    """Index of the class list of compiler.validate_patch's result: applied,
+    compiled, fixed the failing tests, passed the public, private and
+    adversarial tests"""
+    for verdict, is_passing in enumerate(result[1:7]):
+        if not is_passing:
+            return verdict
+    return 6
+
+
+# verdicts of the gdb and rewrite modes, which only run the test oracle on the
+# patched binary: the failing tests are fixed or not
+VERDICT_VALID = definitions.VERDICT_CLASSES.index("fixed failing")
+VERDICT_INVALID = definitions.VERDICT_CLASSES.index("incorrect patch")
+
+
+def oracle_classes(valid_patch_list, invalid_patch_list, compile_list):
+    """Class list of validator.validate_patches for the gdb and rewrite modes,
+    the patches that require compilation are not validated and get no class"""
+    if compile_list:
+        emitter.warning(
+            "\t[warning] {} patch(es) were not validated, they require "
+            "compilation".format(len(compile_list))
+        )
+    classified_list = [[] for _ in definitions.VERDICT_CLASSES]
+    classified_list[VERDICT_VALID] = valid_patch_list
+    classified_list[VERDICT_INVALID] = invalid_patch_list
+    return classified_list
+
+
+def collect_verdict(result):
+    global result_list
+    result_list.append(result)
+    if values.DEFAULT_PATCH_MODE == definitions.VALUE_OPERATE_MODE_COMPILE:
+        verdict = compile_verdict(result)
+    else:
+        verdict = VERDICT_VALID if result[1] else VERDICT_INVALID
+    writer.stream_verdict(result[0], verdict)
+
+
 def collect_result_timeout(result):
     global result_list, expected_count
     result_list.append(result)
@@ -88,7 +132,7 @@ def validate_patch_list_gdb(
             if req_compile:
                 compile_list.append(patch_id)
                 continue
-            result_list.append(
+            collect_verdict(
                 gdb.validate_patch(
                     patch_id,
                     binary_path,
@@ -119,7 +163,7 @@ def validate_patch_list_gdb(
                     dir_snapshot,
                     patch_info,
                 ),
-                callback=collect_result,
+                callback=collect_verdict,
             )
         pool.close()
         emitter.normal("\t\t\twaiting for thread completion")
@@ -131,7 +175,7 @@ def validate_patch_list_gdb(
         else:
             invalid_patch_list.append(patch_id)
         values.COUNT_TESTS = values.COUNT_TESTS + test_count
-    return valid_patch_list, invalid_patch_list, compile_list
+    return oracle_classes(valid_patch_list, invalid_patch_list, compile_list)
 
 
 def validate_patch_list_e9(patch_list, binary_path, test_oracle, test_id_list):
@@ -156,7 +200,7 @@ def validate_patch_list_e9(patch_list, binary_path, test_oracle, test_id_list):
             if req_compile:
                 compile_list.append(patch_id)
                 continue
-            result_list.append(
+            collect_verdict(
                 e9patch.validate_patch(
                     patch_id, fragment_list[0], binary_path, test_oracle, test_id_list
                 )
@@ -180,7 +224,7 @@ def validate_patch_list_e9(patch_list, binary_path, test_oracle, test_id_list):
                     test_oracle,
                     test_id_list,
                 ),
-                callback=collect_result,
+                callback=collect_verdict,
             )
         pool.close()
         emitter.normal("\t\t\twaiting for thread completion")
@@ -191,12 +235,13 @@ def validate_patch_list_e9(patch_list, binary_path, test_oracle, test_id_list):
             valid_patch_list.append(patch_id)
         else:
             invalid_patch_list.append(patch_id)
-    return valid_patch_list, invalid_patch_list, compile_list
+    return oracle_classes(valid_patch_list, invalid_patch_list, compile_list)
 
 
 def validate_patch_list_compile(patch_list, binary_path, test_oracle, test_id_list):
-    global pool, result_list
+    global pool, result_list, validation_details
     result_list = []
+    validation_details = dict()
     high_quality_list = []
     correct_list = []
     plausible_list = []
@@ -209,7 +254,7 @@ def validate_patch_list_compile(patch_list, binary_path, test_oracle, test_id_li
             is_valid = False
             _, src_file, patch_file, req_compile, _ = patch_list[patch_id]
             emitter.normal(f"\t\t\tevaluating patch {patch_file}")
-            result_list.append(
+            collect_verdict(
                 compiler.validate_patch(
                     patch_id,
                     src_file,
@@ -245,30 +290,12 @@ def validate_patch_list_compile(patch_list, binary_path, test_oracle, test_id_li
                     test_oracle,
                     test_id_list,
                 ),
-                callback=collect_result,
+                callback=collect_verdict,
             )
         pool.close()
         emitter.normal("\t\t\twaiting for thread completion")
         pool.join()
-    for result in result_list:
-        patch_id = result[0]
-        if not result[1]:
-            failed_list.append(patch_id)
-        elif not result[2]:
-            invalid_list.append(patch_id)
-        elif not result[3]:
-            incorrect_list.append(patch_id)
-        elif not result[4]:
-            fix_fail_list.append(patch_id)
-        elif not result[5]:
-            plausible_list.append(patch_id)
-        elif not result[6]:
-            correct_list.append(patch_id)
-        elif result[6]:
-            high_quality_list.append(patch_id)
-        else:
-            failed_list.append(patch_id)
-    return (
+    classified_list = (
         failed_list,
         invalid_list,
         incorrect_list,
@@ -277,6 +304,11 @@ def validate_patch_list_compile(patch_list, binary_path, test_oracle, test_id_li
         correct_list,
         high_quality_list,
     )
+    for result in result_list:
+        patch_id = result[0]
+        validation_details[patch_id] = (result[7], result[8])
+        classified_list[compile_verdict(result)].append(patch_id)
+    return classified_list
 
 
 def trace_patch_list_gdb(patch_list, test_oracle, test_id_list, binary_path):
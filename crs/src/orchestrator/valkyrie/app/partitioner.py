@@ -36,11 +36,10 @@ def get_patch_signature(
     gdb_script_path = definitions.FILE_GDB_SNAPSHOT_SCRIPT + "_" + str(patch_id)
     fragment_list, _, _, req_compile, _ = patch_info
     dir_snapshot = base_dir_snapshot + "/" + str(patch_id)
-    if not os.path.isdir(dir_snapshot):
-        os.system("mkdir -p {}".format(dir_snapshot))
+    os.makedirs(dir_snapshot, exist_ok=True)
     gdb.prepare_snapshot_script(fragment_list, gdb_script_path, dir_snapshot)
     # frontend_path = definitions.FILE_GDB_FRONTEND + "_" + str(patch_id) + "_snapshot"
-    frontend_path = os.path.dirname(binary_path) + "/gdb_frontend_snapshot"
+    frontend_path = gdb.job_dir(patch_id) + "/gdb_frontend_snapshot"
     gdb.prepare_frontend(frontend_path, gdb_script_path, binary_path)
     signature = tester.generate_patch_signature(
         frontend_path,
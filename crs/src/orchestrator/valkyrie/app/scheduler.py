@@ -0,0 +1,101 @@
+import fcntl
+import os
+from app import emitter
+
+# Order of the tests of the test oracle, learned across validation runs of a
+# subject. Every test run is appended as a line "<test id>\t<runs>\t<failures>\t
+# <seconds>" to the statistics file, which the worker processes of a parallel
+# validation share; compact() merges the lines of a test into one at the end of a
+# validation. Tests are run in decreasing order of the (smoothed) probability to
+# reject a patch per second of running time, so that most incorrect patches are
+# rejected by the first tests of the oracle.
+#
+# The order is fixed when the statistics are loaded, for the whole validation:
+# the partitioner names clusters after the signatures of the tests in the order
+# they were run.
+
+statistics = dict()
+statistics_path = None
+
+
+def _read(statistics_file):
+    test_list = dict()
+    for line in statistics_file:
+        fields = line.rstrip("\n").split("\t")
+        if not line.endswith("\n") or len(fields) != 4:
+            continue
+        test_id, runs, failures, seconds = fields
+        try:
+            runs, failures, seconds = int(runs), int(failures), float(seconds)
+        except ValueError:
+            continue
+        known = test_list.get(test_id, (0, 0, 0.0))
+        test_list[test_id] = (
+            known[0] + runs,
+            known[1] + failures,
+            known[2] + seconds,
+        )
+    return test_list
+
+
+def load(path):
+    global statistics, statistics_path
+    statistics = dict()
+    statistics_path = path
+    if not path:
+        return
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    if os.path.isfile(path):
+        with open(path, "r") as statistics_file:
+            statistics = _read(statistics_file)
+
+
+def score(test_id, default_cost):
+    runs, failures, seconds = statistics.get(test_id, (0, 0, 0.0))
+    failure_rate = (failures + 1) / (runs + 2)
+    cost = seconds / runs if runs else default_cost
+    return failure_rate / max(cost, 0.001)
+
+
+def order(test_id_list):
+    """Test ids in the order they should be run, the given order for ties"""
+    if not statistics:
+        return list(test_id_list)
+    known_cost = sorted(s / r for r, _, s in statistics.values() if r)
+    default_cost = known_cost[len(known_cost) // 2] if known_cost else 1.0
+    score_list = {str(t): score(str(t), default_cost) for t in test_id_list}
+    return sorted(test_id_list, key=lambda test_id: -score_list[str(test_id)])
+
+
+def record(test_id, is_passing, duration):
+    if not statistics_path:
+        return
+    line = "{}\t1\t{}\t{:.3f}\n".format(test_id, 0 if is_passing else 1, duration)
+    try:
+        with open(statistics_path, "a") as statistics_file:
+            fcntl.flock(statistics_file, fcntl.LOCK_EX)
+            try:
+                statistics_file.write(line)
+            finally:
+                fcntl.flock(statistics_file, fcntl.LOCK_UN)
+    except OSError as e:
+        emitter.warning(f"\t\t[warning] could not record test run: {e}")
+
+
+def compact():
+    if not statistics_path or not os.path.isfile(statistics_path):
+        return
+    # record() of another validation of the subject appends under the same lock
+    with open(statistics_path, "r+") as statistics_file:
+        fcntl.flock(statistics_file, fcntl.LOCK_EX)
+        try:
+            test_list = _read(statistics_file)
+            statistics_file.seek(0)
+            statistics_file.truncate()
+            for test_id, (runs, failures, seconds) in test_list.items():
+                statistics_file.write(
+                    "{}\t{}\t{}\t{:.3f}\n".format(test_id, runs, failures, seconds)
+                )
+        finally:
+            fcntl.flock(statistics_file, fcntl.LOCK_UN)
+
@@ -0,0 +1,190 @@
+import fcntl
+import hashlib
+import mmap
+import os
+import struct
+import threading
+import numpy as np
+
+# Program state snapshots are ELF core files written by gdb (generate-core-file).
+# Two snapshots are compared section by section, like tools/compare.c does:
+# sections at the same address are compared in windows of DIFF_WINDOW bytes and
+# every window that differs contributes the byte-wise difference of its content,
+# sections present in only one snapshot contribute their first window. The
+# signature of a patch is the sha1 of this difference, computed incrementally on
+# the memory-mapped dumps instead of through compare_dump and sha1sum.
+#
+# Clusters of patches with the same signatures are kept in one index file per
+# partition directory, a line "<status>\t<cluster>" per verdict, instead of PASS,
+# FAIL and LOOP marker files in a directory per cluster.
+
+DIFF_WINDOW = 16
+CHUNK_SIZE = DIFF_WINDOW << 16
+SHT_PROGBITS = 1
+
+PASS = "PASS"
+FAIL = "FAIL"
+LOOP = "LOOP"
+INDEX_NAME = "clusters.index"
+
+
+class Dump:
+    def __init__(self, dump_path):
+        self.sections = []
+        self.buffer = None
+        with open(dump_path, "rb") as dump_file:
+            if os.fstat(dump_file.fileno()).st_size == 0:
+                return
+            self.buffer = mmap.mmap(dump_file.fileno(), 0, access=mmap.ACCESS_READ)
+        if self.buffer[:4] != b"\x7fELF":
+            return
+        section_offset = struct.unpack_from("<Q", self.buffer, 0x28)[0]
+        entry_size, section_count = struct.unpack_from("<HH", self.buffer, 0x3A)
+        for index in range(section_count):
+            header = section_offset + index * entry_size
+            section_type = struct.unpack_from("<I", self.buffer, header + 4)[0]
+            if section_type != SHT_PROGBITS:
+                continue
+            address, offset, size = struct.unpack_from("<QQQ", self.buffer, header + 16)
+            self.sections.append((address, offset, size))
+        self.sections.sort()
+
+    def data(self, offset, size):
+        return np.frombuffer(self.buffer, dtype=np.uint8, count=size, offset=offset)
+
+    def close(self):
+        if self.buffer is not None:
+            self.buffer.close()
+
+
+def _update_section_diff(digest, before, before_section, after, after_section):
+    _, before_offset, size = before_section
+    _, after_offset, after_size = after_section
+    size = min(size, after_size)
+    for start in range(0, size, CHUNK_SIZE):
+        length = min(CHUNK_SIZE, size - start)
+        old = before.data(before_offset + start, length)
+        new = after.data(after_offset + start, length)
+        changed = old != new
+        if not changed.any():
+            continue
+        padding = -length % DIFF_WINDOW
+        if padding:
+            old = np.concatenate((old, np.zeros(padding, dtype=np.uint8)))
+            new = np.concatenate((new, np.zeros(padding, dtype=np.uint8)))
+            changed = np.concatenate((changed, np.zeros(padding, dtype=bool)))
+        windows = changed.reshape(-1, DIFF_WINDOW).any(axis=1)
+        delta = new.astype(np.int16) - old.astype(np.int16)
+        digest.update(delta.reshape(-1, DIFF_WINDOW)[windows].tobytes())
+
+
+def _update_section(digest, mode, dump, section):
+    address, offset, size = section
+    digest.update(mode + struct.pack("<Q", address))
+    digest.update(dump.data(offset, min(size, DIFF_WINDOW)).tobytes())
+
+
+def diff_digest(before_path, after_path):
+    """
+    Digest of the difference between two snapshots, None if a snapshot can not
+    be read
+    """
+    before = Dump(before_path)
+    after = Dump(after_path)
+    try:
+        if not before.sections or not after.sections:
+            return None
+        digest = hashlib.sha1()
+        before_list = before.sections
+        after_list = after.sections
+        before_index = after_index = 0
+        while before_index < len(before_list) or after_index < len(after_list):
+            before_section = (
+                before_list[before_index] if before_index < len(before_list) else None
+            )
+            after_section = (
+                after_list[after_index] if after_index < len(after_list) else None
+            )
+            if before_section and after_section:
+                if before_section[0] == after_section[0]:
+                    _update_section_diff(
+                        digest, before, before_section, after, after_section
+                    )
+                    before_index += 1
+                    after_index += 1
+                elif before_section[0] < after_section[0]:
+                    _update_section(digest, b"-", before, before_section)
+                    before_index += 1
+                else:
+                    _update_section(digest, b"+", after, after_section)
+                    after_index += 1
+            elif before_section:
+                _update_section(digest, b"-", before, before_section)
+                before_index += 1
+            else:
+                _update_section(digest, b"+", after, after_section)
+                after_index += 1
+        return digest.hexdigest()
+    finally:
+        before.close()
+        after.close()
+
+
+def is_same_state(first_path, second_path):
+    """True if the snapshots hold the same memory content"""
+    empty = hashlib.sha1().hexdigest()
+    return diff_digest(first_path, second_path) == empty
+
+
+class ClusterIndex:
+    """
+    Status of the clusters of a partition directory. The index file is only
+    appended to, under an exclusive lock, so the worker processes of a parallel
+    validation share it; every process keeps the entries it has read so far.
+    """
+
+    def __init__(self, dir_partition):
+        self.index_path = os.path.join(dir_partition, INDEX_NAME)
+        self.lock = threading.Lock()
+        self.status_list = dict()
+        self.read_offset = 0
+
+    def refresh(self):
+        if not os.path.isfile(self.index_path):
+            return
+        with open(self.index_path, "r") as index_file:
+            index_file.seek(self.read_offset)
+            for line in index_file:
+                if not line.endswith("\n"):
+                    # an entry that is still being written
+                    break
+                status, cluster = line.rstrip("\n").split("\t", 1)
+                self.status_list[cluster] = status
+                self.read_offset += len(line.encode())
+
+    def get(self, cluster):
+        with self.lock:
+            self.refresh()
+            return self.status_list.get(cluster)
+
+    def mark(self, cluster, status):
+        with self.lock:
+            with open(self.index_path, "a") as index_file:
+                fcntl.flock(index_file, fcntl.LOCK_EX)
+                try:
+                    index_file.write(f"{status}\t{cluster}\n")
+                    index_file.flush()
+                finally:
+                    fcntl.flock(index_file, fcntl.LOCK_UN)
+            self.status_list[cluster] = status
+
+
+_index_list = dict()
+_index_lock = threading.Lock()
+
+
+def cluster_index(dir_partition):
+    with _index_lock:
+        if dir_partition not in _index_list:
+            _index_list[dir_partition] = ClusterIndex(dir_partition)
+        return _index_list[dir_partition]
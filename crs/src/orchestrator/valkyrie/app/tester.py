@@ -1,5 +1,7 @@
 import os
-from app import utilities, definitions, emitter, partitioner, values
+import time
+from app import utilities, definitions, emitter, partitioner, snapshot, values
+from app import scheduler
 
 
 def run_test_script(script_path, patch_file):
@@ -21,7 +23,7 @@ def run_test_script(script_path, patch_file):
     return is_passing
 
 
-def run_test_oracle(test_oracle, failing_test_list, patch_file):
+def run_test_oracle(test_oracle, failing_test_list, patch_file, failed_tests=None):
     is_passing = True
     log_name = "oracle.log"
     log_path = f"{definitions.DIR_LOGS}/{log_name}"
@@ -32,13 +34,17 @@ def run_test_oracle(test_oracle, failing_test_list, patch_file):
         log_file.close()
     cur_dir = os.getcwd()
     os.chdir(values.CONF_SOURCE_DIR)
-    for test_id in failing_test_list:
+    for test_id in scheduler.order(failing_test_list):
         script_command = f"bash {test_oracle} {test_id}"
+        test_start = time.time()
         status = utilities.execute_command(
             script_command, output_log=open(log_path, "a")
         )
+        scheduler.record(test_id, status == 0, time.time() - test_start)
         if status != 0:
             is_passing = False
+            if failed_tests is not None:
+                failed_tests.append(test_id)
             break
     os.chdir(cur_dir)
     return is_passing
@@ -46,11 +52,13 @@ def run_test_oracle(test_oracle, failing_test_list, patch_file):
 
 def test_patched_binary(binary_path, test_oracle, test_id_list, patch_id=None):
     is_valid = True
-    for test_id in test_id_list:
+    for test_id in scheduler.order(test_id_list):
         test_command = "cd {3}; {0} {1} {2}".format(
             test_oracle, test_id, binary_path, definitions.DIRECTORY_LIB
         )
+        test_start = time.time()
         result = utilities.execute_command(test_command)
+        scheduler.record(test_id, int(result) == 0, time.time() - test_start)
         if patch_id:
             trace_file = "/tmp/p{0}.trace".format(patch_id)
             save_file = definitions.DIRECTORY_OUTPUT + "/p{0}-t{0}.trace".format(
@@ -74,31 +82,17 @@ def generate_patch_signature(
         test_oracle, test_id, binary_path, timeout, patch_id
     )
     utilities.execute_command(test_command, timeout=timeout, output_log=output_file)
-    rename_command = "mv {} {}; mv {} {}".format(
-        dir_snapshot + "/before.snapshot",
-        dir_snapshot + "/{}_before.snapshot".format(test_id),
-        dir_snapshot + "/after.snapshot",
-        dir_snapshot + "/{}_after.snapshot".format(test_id),
-    )
-    utilities.execute_command(rename_command)
-    # diff_command = "/bin/bash -c \"diff -u0 "
-    # diff_command += "<(hexdump -C {}) ".format(dir_snapshot + "/{}_before.snapshot".format(test_id))
-    # diff_command += "<(hexdump -C {}) -d ".format(dir_snapshot + "/{}_after.snapshot".format(test_id))
-    # diff_command += "| tail -n +4 > {}\"".format(dir_snapshot + "/{}.snap.diff".format(test_id))
-    diff_command = "compare_dump {0} {1} > {2}".format(
-        dir_snapshot + "/{}_before.snapshot".format(test_id),
-        dir_snapshot + "/{}_after.snapshot".format(test_id),
-        dir_snapshot + "/{}.snap.diff".format(test_id),
-    )
-    utilities.execute_command(diff_command)
-    signature_file_path = dir_snapshot + "/{}.sig".format(test_id)
-    sign_command = "sha1sum {} | awk '{{print $1}}' > {}".format(
-        dir_snapshot + "/{}.snap.diff".format(test_id), signature_file_path
-    )
-    utilities.execute_command(sign_command)
-    with open(signature_file_path, "r") as sig_file:
-        signature = sig_file.readline()
-    return signature.strip()
+    before_snapshot = dir_snapshot + "/{}_before.snapshot".format(test_id)
+    after_snapshot = dir_snapshot + "/{}_after.snapshot".format(test_id)
+    for snapshot_name, snapshot_path in [
+        ("before.snapshot", before_snapshot),
+        ("after.snapshot", after_snapshot),
+    ]:
+        if os.path.isfile(dir_snapshot + "/" + snapshot_name):
+            os.replace(dir_snapshot + "/" + snapshot_name, snapshot_path)
+    if os.path.isfile(before_snapshot) and os.path.isfile(after_snapshot):
+        signature = snapshot.diff_digest(before_snapshot, after_snapshot)
+    return signature
 
 
 def test_gdb_binary(gbd_binary_path, test_oracle, test_id, patch_id, timeout):
@@ -111,9 +105,11 @@ def test_gdb_binary(gbd_binary_path, test_oracle, test_id, patch_id, timeout):
     test_command = "PATCH_ID={4} timeout {3} {0} {1} {2}".format(
         test_oracle, test_id, gbd_binary_path, timeout, patch_id
     )
+    test_start = time.time()
     result = utilities.execute_command(
         test_command, timeout=timeout, output_log=output_file
     )
+    test_time = time.time() - test_start
     if int(result) != 0:
         save_err_file = definitions.DIRECTORY_OUTPUT + "/p{0}.err".format(patch_id)
         utilities.execute_command("cp {0} {1}".format(output_file_path, save_err_file))
@@ -124,6 +120,9 @@ def test_gdb_binary(gbd_binary_path, test_oracle, test_id, patch_id, timeout):
         save_err_file = definitions.DIRECTORY_OUTPUT + "/p{0}.err".format(patch_id)
         utilities.execute_command("cp {0} {1}".format(output_file_path, save_err_file))
         is_valid = False
+    else:
+        # a patch script that does not apply says nothing about the test
+        scheduler.record(test_id, is_valid, test_time)
     return is_valid
 
 
@@ -134,9 +133,11 @@ def test_gdb_binary_suite(test_suite, test_id, patch_id, timeout):
     test_command = "COVERAGE=0 PATCH_ID={0} timeout {1} {2} {3} ".format(
         patch_id, timeout, test_suite, test_id
     )
+    test_start = time.time()
     result = utilities.execute_command(
         test_command, timeout=timeout, output_log=output_file
     )
+    test_time = time.time() - test_start
     if int(result) != 0:
         save_err_file = definitions.DIRECTORY_OUTPUT + "/p{0}.err".format(patch_id)
         utilities.execute_command("cp {0} {1}".format(output_file_path, save_err_file))
@@ -147,4 +148,6 @@ def test_gdb_binary_suite(test_suite, test_id, patch_id, timeout):
         save_err_file = definitions.DIRECTORY_OUTPUT + "/p{0}.err".format(patch_id)
         utilities.execute_command("cp {0} {1}".format(output_file_path, save_err_file))
         is_valid = False
+    else:
+        scheduler.record(test_id, is_valid, test_time)
     return is_valid
@@ -0,0 +1,73 @@
+import os
+import numpy as np
+
+# Traces and coverage maps are kept on disk as .npy files and handed between
+# worker processes by path; readers map them into memory instead of copying.
+#   trace:    1-d uint64 array of executed addresses, consecutive repeats removed
+#   coverage: 2xN uint64 array, row 0 the sorted edge ids, row 1 their hit counts
+
+
+def _parse_int(token):
+    token = token.strip()
+    try:
+        return int(token, 10)
+    except ValueError:
+        return int(token, 16)
+
+
+def save_trace(trace_file_path, save_path):
+    # e9 traces have one address per line, gdb traces one "#0  0x... in ..."
+    # frame per step
+    addresses = []
+    if os.path.isfile(trace_file_path):
+        with open(trace_file_path, "r", errors="replace") as trace_file:
+            for line in trace_file:
+                if line[:2] == "00":
+                    addresses.append(int(line, 16))
+                elif line.startswith("#0 "):
+                    tokens = line.split()
+                    if len(tokens) > 1 and tokens[1].startswith("0x"):
+                        addresses.append(int(tokens[1], 16))
+    trace = np.fromiter(addresses, dtype=np.uint64, count=len(addresses))
+    if trace.size:
+        trace = trace[np.concatenate(([True], trace[1:] != trace[:-1]))]
+    np.save(save_path, trace)
+    return save_path
+
+
+def save_coverage(coverage_file_path, save_path):
+    edges = []
+    counts = []
+    if os.path.isfile(coverage_file_path):
+        with open(coverage_file_path, "r") as coverage_file:
+            for line in coverage_file:
+                if ":" not in line:
+                    continue
+                edge, count = line.split(":", 1)
+                edges.append(_parse_int(edge))
+                counts.append(int(count))
+    coverage = np.array([edges, counts], dtype=np.uint64).reshape(2, -1)
+    coverage = coverage[:, np.argsort(coverage[0], kind="stable")]
+    np.save(save_path, coverage)
+    return save_path
+
+
+def load(save_path):
+    return np.load(save_path, mmap_mode="r")
+
+
+def coverage_difference(patched_path, original_path):
+    """Sum of per-edge hit-count differences between two coverage maps."""
+    patched = load(patched_path)
+    original = load(original_path)
+    edges = np.concatenate((patched[0], original[0]))
+    counts = np.concatenate(
+        (patched[1].astype(np.int64), -original[1].astype(np.int64))
+    )
+    if not edges.size:
+        return 0
+    order = np.argsort(edges, kind="stable")
+    edges = edges[order]
+    counts = counts[order]
+    starts = np.flatnonzero(np.concatenate(([True], edges[1:] != edges[:-1])))
+    return int(np.abs(np.add.reduceat(counts, starts)).sum())
@@ -0,0 +1,307 @@
+import hashlib
+import os
+import re
+
+# Unified diffs, read line by line into FilePatch and Hunk objects. The lines of
+# a hunk are counted against the ranges of its header, so removed lines starting
+# with "-- " or added lines starting with "++ " are not taken for file headers;
+# a hunk also ends at the next hunk header or at a file header followed by a
+# hunk header, and a diff whose hunks do not match their headers is not read.
+# Used by the reader (fragments for gdb and rewrite mode), the verdict store
+# (canonical hash of a patch) and the compiler (applying a patch in memory
+# instead of running patch twice per validation).
+
+HUNK_HEADER = re.compile(r"^@@ -(\d+)(?:,(\d+))? \+(\d+)(?:,(\d+))? @@")
+DEV_NULL = "/dev/null"
+
+
+class Hunk:
+    def __init__(self, old_start, old_count, new_start, new_count):
+        self.old_start = old_start
+        self.old_count = old_count
+        self.new_start = new_start
+        self.new_count = new_count
+        # (" " | "-" | "+", text without the line break)
+        self.lines = []
+        self.no_newline = False
+
+    def is_complete(self):
+        old, new = self.line_counts()
+        return old >= self.old_count and new >= self.new_count
+
+    def line_counts(self):
+        old = sum(1 for kind, _ in self.lines if kind != "+")
+        new = sum(1 for kind, _ in self.lines if kind != "-")
+        return old, new
+
+    def is_consistent(self):
+        """Whether the lines of the hunk match the ranges of its header"""
+        return self.line_counts() == (self.old_count, self.new_count)
+
+    def old_lines(self, reverse=False):
+        added_kind = "-" if reverse else "+"
+        return [text for kind, text in self.lines if kind != added_kind]
+
+    def expected_index(self, reverse=False):
+        """Index of the content lines the hunk starts at according to its header"""
+        start = self.new_start if reverse else self.old_start
+        return start - 1 if self.old_lines(reverse) else start
+
+    def changes(self):
+        """(old line number, removed lines, added lines) of every change"""
+        change_list = []
+        old_line = self.old_start if self.old_count else self.old_start + 1
+        removed, added, start = [], [], None
+        for kind, text in self.lines + [(" ", None)]:
+            if kind == " ":
+                if removed or added:
+                    change_list.append((start, removed, added))
+                    removed, added = [], []
+                old_line += 1
+                continue
+            if start is None or not (removed or added):
+                start = old_line
+            if kind == "-":
+                removed.append(text)
+                old_line += 1
+            else:
+                added.append(text)
+        return change_list
+
+
+class FilePatch:
+    def __init__(self, old_path, new_path):
+        # as written in the "---" and "+++" lines, without timestamps
+        self.old_path = old_path
+        self.new_path = new_path
+        self.hunks = []
+
+    @property
+    def path(self):
+        return self.old_path if self.new_path == DEV_NULL else self.new_path
+
+    def is_new_file(self):
+        return self.old_path == DEV_NULL
+
+    def is_deleted_file(self):
+        return self.new_path == DEV_NULL
+
+
+def _header_path(line):
+    return line[4:].rstrip("\r\n").split("\t")[0].strip()
+
+
+def _is_file_header(line_list, index):
+    return (
+        line_list[index].startswith("--- ")
+        and index + 2 < len(line_list)
+        and line_list[index + 1].startswith("+++ ")
+        and HUNK_HEADER.match(line_list[index + 2]) is not None
+    )
+
+
+def parse(lines):
+    """
+    Yields the FilePatch of every file of a unified diff. A hunk ends when its
+    lines are complete or at a line that cannot belong to it (a hunk or file
+    header), so a hunk with wrong counts in its header is left inconsistent
+    instead of taking the lines of the next hunk or file.
+    """
+    line_list = [line.rstrip("\r\n") for line in lines]
+    file_patch = None
+    hunk = None
+    old_path = None
+    for index, line in enumerate(line_list):
+        if hunk is not None:
+            if line.startswith("\\"):
+                # "\ No newline at end of file"
+                hunk.no_newline = True
+                continue
+            is_hunk_line = line[:1] in ("", " ", "-", "+")
+            if (
+                not hunk.is_complete()
+                and is_hunk_line
+                and not _is_file_header(line_list, index)
+            ):
+                kind = line[:1] if line[:1] in ("-", "+") else " "
+                hunk.lines.append((kind, line[1:]))
+                continue
+            hunk = None
+        header = HUNK_HEADER.match(line)
+        if header and file_patch is not None:
+            old_start, old_count, new_start, new_count = header.groups()
+            hunk = Hunk(
+                int(old_start),
+                1 if old_count is None else int(old_count),
+                int(new_start),
+                1 if new_count is None else int(new_count),
+            )
+            file_patch.hunks.append(hunk)
+        elif line.startswith("--- "):
+            old_path = _header_path(line)
+        elif line.startswith("+++ ") and old_path is not None:
+            if file_patch is not None:
+                yield file_patch
+            file_patch = FilePatch(old_path, _header_path(line))
+            old_path = None
+    if file_patch is not None:
+        yield file_patch
+
+
+def read(patch_file):
+    """FilePatch list of a unified diff, empty if the file is not one or if the
+    lines of a hunk do not match the counts of its header"""
+    with open(patch_file, "r", errors="replace") as diff_file:
+        file_patch_list = list(parse(diff_file))
+    for file_patch in file_patch_list:
+        if not all(hunk.is_consistent() for hunk in file_patch.hunks):
+            return []
+    return file_patch_list
+
+
+def normalize_path(path, source_dir=None):
+    """Path relative to the source directory, without the a/ and b/ prefixes"""
+    if path == DEV_NULL:
+        return path
+    if source_dir and path.startswith(source_dir.rstrip("/") + "/"):
+        path = path[len(source_dir.rstrip("/")) + 1 :]
+    elif path.startswith(("a/", "b/")):
+        path = path[2:]
+    return path.lstrip("/")
+
+
+def source_path(file_patch, source_dir):
+    """Path of the file a patch changes, with or without its first directory,
+    None if it is not found in the source directory"""
+    if not source_dir or file_patch.is_new_file():
+        return None
+    for path in [file_patch.path, file_patch.old_path]:
+        relative_path = normalize_path(path, source_dir)
+        for candidate in [relative_path, relative_path.partition("/")[2]]:
+            if candidate and os.path.isfile(os.path.join(source_dir, candidate)):
+                return os.path.join(source_dir, candidate)
+    return None
+
+
+def canonical_text(file_patch_list, source_dir=None):
+    """
+    The changes of a patch independent of the tool that wrote it: paths are
+    normalized, trailing whitespace is dropped and every change is placed by the
+    line it lands at in the original file, as found by apply, so the context
+    lines are left out. Hunks that cannot be placed in the source directory keep
+    their position in the header and their context lines.
+    """
+    canonical = []
+    for file_patch in sorted(
+        file_patch_list, key=lambda p: normalize_path(p.path, source_dir)
+    ):
+        canonical.append("--- " + normalize_path(file_patch.old_path, source_dir))
+        canonical.append("+++ " + normalize_path(file_patch.new_path, source_dir))
+        index_list = None
+        file_path = source_path(file_patch, source_dir)
+        if file_path:
+            with open(file_path, "rb") as source_file:
+                content_lines = _content_lines(source_file.read())
+            if content_lines is not None:
+                index_list = locate(content_lines, file_patch)
+        for hunk_index, hunk in enumerate(file_patch.hunks):
+            if index_list is None:
+                canonical.append("@@ -{} @@ context".format(hunk.old_start))
+                canonical.extend(kind + text.rstrip() for kind, text in hunk.lines)
+                continue
+            shift = index_list[hunk_index] - hunk.expected_index()
+            for start, removed, added in hunk.changes():
+                canonical.append("@@ -{} @@".format(start + shift))
+                canonical.extend("-" + line.rstrip() for line in removed)
+                canonical.extend("+" + line.rstrip() for line in added)
+    return "\n".join(canonical)
+
+
+def canonical_hash(file_patch_list, source_dir=None):
+    return hashlib.sha256(
+        canonical_text(file_patch_list, source_dir).encode("utf-8", "replace")
+    ).hexdigest()
+
+
+def _same_line(line, text):
+    # like patch --ignore-whitespace
+    return line.split() == text.split()
+
+
+def _locate(content_lines, old_lines, expected, first):
+    """Index the old lines of a hunk start at, searched outwards from the
+    expected index, None if they are not found after the first index"""
+    last = len(content_lines) - len(old_lines)
+    if not old_lines:
+        return expected if first <= expected <= len(content_lines) else None
+    for distance in range(0, max(expected - first, last - expected) + 1):
+        for index in (expected - distance, expected + distance):
+            if first <= index <= last and all(
+                _same_line(content_lines[index + i], text)
+                for i, text in enumerate(old_lines)
+            ):
+                return index
+    return None
+
+
+def _content_lines(content):
+    """Lines of a file with their line breaks, None if the last line has none"""
+    text = content.decode("utf-8", "surrogateescape")
+    if text and not text.endswith("\n"):
+        return None
+    return [line + "\n" for line in text.split("\n")[:-1]]
+
+
+def locate(content_lines, file_patch, reverse=False):
+    """Index of the content lines every hunk lands at, None if a hunk is not
+    found; later hunks are searched after the earlier ones, moved by their offset"""
+    index_list = []
+    position = 0
+    offset = 0
+    for hunk in file_patch.hunks:
+        old_lines = hunk.old_lines(reverse)
+        expected = hunk.expected_index(reverse) + offset
+        index = _locate(content_lines, old_lines, expected, position)
+        if index is None:
+            return None
+        index_list.append(index)
+        position = index + len(old_lines)
+        offset = index - hunk.expected_index(reverse)
+    return index_list
+
+
+def apply(content, file_patch, reverse=False):
+    """
+    Content (bytes) of the file with the patch applied, None if a hunk does not
+    apply; files are decoded losslessly and keep their line breaks
+    """
+    content_lines = _content_lines(content)
+    if content_lines is None:
+        # left to patch, which knows where to put the missing line break
+        return None
+    if any(hunk.no_newline for hunk in file_patch.hunks):
+        return None
+    index_list = locate(content_lines, file_patch, reverse)
+    if index_list is None:
+        return None
+    line_break = "\n"
+    if content_lines and content_lines[0].endswith("\r\n"):
+        line_break = "\r\n"
+    removed_kind = "+" if reverse else "-"
+    patched_lines = []
+    position = 0
+    for hunk, index in zip(file_patch.hunks, index_list):
+        patched_lines.extend(content_lines[position:index])
+        # context lines are kept as they are in the file
+        old_index = index
+        for kind, line in hunk.lines:
+            if kind == " ":
+                patched_lines.append(content_lines[old_index])
+                old_index += 1
+            elif kind == removed_kind:
+                old_index += 1
+            else:
+                patched_lines.append(line + line_break)
+        position = old_index
+    patched_lines.extend(content_lines[position:])
+    return "".join(patched_lines).encode("utf-8", "surrogateescape")
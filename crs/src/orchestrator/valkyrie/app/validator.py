@@ -1,15 +1,82 @@
 import shutil
-from app import definitions, values, parallel, emitter, writer
+from collections import OrderedDict
+from app import definitions, values, parallel, emitter, writer, verdict_store
+from app import gdb_server, scheduler
+
+
+def reuse_verdicts(store, patch_list):
+    """
+    Splits the patches into those that need to be validated, the stored verdicts
+    of the others and the duplicates of a patch that is validated in this run
+    """
+    pending_list = OrderedDict()
+    verdict_list = dict()
+    duplicate_list = dict()
+    hash_list = dict()
+    first_list = dict()
+    for patch_id, patch_info in patch_list.items():
+        diff_hash = verdict_store.patch_hash(patch_info[2])
+        hash_list[patch_id] = diff_hash
+        verdict = store.lookup(diff_hash)
+        if verdict is not None:
+            verdict_list[patch_id] = verdict[0]
+        elif diff_hash in first_list:
+            duplicate_list[patch_id] = first_list[diff_hash]
+        else:
+            first_list[diff_hash] = patch_id
+            pending_list[patch_id] = patch_info
+    return pending_list, verdict_list, duplicate_list, hash_list
+
+
+def store_verdicts(store, hash_list, classified_list):
+    verdict_list = dict()
+    for verdict, class_list in enumerate(classified_list):
+        for patch_id in class_list:
+            failed_tests, build_time = parallel.validation_details.get(
+                patch_id, ([], None)
+            )
+            store.record(
+                patch_id, hash_list[patch_id], verdict, failed_tests, build_time
+            )
+            verdict_list[patch_id] = verdict
+    return verdict_list
 
 
 def validate_patches(patch_list, test_id_list, test_oracle, binary_path, dir_snapshot):
     emitter.sub_sub_title("Validating Patches")
+    # patches that could not be read are invalid without running anything
+    malformed_list = [p for p in patch_list if p in values.LIST_MALFORMED]
+    patch_list = OrderedDict(
+        (p, info) for p, info in patch_list.items() if p not in malformed_list
+    )
+    store = verdict_store.open_store(test_oracle, test_id_list, binary_path)
+    verdict_list = dict()
+    duplicate_list = dict()
+    hash_list = dict()
+    if store:
+        patch_list, verdict_list, duplicate_list, hash_list = reuse_verdicts(
+            store, patch_list
+        )
+        values.COUNT_CACHED = len(verdict_list) + len(duplicate_list)
+        for patch_id, verdict in verdict_list.items():
+            writer.stream_verdict(patch_id, verdict, True)
+        if values.COUNT_CACHED:
+            emitter.normal(
+                f"\t\treusing the verdicts of {values.COUNT_CACHED} known patches"
+            )
+    scheduler.load(values.DEFAULT_TEST_STATISTICS)
+    # after the verdict store lookup, the store keys on the given order
+    test_id_list = scheduler.order(test_id_list)
     emitter.normal("\t\tevaluating patches")
     classified_list = []
     if values.DEFAULT_PATCH_MODE == definitions.VALUE_OPERATE_MODE_GDB:
-        classified_list = parallel.validate_patch_list_gdb(
-            patch_list, binary_path, test_oracle, test_id_list, dir_snapshot
-        )
+        server = gdb_server.start(binary_path)
+        try:
+            classified_list = parallel.validate_patch_list_gdb(
+                patch_list, binary_path, test_oracle, test_id_list, dir_snapshot
+            )
+        finally:
+            gdb_server.stop(server)
     elif values.DEFAULT_PATCH_MODE == definitions.VALUE_OPERATE_MODE_REWRITE:
         classified_list = parallel.validate_patch_list_e9(
             patch_list, binary_path, test_oracle, test_id_list
@@ -19,4 +86,23 @@ def validate_patches(patch_list, test_id_list, test_oracle, binary_path, dir_sna
             patch_list, binary_path, test_oracle, test_id_list
         )
 
+    scheduler.compact()
+    if store:
+        verdict_list.update(store_verdicts(store, hash_list, classified_list))
+        store.close()
+        for patch_id, first_id in duplicate_list.items():
+            if first_id in verdict_list:
+                verdict_list[patch_id] = verdict_list[first_id]
+                writer.stream_verdict(patch_id, verdict_list[patch_id], True)
+        validated_list = {p for class_list in classified_list for p in class_list}
+        for patch_id, verdict in verdict_list.items():
+            if patch_id not in validated_list and verdict < len(classified_list):
+                classified_list[verdict].append(patch_id)
+    if malformed_list:
+        if not classified_list:
+            classified_list = [[] for _ in definitions.VERDICT_CLASSES]
+        verdict = definitions.VERDICT_CLASSES.index("invalid patch")
+        for patch_id in malformed_list:
+            classified_list[verdict].append(patch_id)
+            writer.stream_verdict(patch_id, verdict)
     return classified_list
@@ -38,8 +38,13 @@ CONF_TAG = None
 CONF_TIME_CHECK = None
 CONF_PATCH_LIMIT = None
 CONF_PATCH_PER_DIR_LIMIT = None
+CONF_VERDICT_STORE = None
+CONF_NO_VERDICT_STORE = False
+CONF_GDB_SERVER = False
+CONF_TEST_STATISTICS = None
+CONF_COMPLETE_TEST_RUN = False
 
-DEFAULT_COMPLETE_TEST_RUN = True
+DEFAULT_COMPLETE_TEST_RUN = False
 DEFAULT_LIMIT = 1000000
 DEFAULT_LIMIT_PER_DIR = 5
 DEFAULT_TIMEOUT = 60
@@ -59,6 +64,16 @@ ANALYSIS_RESULTS = dict()
 CONFIG_ID = None
 DEFAULT_ONLY_VALIDATE = False
 DEFAULT_PARTITION = False
+DEFAULT_USE_VERDICT_STORE = True
+DEFAULT_VERDICT_STORE = None
+DEFAULT_TEST_STATISTICS = None
+# gdb mode runs every test in a batch gdb unless --gdb-server is given
+DEFAULT_USE_GDB_SERVER = False
+DEFAULT_GDB_SESSIONS = os.cpu_count() or 1
+GDB_SERVER_SOCKET = None
+FILE_RESULT_STREAM = None
+# patches that are not unified diffs or whose hunks do not match their headers
+LIST_MALFORMED = []
 RESULT = dict()
 
 COUNT_INITIAL = 0
@@ -73,5 +88,6 @@ COUNT_HQ = 0
 COUNT_UNHANDLED = 0
 COUNT_EMPTY = 0
 COUNT_TESTS = 0
+COUNT_CACHED = 0
 
 HAS_CONFIGURED = False
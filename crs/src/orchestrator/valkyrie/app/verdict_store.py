@@ -0,0 +1,151 @@
+import hashlib
+import json
+import os
+import sqlite3
+import subprocess
+import time
+from app import definitions, emitter, unidiff, values
+
+# Verdicts of validated patches, kept in a SQLite database across runs and keyed by
+#   subject_commit: HEAD of the source directory
+#   suite_digest:   digest of the test oracle, test scripts, build scripts, test
+#                   ids and patch mode the verdict was computed with
+#   patch_hash:     canonical hash of the diff (unidiff.canonical_hash), so the
+#                   same change produced by different tools (different headers,
+#                   paths, timestamps, context) or in an earlier repair round maps
+#                   to one entry
+# The verdict is the index of the class list of validator.validate_patches the
+# patch was sorted into.
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS verdicts (
+    subject_commit TEXT NOT NULL,
+    suite_digest TEXT NOT NULL,
+    patch_hash TEXT NOT NULL,
+    verdict INTEGER NOT NULL,
+    failing_tests TEXT NOT NULL,
+    build_time REAL,
+    patch_id TEXT,
+    created REAL NOT NULL,
+    PRIMARY KEY (subject_commit, suite_digest, patch_hash)
+)
+"""
+
+def patch_hash(patch_file):
+    file_patch_list = unidiff.read(patch_file)
+    if file_patch_list:
+        return unidiff.canonical_hash(file_patch_list, values.CONF_SOURCE_DIR)
+    # not a unified diff
+    with open(patch_file, "r", errors="replace") as diff_file:
+        patch_text = "\n".join(line.rstrip() for line in diff_file)
+    return hashlib.sha256(patch_text.strip().encode()).hexdigest()
+
+
+def subject_commit():
+    if not values.CONF_SOURCE_DIR or not os.path.isdir(values.CONF_SOURCE_DIR):
+        return None
+    try:
+        commit = subprocess.check_output(
+            ["git", "-C", values.CONF_SOURCE_DIR, "rev-parse", "HEAD"],
+            stderr=subprocess.DEVNULL,
+        )
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return commit.decode().strip() or None
+
+
+def suite_digest(test_oracle, test_id_list, binary_path):
+    if values.DEFAULT_PATCH_MODE == definitions.VALUE_OPERATE_MODE_COMPILE:
+        # the binary is rebuilt from the patched sources
+        binary_path = None
+    digest = hashlib.sha256()
+    digest.update(
+        json.dumps(
+            [
+                values.DEFAULT_PATCH_MODE,
+                list(test_id_list or []),
+                values.CONF_PATCH_COMMAND,
+                values.CONF_PATCH_SCRIPT,
+            ]
+        ).encode()
+    )
+    for script in [
+        test_oracle,
+        binary_path,
+        values.CONF_PUB_TEST_SCRIPT,
+        values.CONF_PVT_TEST_SCRIPT,
+        values.CONF_ADV_TEST_SCRIPT,
+        values.CONF_BUILD_SCRIPT,
+        values.CONF_CONFIG_SCRIPT,
+    ]:
+        digest.update(b"\0")
+        if not script:
+            continue
+        if os.path.isfile(script):
+            with open(script, "rb") as script_file:
+                for chunk in iter(lambda: script_file.read(1 << 20), b""):
+                    digest.update(chunk)
+        else:
+            # e.g. an inline build command such as -c "exit 0"
+            digest.update(str(script).encode())
+    return digest.hexdigest()
+
+
+class VerdictStore:
+    def __init__(self, store_path, commit, digest):
+        self.commit = commit
+        self.digest = digest
+        os.makedirs(os.path.dirname(os.path.abspath(store_path)), exist_ok=True)
+        # several validation runs of the same subject may share the store
+        self.connection = sqlite3.connect(store_path, timeout=60)
+        self.connection.execute(SCHEMA)
+        self.connection.commit()
+
+    def lookup(self, diff_hash):
+        """(verdict, failing tests, build time) of an equivalent patch, or None"""
+        row = self.connection.execute(
+            "SELECT verdict, failing_tests, build_time FROM verdicts "
+            "WHERE subject_commit = ? AND suite_digest = ? AND patch_hash = ?",
+            (self.commit, self.digest, diff_hash),
+        ).fetchone()
+        if row is None:
+            return None
+        verdict, failing_tests, build_time = row
+        return verdict, json.loads(failing_tests), build_time
+
+    def record(self, patch_id, diff_hash, verdict, failing_tests, build_time):
+        self.connection.execute(
+            "INSERT OR REPLACE INTO verdicts VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            (
+                self.commit,
+                self.digest,
+                diff_hash,
+                verdict,
+                json.dumps(failing_tests or []),
+                build_time,
+                str(patch_id),
+                time.time(),
+            ),
+        )
+        self.connection.commit()
+
+    def close(self):
+        self.connection.close()
+
+
+def open_store(test_oracle, test_id_list, binary_path):
+    if not values.DEFAULT_USE_VERDICT_STORE:
+        return None
+    commit = subject_commit()
+    if not commit:
+        emitter.warning("\t\t[warning] subject is not a git checkout, not storing")
+        return None
+    try:
+        return VerdictStore(
+            values.DEFAULT_VERDICT_STORE,
+            commit,
+            suite_digest(test_oracle, test_id_list, binary_path),
+        )
+    except (OSError, sqlite3.Error) as e:
+        emitter.warning(f"\t\t[warning] could not open verdict store: {e}")
+        return None
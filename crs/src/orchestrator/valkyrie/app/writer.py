@@ -4,7 +4,8 @@ import pickle
 import json
 import os
 import shutil
-from app import definitions
+import time
+from app import definitions, values
 
 
 def write_as_json(data, output_file_path):
@@ -13,6 +14,36 @@ def write_as_json(data, output_file_path):
         out_file.writelines(content)
 
 
+def open_result_stream(output_file_path):
+    # one JSON object per line: a verdict as soon as it is known, {"done": true}
+    # once result.json is complete
+    values.FILE_RESULT_STREAM = output_file_path
+    os.makedirs(os.path.dirname(output_file_path), exist_ok=True)
+    with open(output_file_path, "w"):
+        pass
+
+
+def stream_verdict(patch_id, verdict, is_cached=False):
+    if not values.FILE_RESULT_STREAM:
+        return
+    entry = {
+        "patch": patch_id,
+        "class": definitions.VERDICT_CLASSES[verdict],
+        "cached": is_cached,
+        "time": round(time.time(), 3),
+    }
+    with open(values.FILE_RESULT_STREAM, "a") as out_file:
+        out_file.write(json.dumps(entry) + "\n")
+
+
+def close_result_stream():
+    if not values.FILE_RESULT_STREAM:
+        return
+    with open(values.FILE_RESULT_STREAM, "a") as out_file:
+        out_file.write(json.dumps({"done": True}) + "\n")
+    values.FILE_RESULT_STREAM = None
+
+
 def write_as_pickle(data, output_file_path):
     with open(output_file_path, "wb") as out_file:
         pickle.dump(data, out_file)